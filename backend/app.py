@@ -1,54 +1,277 @@
 import os
+import json
+import time
+import uuid
+import shutil
+import threading
+import contextvars
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
+from werkzeug.datastructures import FileStorage
+from sqlalchemy import func
 
 # --- IMPORTS ---
-from utils.audio_processor import generate_spectrogram
-from database.db import db
-from database.models import User, AuditLog
-from models.cnn_model import build_model 
+# Heavy libraries (TensorFlow, librosa/numba, matplotlib) are NOT imported here:
+# they load on the background startup thread, so /healthz answers immediately.
+from utils.startup import StartupManager, warm_up
+startup = StartupManager()
+
+with startup.phase("import_modules"):
+    from utils.audio_processor import generate_spectrogram, extract_features, spectrogram_to_tensor, compute_mel_db
+    from database.db import db, init_db
+    from database.audit_writer import AuditWriter
+    from database.models import User, AuditLog, AnalysisJob
+    from models.backends import TFLiteBackend, TFLITE_MODEL_PATH
+    from models.registry import ModelRegistry, REGISTRY_PATH
+    from utils.model_server import ModelServer
+    from utils.inference_engine import MicroBatcher, QueueFullError
+    from utils.result_cache import ResultCache
+    from utils.upload_handler import (save_upload, save_stream, spool_stream, take_upload,
+                                      decodable_in_memory, file_sha256, is_archive,
+                                      iter_archive_members, UploadTooLarge)
+    from utils.evidence_store import EvidenceStore
+    from utils.feature_payload import decode_payload, payload_sha256, PayloadError
+    from utils.spectrogram_preview import PreviewCache, PREVIEW_WIDTH, PREVIEW_HEIGHT, MAX_WIDTH, MAX_HEIGHT
+    from utils.fingerprint_index import FingerprintIndex, FINGERPRINT_PATH, MIN_SIMILARITY
+    from utils.long_audio import analyze_long_audio, estimate_window_count, WINDOW_SECONDS
+    from utils.job_queue import JobManager
+    from utils import metrics
+    from utils.metrics import timer
+    from utils.profiler import RequestProfiler
+    from utils.stream_detector import StreamDetector
+
+# Live streaming needs WebSockets (flask-sock); the rest of the server works without it
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
 
 # 1. Initialize App & Database
+class SpoolingRequest(Request):
+    """
+    Parts taking the in-memory upload path are parsed into a SpooledTemporaryFile
+    of UPLOAD_SPOOL_MAX_BYTES, so they are hashed and decoded where they are.
+    Everything else (disk mode, formats that need a path, requests over the
+    per-request RAM budget) keeps Werkzeug's default: RAM up to 500 KB, then disk.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if (uses_memory_upload(filename or '') and total_content_length is not None
+                and total_content_length <= app.config['UPLOAD_SPOOL_REQUEST_MAX_BYTES']):
+            return tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_MAX_BYTES'], mode='rb+')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)
 
-app.config['UPLOAD_FOLDER'] = '../data_store/uploads'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///vaani.db'
+app.config['UPLOAD_FOLDER'] = os.environ.get('VAANI_UPLOAD_FOLDER', '../data_store/uploads')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('VAANI_DATABASE_URI', 'sqlite:///vaani.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Uploads: 'disk' = saved under UPLOAD_FOLDER, 'memory' = hashed + decoded from a spooled buffer
+app.config['UPLOAD_MODE'] = os.environ.get('VAANI_UPLOAD_MODE', 'disk')
+app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.environ.get('VAANI_UPLOAD_SPOOL_MAX_BYTES', 16 * 1024 * 1024))
+# Requests larger than this (e.g. big batches) spool their parts to disk even in 'memory' mode
+app.config['UPLOAD_SPOOL_REQUEST_MAX_BYTES'] = int(os.environ.get('VAANI_UPLOAD_SPOOL_REQUEST_MAX_BYTES', 64 * 1024 * 1024))
+# Content-addressed background copy of in-memory uploads ('' = keep no copy)
+app.config['EVIDENCE_FOLDER'] = os.environ.get('VAANI_EVIDENCE_FOLDER', '../data_store/evidence')
+# Near-duplicate index: reports point re-encoded copies at the clip they match ('' = disabled)
+app.config['FINGERPRINT_INDEX_PATH'] = os.environ.get('VAANI_FINGERPRINT_INDEX_PATH', FINGERPRINT_PATH)
+app.config['FINGERPRINT_MIN_SIMILARITY'] = float(os.environ.get('VAANI_FINGERPRINT_MIN_SIMILARITY', MIN_SIMILARITY))
+# 'tensor' = in-memory NumPy features (fast), 'image' = legacy PNG round trip
+app.config['FEATURE_MODE'] = os.environ.get('VAANI_FEATURE_MODE', 'tensor')
+# 'keras' = full TensorFlow model, 'tflite' = exported (optionally quantized) TFLite model
+app.config['MODEL_BACKEND'] = os.environ.get('VAANI_MODEL_BACKEND', 'keras')
+app.config['TFLITE_MODEL_PATH'] = os.environ.get('VAANI_TFLITE_MODEL_PATH', TFLITE_MODEL_PATH)
+# Versioned models (models/registry.py): CURRENT is served, and polled so promotions hot-swap in
+app.config['MODEL_REGISTRY_PATH'] = os.environ.get('VAANI_MODEL_REGISTRY_PATH', REGISTRY_PATH)
+app.config['MODEL_REGISTRY_POLL_S'] = float(os.environ.get('VAANI_MODEL_REGISTRY_POLL_S', 10))
+# Startup: load the model in the background (or block at import), then warm up
+app.config['EAGER_STARTUP'] = os.environ.get('VAANI_EAGER_STARTUP', '0') == '1'
+app.config['WARMUP_ENABLED'] = os.environ.get('VAANI_WARMUP', '1') == '1'
+# Micro-batching: concurrent /analyze calls share one forward pass
+app.config['BATCH_MAX_SIZE'] = int(os.environ.get('VAANI_BATCH_MAX_SIZE', 16))
+app.config['BATCH_MAX_WAIT_MS'] = float(os.environ.get('VAANI_BATCH_MAX_WAIT_MS', 10))
+app.config['BATCH_MAX_QUEUE'] = int(os.environ.get('VAANI_BATCH_MAX_QUEUE', 256))
+app.config['PREDICT_TIMEOUT_S'] = float(os.environ.get('VAANI_PREDICT_TIMEOUT_S', 60))
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('VAANI_RESULT_CACHE_SIZE', 4096))
+# Long recordings: overlapping 3 s windows
+app.config['LONG_AUDIO_HOP_S'] = float(os.environ.get('VAANI_LONG_AUDIO_HOP_S', 1.5))
+app.config['LONG_AUDIO_MAX_WINDOWS'] = int(os.environ.get('VAANI_LONG_AUDIO_MAX_WINDOWS', 2000))
+app.config['LONG_AUDIO_BATCH'] = int(os.environ.get('VAANI_LONG_AUDIO_BATCH', 32))
+# Bulk endpoint limits
+app.config['BULK_MAX_FILES'] = int(os.environ.get('VAANI_BULK_MAX_FILES', 500))
+app.config['BULK_MAX_BYTES'] = int(os.environ.get('VAANI_BULK_MAX_BYTES', 512 * 1024 * 1024))
+app.config['BULK_EXTRACT_THREADS'] = int(os.environ.get('VAANI_BULK_EXTRACT_THREADS', 4))
+app.config['BULK_AUDIT_CHUNK'] = int(os.environ.get('VAANI_BULK_AUDIT_CHUNK', 64))  # Verdicts per audit/cache commit
+# Spectrogram previews (GET /spectrogram/<sha256>): rendered on demand, LRU bounded by bytes
+app.config['SPECTROGRAM_CACHE_BYTES'] = int(os.environ.get('VAANI_SPECTROGRAM_CACHE_BYTES', 64 * 1024 * 1024))
+# Precomputed feature uploads (POST /analyze/features, see utils/feature_payload.py)
+app.config['FEATURE_PAYLOAD_MAX_BYTES'] = int(os.environ.get('VAANI_FEATURE_PAYLOAD_MAX_BYTES', 256 * 1024))
+# Live streams (WebSocket /stream): scoring cadence and per-process limits
+app.config['STREAM_SCORE_EVERY_S'] = float(os.environ.get('VAANI_STREAM_SCORE_EVERY_S', 0.5))
+app.config['STREAM_MAX_CONCURRENT'] = int(os.environ.get('VAANI_STREAM_MAX_CONCURRENT', 64))
+app.config['STREAM_MAX_CHUNK_BYTES'] = int(os.environ.get('VAANI_STREAM_MAX_CHUNK_BYTES', 256 * 1024))
+app.config['STREAM_IDLE_TIMEOUT_S'] = float(os.environ.get('VAANI_STREAM_IDLE_TIMEOUT_S', 30))
+# Async jobs: bounded worker pool, bulk lane capped so interactive jobs always get a worker.
+# Set VAANI_JOB_WORKERS=0 in every process but one when running several server processes.
+app.config['JOB_WORKERS'] = int(os.environ.get('VAANI_JOB_WORKERS', 2))
+app.config['JOB_BULK_MAX_RUNNING'] = int(os.environ.get('VAANI_JOB_BULK_MAX_RUNNING', 1))
+
+# Audit log: write-behind bulk inserts. 'sync' = every request waits for its row to commit
+app.config['AUDIT_DURABILITY'] = os.environ.get('VAANI_AUDIT_DURABILITY', 'buffered')
+app.config['AUDIT_FLUSH_INTERVAL_S'] = float(os.environ.get('VAANI_AUDIT_FLUSH_INTERVAL_S', 0.5))
+app.config['AUDIT_MAX_BATCH'] = int(os.environ.get('VAANI_AUDIT_MAX_BATCH', 1000))
+app.config['AUDIT_PAGE_MAX'] = 1000
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+with startup.phase("init_database"):
+    init_db(app)
+
+audit_writer = AuditWriter(
+    app,
+    flush_interval=app.config['AUDIT_FLUSH_INTERVAL_S'],
+    max_batch=app.config['AUDIT_MAX_BATCH'],
+    durability=app.config['AUDIT_DURABILITY'],
+)
+evidence_store = EvidenceStore(app.config['EVIDENCE_FOLDER']) if app.config['EVIDENCE_FOLDER'] else None
+
+def evidence_path(file_hash):
+    """Stored copy of an in-memory upload, if there is one yet."""
+    if evidence_store is None:
+        return None
+    path = evidence_store.path_for(file_hash)
+    return path if os.path.exists(path) else None
+
+preview_cache = PreviewCache(compute_mel_db, resolve_source=evidence_path,
+                             max_bytes=app.config['SPECTROGRAM_CACHE_BYTES'])
+fingerprint_index = None
+if app.config['FINGERPRINT_INDEX_PATH']:
+    fingerprint_index = FingerprintIndex(app.config['FINGERPRINT_INDEX_PATH'],
+                                         min_similarity=app.config['FINGERPRINT_MIN_SIMILARITY'])
 
 # 2. Load the Hybrid AI Model
-try:
-    # Build the empty architecture first
-    global_model = build_model()
-    
-    # Check if we have a trained brain saved
-    model_path = 'vaani_model.h5'
-    
-    if os.path.exists(model_path):
-        print(f"📂 Found trained model weights at: {model_path}")
-        global_model.load_weights(model_path)
-        print("✅ Trained Intelligence Loaded Successfully!")
-    else:
-        print("⚠️ No trained model found. Using random weights (Demo Mode).")
-        print("   (Run 'python -m models.train_model' to train the system)")
+# The served model lives in model_server.active as (version, model, metadata) and is
+# hot-swapped from the registry. Its version is part of every cache key and audit entry.
+model_registry = ModelRegistry(app.config['MODEL_REGISTRY_PATH'])
+
+inference_engine = MicroBatcher(
+    None,  # Every request passes the model it was started with (see ModelServer)
+    max_batch_size=app.config['BATCH_MAX_SIZE'],
+    max_wait_ms=app.config['BATCH_MAX_WAIT_MS'],
+    max_queue_size=app.config['BATCH_MAX_QUEUE'],
+)
+
+def warm_up_model(model):
+    """Synthetic clip through decode -> mel -> predict (numba JIT, TF tracing)."""
+    if not app.config['WARMUP_ENABLED']:
+        return
+    warm_up(extract_features, lambda batch: model.predict(batch, verbose=0),
+            batch_sizes=sorted({1, app.config['BATCH_MAX_SIZE']}))
+
+model_server = ModelServer(model_registry.load, warm_up=warm_up_model)
+result_cache = ResultCache(max_entries=app.config['RESULT_CACHE_SIZE'])
+
+def load_legacy_model():
+    """The model files used before the registry existed. Returns (version, model)."""
+    # Model version = fingerprint of the weights file
+    model_version = "untrained-" + uuid.uuid4().hex[:12]
+    try:
+        tflite_path = app.config['TFLITE_MODEL_PATH']
+
+        if app.config['MODEL_BACKEND'] == 'tflite' and os.path.exists(tflite_path):
+            # Lightweight CPU backend (see models/export_tflite.py)
+            print(f"📂 Found TFLite model at: {tflite_path}")
+            model = TFLiteBackend(tflite_path)
+            model_version = "tflite-" + file_sha256(tflite_path)[:16]
+            print("✅ TFLite Intelligence Loaded Successfully!")
+        else:
+            if app.config['MODEL_BACKEND'] == 'tflite':
+                print(f"⚠️ No TFLite model at {tflite_path}, falling back to Keras.")
+                print("   (Run 'python -m models.export_tflite' to export it)")
+
+            from models.cnn_model import build_model  # Pulls in TensorFlow
+
+            # Build the empty architecture first
+            model = build_model()
+
+            # Check if we have a trained brain saved
+            model_path = 'vaani_model.h5'
 
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    # Fallback to empty model so server doesn't crash
-    global_model = build_model()
+            if os.path.exists(model_path):
+                print(f"📂 Found trained model weights at: {model_path}")
+                model.load_weights(model_path)
+                model_version = file_sha256(model_path)[:16]
+                print("✅ Trained Intelligence Loaded Successfully!")
+            else:
+                print("⚠️ No trained model found. Using random weights (Demo Mode).")
+                print("   (Run 'python -m models.train_model' to train the system)")
+
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        # Fallback to empty model so server doesn't crash
+        from models.cnn_model import build_model
+        model = build_model()
+
+    return model_version, model
+
+def load_model():
+    """Serves the registry's CURRENT version, or the legacy model files if there is none."""
+    version = model_registry.current()
+    if version:
+        try:
+            model, metadata = model_registry.load(version)
+            model_server.serve(version, model, metadata)
+            print(f"✅ Serving registry model {version} ({metadata['backend']})")
+            return
+        except Exception as e:
+            print(f"❌ Could not load registry model {version}: {e}. Falling back to legacy files.")
+
+    version, model = load_legacy_model()
+    model_server.serve(version, model, {"source": "legacy"})
+
+def run_warm_up():
+    warm_up_model(model_server.active.model)
+
+def watch_model_registry():
+    """Hot-swaps in the registry's CURRENT version whenever it changes, in every server process."""
+    interval = app.config['MODEL_REGISTRY_POLL_S']
+    if interval <= 0:
+        return
+
+    def poll():
+        failed = set()  # Versions that did not load: don't retry them every interval
+        while True:
+            time.sleep(interval)
+            try:
+                version = model_registry.current()
+                if not version or version in failed or version == model_server.active.version:
+                    continue
+                print(f"🔄 Registry CURRENT is now {version}, loading it in the background...")
+                model_server.activate(version, wait=True)
+                if model_server.active.version != version:
+                    failed.add(version)
+            except Exception as e:
+                print(f"⚠️ Model registry poll failed: {e}")
+
+    threading.Thread(target=poll, name="vaani-registry-watch", daemon=True).start()
+
+def start_job_workers():
+    if app.config['JOB_WORKERS'] > 0:
+        job_manager.start()
 
 # 3. Helper Function (This was missing!)
 def prepare_image(image_path):
     """Prepares the spectrogram for the AI model."""
+    from tensorflow.keras.preprocessing.image import load_img, img_to_array
+
     # Load as Grayscale, Resize to 128x128
     img = load_img(image_path, color_mode='grayscale', target_size=(128, 128))
     img_array = img_to_array(img)
@@ -56,7 +279,204 @@ def prepare_image(image_path):
     img_array = np.expand_dims(img_array, axis=0)  # Shape: (1, 128, 128, 1)
     return img_array
 
-# 4. The Analysis Route
+def interpret_score(prediction_value):
+    """Turns the raw sigmoid output into (label, confidence %)."""
+    # Keras Alphabetical Order: 0 = Fake, 1 = Real
+    if prediction_value > 0.5:
+        # Closer to 1.0 -> Real
+        return "Real", prediction_value * 100
+    # Closer to 0.0 -> Synthetic
+    return "Synthetic", (1 - prediction_value) * 100
+
+# 4. Analysis Pipeline (shared by the HTTP routes and the job workers)
+def wants_durable_audit():
+    """Per-request override of the durability mode (header X-Audit-Durable: 1)."""
+    try:
+        return request.headers.get('X-Audit-Durable') == '1' or None
+    except RuntimeError:  # Outside a request (job workers): use the configured mode
+        return None
+
+def log_analysis(filename, file_hash, label, confidence, model_version, claimed_audio_hash=None):
+    """FR-05: Chain of custody entry for every verdict (buffered bulk insert)."""
+    audit_writer.write(
+        durable=wants_durable_audit(),
+        user_id=1,
+        filename=filename,
+        file_hash=file_hash,
+        prediction=label,
+        confidence_score=round(confidence, 2),
+        model_version=model_version,
+        claimed_audio_hash=claimed_audio_hash
+    )
+
+def uses_memory_upload(filename):
+    """In 'memory' upload mode, formats that decode from a file object skip the disk."""
+    return app.config['UPLOAD_MODE'] == 'memory' and decodable_in_memory(filename)
+
+def keep_evidence(file_hash, buffer):
+    """Hands an in-memory upload to the content-addressed evidence store (or discards it)."""
+    if evidence_store is not None:
+        evidence_store.put(file_hash, buffer)
+    else:
+        buffer.close()
+
+def release_sources(entries):
+    """Hands every upload of a batch to the evidence store (buffers and saved copies alike)."""
+    for _, source, file_hash in entries:
+        if not isinstance(source, str):
+            keep_evidence(file_hash, source)
+        elif evidence_store is not None:
+            try:
+                keep_evidence(file_hash, open(source, 'rb'))  # Readable after the unlink below
+            except OSError as e:
+                print(f"❌ Evidence not persisted: {os.path.basename(source)} ({e})")
+
+def discard_batch(entries, batch_dir):
+    release_sources(entries)
+    shutil.rmtree(batch_dir, ignore_errors=True)
+
+def find_near_duplicate(features, model_version):
+    """
+    (AuditLog entry, similarity) of a clip that sounds the same and was
+    adjudicated by model_version, or None. Only reported next to the fresh
+    verdict (never instead of it); like the result cache, verdicts of other
+    versions are not considered.
+    """
+    if fingerprint_index is None:
+        return None
+    with timer("fingerprint_lookup"):
+        hit = fingerprint_index.search(features)
+    if hit is None:
+        return None
+    match_hash, similarity = hit
+    entry = (AuditLog.query.filter_by(file_hash=match_hash, model_version=model_version)
+             .order_by(AuditLog.log_id.desc()).first())
+    return (entry, similarity) if entry is not None else None  # Not flushed yet: nothing to report
+
+def near_duplicate_report(near_duplicate, label):
+    if near_duplicate is None:
+        return None
+    match, similarity = near_duplicate
+    return {"similarity": similarity, "same_label": match.prediction == label, "match": match.to_dict()}
+
+def analyze_file(file_path, filename, file_hash, mel_db=None, claimed_audio_hash=None):
+    """
+    Full single-clip analysis of an upload (a saved path, or an in-memory
+    buffer in 'memory' upload mode). Returns the JSON report.
+    mel_db = dB Mel-spectrogram computed elsewhere (feature uploads): skips decoding.
+    claimed_audio_hash = unverified client claim, audited next to file_hash, never used as a key.
+    """
+    # A. Content-addressed cache: identical evidence skips decode + inference
+    served = model_server.active  # Pinned for the whole request (hot swaps can't mix versions)
+    near_duplicate = None
+    with timer("cache_lookup"):
+        prediction_value = result_cache.get(file_hash, served.version)
+    cached = prediction_value is not None
+
+    if not cached:
+        # B. Extract Features
+        if app.config['FEATURE_MODE'] == 'image' and mel_db is None:
+            image_filename = filename.replace('.', '_') + '_spec.png'
+            image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
+
+            if not generate_spectrogram(file_path, image_path):
+                raise RuntimeError("Spectrogram generation failed")
+
+            with timer("prepare_image"):
+                processed_image = prepare_image(image_path)
+        else:
+            if mel_db is None:
+                try:
+                    mel_db = compute_mel_db(file_path)
+                except Exception as e:
+                    print(f"Error extracting features: {e}")
+                    raise RuntimeError("Feature extraction failed")
+            with timer("tensor"):
+                processed_image = np.expand_dims(spectrogram_to_tensor(mel_db), axis=0)
+            # The matrix itself, not the path: UPLOAD_FOLDER/<name> is reused by the next same-named upload
+            preview_cache.remember(file_hash, mel_db)
+
+        # C. Run AI Prediction (always: a fingerprint match never replaces the model's verdict)
+        with timer("predict"):
+            prediction_value = inference_engine.predict(
+                processed_image, timeout=app.config['PREDICT_TIMEOUT_S'], model=served.model
+            )
+        model_server.maybe_shadow(processed_image, prediction_value)
+        with timer("cache_store"):
+            result_cache.put(file_hash, served.version, prediction_value)
+
+        # D. Re-encoded / trimmed copy of an adjudicated clip: reported alongside, for the examiner
+        near_duplicate = find_near_duplicate(processed_image, served.version)
+        if fingerprint_index is not None:
+            with timer("fingerprint_insert"):
+                fingerprint_index.add(processed_image, file_hash)
+
+    label, confidence = interpret_score(prediction_value)
+
+    # E. Log to Database
+    with timer("audit_log"):
+        log_analysis(filename, file_hash, label, confidence, served.version, claimed_audio_hash)
+
+    # F. Full Report
+    report = {
+        "message": "Analysis Complete",
+        "filename": filename,
+        "file_hash": file_hash,
+        "model_version": served.version,
+        "cached": cached,
+        "near_duplicate": near_duplicate_report(near_duplicate, label),
+        "spectrogram": f"/spectrogram/{file_hash}" if preview_cache.knows(file_hash) else None,
+        "result": {
+            "label": label,
+            "confidence": f"{confidence:.2f}%",
+            "note": "Analysis performed by VAANI Hybrid CRNN Engine"
+        }
+    }
+    if claimed_audio_hash:
+        report["claimed_audio_sha256"] = claimed_audio_hash
+    return report
+
+def analyze_long_file(file_path, filename, file_hash, hop, max_windows, on_progress=None):
+    """Sliding-window analysis of a saved long recording. Returns the JSON report."""
+    served = model_server.active
+    report = analyze_long_audio(
+        file_path,
+        lambda batch: inference_engine.predict_batch(batch, timeout=app.config['PREDICT_TIMEOUT_S'],
+                                                     model=served.model),
+        hop_seconds=hop,
+        max_windows=max_windows,
+        batch_size=app.config['LONG_AUDIO_BATCH'],
+        on_progress=on_progress,
+    )
+    label, confidence = interpret_score(report["aggregate"]["mean_score"])
+
+    log_analysis(filename, file_hash, label, confidence, served.version)
+
+    return {
+        "message": "Analysis Complete",
+        "filename": filename,
+        "file_hash": file_hash,
+        "model_version": served.version,
+        "result": {
+            "label": label,
+            "confidence": f"{confidence:.2f}%",
+            "note": "Sliding-window analysis by VAANI Hybrid CRNN Engine"
+        },
+        **report
+    }
+
+def parse_long_options(form):
+    """Validated (hop, max_windows) from a request form. Raises ValueError."""
+    hop = float(form.get('hop', app.config['LONG_AUDIO_HOP_S']))
+    max_windows = min(int(form.get('max_windows', app.config['LONG_AUDIO_MAX_WINDOWS'])),
+                      app.config['LONG_AUDIO_MAX_WINDOWS'])
+    if hop <= 0 or max_windows <= 0:
+        raise ValueError("hop and max_windows must be positive")
+    if hop > WINDOW_SECONDS:
+        raise ValueError(f"hop must be at most the {WINDOW_SECONDS:g} s window (no audio left unscored)")
+    return hop, max_windows
+
+# 5. The Analysis Routes
 @app.route('/analyze', methods=['POST'])
 def analyze_audio():
     if 'file' not in request.files:
@@ -66,67 +486,663 @@ def analyze_audio():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    if file:
+    try:
+        filename = secure_filename(file.filename)
+
+        if uses_memory_upload(filename):
+            # Zero-disk path: hash the parser's spooled buffer in place, decode from it
+            with timer("spool_upload"):
+                buffer, file_hash, size = take_upload(file)
+            metrics.BYTES_PROCESSED.inc(size)
+            try:
+                return jsonify(analyze_file(buffer, filename, file_hash)), 200
+            finally:
+                keep_evidence(file_hash, buffer)
+
+        # Save Audio (hashed while it streams in)
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        with timer("save_upload"):
+            file_hash, size = save_upload(file, file_path)
+        metrics.BYTES_PROCESSED.inc(size)
+
+        return jsonify(analyze_file(file_path, filename, file_hash)), 200
+
+    except QueueFullError:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    except Exception as e:
+        print(f"Server Error: {e}")
+        return jsonify({"error": f"Processing Failed: {str(e)}"}), 500
+
+# Precomputed Features (edge clients upload a few KB of float16 Mel dB instead of the audio)
+@app.route('/analyze/features', methods=['POST'])
+def analyze_features():
+    """
+    Body: a feature payload (utils/feature_payload.py), raw or as multipart
+    field 'features'. X-Filename names the clip. The payload's own SHA-256
+    keys the cache, audit log, fingerprints and preview: the server never saw
+    the audio, so an X-Audio-SHA256 header is only recorded as the client's
+    claim (claimed_audio_sha256), never used as the evidence hash.
+    """
+    max_bytes = app.config['FEATURE_PAYLOAD_MAX_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes + 64 * 1024:
+        return jsonify({"error": f"Payload larger than {max_bytes} bytes"}), 413
+
+    upload = request.files.get('features') if request.mimetype == 'multipart/form-data' else None
+    # Bounded even without a Content-Length (chunked bodies)
+    payload = upload.read(max_bytes + 1) if upload is not None else request.stream.read(max_bytes + 1)
+    if not payload:
+        return jsonify({"error": "No feature payload"}), 400
+    if len(payload) > max_bytes:
+        return jsonify({"error": f"Payload larger than {max_bytes} bytes"}), 413
+
+    claimed_hash = (request.headers.get('X-Audio-SHA256') or '').lower()
+    if claimed_hash and (len(claimed_hash) != 64 or any(c not in '0123456789abcdef' for c in claimed_hash)):
+        return jsonify({"error": "X-Audio-SHA256 must be a hex SHA-256"}), 400
+    filename = secure_filename(request.headers.get('X-Filename') or request.form.get('filename')
+                               or (upload.filename if upload is not None else '')) or 'features.vmel'
+
+    try:
+        with timer("decode_payload"):
+            S_dB = decode_payload(payload)
+        metrics.BYTES_PROCESSED.inc(len(payload))
+
+        report = analyze_file(None, filename, payload_sha256(payload), mel_db=S_dB,
+                              claimed_audio_hash=claimed_hash or None)
+        return jsonify(report), 200
+
+    except PayloadError as e:
+        return jsonify({"error": f"Invalid feature payload: {e}"}), 400
+
+    except QueueFullError:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    except Exception as e:
+        print(f"Server Error: {e}")
+        return jsonify({"error": f"Processing Failed: {str(e)}"}), 500
+
+# Spectrogram Preview (lazy render, LRU + ETag)
+@app.route('/spectrogram/<file_hash>', methods=['GET'])
+def spectrogram_preview(file_hash):
+    """
+    PNG of the clip's Mel-spectrogram (?w=&h= to resize). A matching
+    If-None-Match is answered with 304 without decoding or rendering.
+    """
+    if len(file_hash) != 64 or any(c not in '0123456789abcdef' for c in file_hash):
+        return jsonify({"error": "Unknown spectrogram"}), 404
+    try:
+        width = int(request.args.get('w', PREVIEW_WIDTH))
+        height = int(request.args.get('h', PREVIEW_HEIGHT))
+    except ValueError:
+        return jsonify({"error": "w and h must be integers"}), 400
+    if not (0 < width <= MAX_WIDTH and 0 < height <= MAX_HEIGHT):
+        return jsonify({"error": f"Size must be at most {MAX_WIDTH}x{MAX_HEIGHT}"}), 400
+    if not preview_cache.knows(file_hash):
+        return jsonify({"error": "Unknown spectrogram"}), 404
+
+    etag = PreviewCache.etag(file_hash, width, height)
+    if request.if_none_match.contains(etag):
+        preview_cache.count_not_modified()
+        response = Response(status=304)
+    else:
         try:
-            # A. Save Audio
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
-            # B. Generate Spectrogram
-            image_filename = filename.replace('.', '_') + '_spec.png'
-            image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
-            
-            result_path = generate_spectrogram(file_path, image_path)
-            
-            if not result_path:
-                 return jsonify({"error": "Spectrogram generation failed"}), 500
-
-            # --- REPLACEMENT FOR SECTION C IN APP.PY ---
-
-            # C. Run AI Prediction
-            processed_image = prepare_image(image_path)
-            prediction_value = global_model.predict(processed_image)[0][0]
-            
-            # Keras Alphabetical Order: 0 = Fake, 1 = Real
-            
-            if prediction_value > 0.5:
-                # Closer to 1.0 -> Real
-                label = "Real"
-                confidence = prediction_value * 100
+            png = preview_cache.get(file_hash, width, height)
+        except Exception as e:
+            print(f"Server Error: {e}")
+            return jsonify({"error": f"Rendering Failed: {str(e)}"}), 500
+        if png is None:
+            return jsonify({"error": "Unknown spectrogram"}), 404
+        response = Response(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+# Long Recording Analysis (sliding windows)
+@app.route('/analyze/long', methods=['POST'])
+def analyze_long():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+
+    try:
+        hop, max_windows = parse_long_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid options: {e}"}), 400
+
+    try:
+        filename = secure_filename(file.filename)
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        with timer("save_upload"):
+            file_hash, size = save_upload(file, file_path)
+        metrics.BYTES_PROCESSED.inc(size)
+
+        return jsonify(analyze_long_file(file_path, filename, file_hash, hop, max_windows)), 200
+
+    except QueueFullError:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    except Exception as e:
+        print(f"Server Error: {e}")
+        return jsonify({"error": f"Processing Failed: {str(e)}"}), 500
+
+# Bulk Analysis (many files or one archive -> streamed NDJSON)
+def collect_bulk_uploads(batch_dir):
+    """
+    Reads every uploaded file (or every audio member of an uploaded archive).
+    Returns a list of (filename, source, file_hash) entries, where source is a
+    path under batch_dir, or a spooled buffer for files taking the in-memory path.
+    """
+    max_files = app.config['BULK_MAX_FILES']
+    budget = app.config['BULK_MAX_BYTES']
+    entries = []
+
+    def sources():
+        for upload in request.files.getlist('files') + request.files.getlist('archive'):
+            if upload.filename == '':
+                continue
+            if is_archive(upload.filename):
+                yield from ((name, member) for name, member, _ in iter_archive_members(upload))
             else:
-                # Closer to 0.0 -> Synthetic
-                label = "Synthetic"
-                confidence = (1 - prediction_value) * 100
-            
-            # -------------------------------------------
-            
-            # D. Log to Database
-            new_log = AuditLog(
-                user_id=1,
-                filename=filename,
-                file_hash="PENDING_HASH",
-                prediction=label,
-                confidence_score=round(confidence, 2)
-            )
-            db.session.add(new_log)
+                yield upload.filename, upload
+
+    try:
+        for name, item in sources():
+            if len(entries) >= max_files:
+                raise UploadTooLarge(f"more than {max_files} files")
+            filename = secure_filename(os.path.basename(name)) or f"file_{len(entries)}"
+            # Plain uploads were already spooled by the form parser; archive members are not
+            is_upload = isinstance(item, FileStorage)
+            stream = item.stream if is_upload else item
+            if uses_memory_upload(filename):
+                with timer("spool_upload"):
+                    if is_upload:
+                        source, file_hash, size = take_upload(item, max_bytes=budget)
+                    else:
+                        source, file_hash, size = spool_stream(
+                            stream, max_bytes=budget, spool_max=app.config['UPLOAD_SPOOL_MAX_BYTES'])
+            else:
+                os.makedirs(batch_dir, exist_ok=True)
+                source = os.path.join(batch_dir, f"{len(entries):05d}_{filename}")
+                with timer("save_upload"):
+                    file_hash, size = save_stream(stream, source, max_bytes=budget)
+            metrics.BYTES_PROCESSED.inc(size)
+            budget -= size
+            entries.append((filename, source, file_hash))
+    except Exception:
+        discard_batch(entries, batch_dir)
+        raise
+
+    return entries
+
+def score_path(source, served):
+    """Thread-pool task: features + (micro-batched) prediction for one file (path or buffer)."""
+    features = extract_features(source)
+    if features is None:
+        raise RuntimeError("Feature extraction failed")
+    with timer("predict"):
+        score = inference_engine.predict(features, timeout=app.config['PREDICT_TIMEOUT_S'], model=served.model)
+    model_server.maybe_shadow(features, score)
+    return score
+
+def bulk_request_limit():
+    """Largest acceptable /analyze/batch body: the byte budget plus multipart framing."""
+    return app.config['BULK_MAX_BYTES'] + 64 * 1024 + app.config['BULK_MAX_FILES'] * 1024
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    # Rejected before the form parser spools anything
+    if request.content_length is not None and request.content_length > bulk_request_limit():
+        return jsonify({"error": f"Batch too large: more than {app.config['BULK_MAX_BYTES']} bytes"}), 413
+    if not request.files.getlist('files') and not request.files.getlist('archive'):
+        return jsonify({"error": "No 'files' or 'archive' part"}), 400
+
+    # Created on first use: in 'memory' upload mode most batches never touch it
+    batch_dir = os.path.join(app.config['UPLOAD_FOLDER'], f"batch_{uuid.uuid4().hex}")
+    try:
+        entries = collect_bulk_uploads(batch_dir)
+    except UploadTooLarge as e:
+        return jsonify({"error": f"Batch too large: {e}"}), 413
+    except Exception as e:
+        return jsonify({"error": f"Could not read upload: {str(e)}"}), 400
+
+    if not entries:
+        discard_batch(entries, batch_dir)
+        return jsonify({"error": "No audio files found in upload"}), 400
+
+    durable = wants_durable_audit()
+
+    # Server-Timing is long gone once the body streams: a traced batch reports its stages in the summary
+    traced = request.headers.get('X-Vaani-Trace') == '1'
+
+    def generate():
+        start = time.perf_counter()
+        served = model_server.active
+        trace_token = metrics.start_capture() if traced else None
+        logs, counts = [], {"ok": 0, "cached": 0, "error": 0}
+
+        def commit_verdicts():
+            """Audit rows + cache rows so far, one bulk insert / commit per chunk."""
             db.session.commit()
+            if logs:
+                audit_writer.write_many(logs[:], durable=durable)
+                logs.clear()
 
-            # E. Return Full Report
-            return jsonify({
-                "message": "Analysis Complete",
-                "filename": filename,
-                "spectrogram": image_path,
-                "result": {
-                    "label": label,
-                    "confidence": f"{confidence:.2f}%",
-                    "note": "Analysis performed by VAANI Hybrid CRNN Engine"
-                }
-            }), 200
+        def line(filename, file_hash, prediction_value, cached):
+            label, confidence = interpret_score(prediction_value)
+            logs.append({"user_id": 1, "filename": filename, "file_hash": file_hash,
+                         "prediction": label, "confidence_score": round(confidence, 2),
+                         "model_version": served.version})
+            counts["cached" if cached else "ok"] += 1
+            if len(logs) >= app.config['BULK_AUDIT_CHUNK']:
+                commit_verdicts()
+            return json.dumps({"filename": filename, "file_hash": file_hash, "status": "ok",
+                               "label": label, "confidence": f"{confidence:.2f}%",
+                               "raw_score": round(float(prediction_value), 4),
+                               "cached": cached}) + "\n"
 
-        except Exception as e:
-            print(f"Server Error: {e}")
-            return jsonify({"error": f"Processing Failed: {str(e)}"}), 500
+        # finally: verdicts already reached are logged even if the client disconnects (FR-05)
+        try:
+            with ThreadPoolExecutor(max_workers=app.config['BULK_EXTRACT_THREADS']) as pool:
+                futures = {}
+                for filename, source, file_hash in entries:
+                    prediction_value = result_cache.get(file_hash, served.version)
+                    if prediction_value is not None:
+                        yield line(filename, file_hash, prediction_value, True)
+                    else:
+                        # Each task runs in a copy of this context, so its stage timings are captured
+                        task = pool.submit(contextvars.copy_context().run, score_path, source, served)
+                        futures[task] = (filename, file_hash)
+
+                for future in as_completed(futures):
+                    filename, file_hash = futures[future]
+                    try:
+                        prediction_value = future.result()
+                    except Exception as e:
+                        counts["error"] += 1
+                        if isinstance(e, QueueFullError):
+                            metrics.REJECTED.inc(stage="bulk_file")
+                        else:
+                            metrics.ERRORS.inc(stage="bulk_file")
+                        yield json.dumps({"filename": filename, "file_hash": file_hash,
+                                          "status": "error", "error": str(e)}) + "\n"
+                        continue
+                    result_cache.put(file_hash, served.version, prediction_value, commit=False)
+                    yield line(filename, file_hash, prediction_value, False)
+        finally:
+            commit_verdicts()
+            stages = metrics.stop_capture(trace_token) if trace_token is not None else None
+
+        summary = {**counts, "files": len(entries), "model_version": served.version,
+                   "seconds": round(time.perf_counter() - start, 3)}
+        if stages is not None:
+            summary["stages_ms"] = {stage: round(seconds * 1000, 2) for stage, seconds in stages.items()}
+        yield json.dumps({"summary": summary}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Uploads go to the evidence store and batch_dir is removed once streaming is over (or aborted)
+    response.call_on_close(lambda: discard_batch(entries, batch_dir))
+    return response
+
+# Live Streaming Detection (WebSocket, incremental STFT)
+stream_slots = threading.BoundedSemaphore(app.config['STREAM_MAX_CONCURRENT'])
+
+def analyze_stream(ws):
+    """
+    WebSocket /stream?sample_rate=16000&format=s16le&score_every=0.5
+
+    The client sends binary messages of mono PCM and the text message 'end'
+    when done. The server answers with JSON events: 'ready', a 'score' for
+    the latest 128-frame window every score_every seconds of audio, and a
+    final 'summary' (also written to the audit log).
+    """
+    def send(event, **fields):
+        ws.send(json.dumps({"event": event, **fields}))
+
+    try:
+        detector = StreamDetector(
+            int(request.args.get('sample_rate', 16000)),
+            request.args.get('format', 's16le'),
+            score_every_s=float(request.args.get('score_every', app.config['STREAM_SCORE_EVERY_S'])),
+        )
+    except ValueError as e:
+        send("error", error=f"Invalid options: {e}")
+        return
+
+    if not stream_slots.acquire(blocking=False):
+        send("error", error="Too many live streams, please retry")
+        return
+
+    stream_id = uuid.uuid4().hex
+    served = model_server.active  # A stream is scored by one version from start to end
+    closed = False
+    try:
+        send("ready", stream_id=stream_id, model_version=served.version,
+             window_frames=detector.window_frames, score_every_frames=detector.score_every)
+        while True:
+            message = ws.receive(timeout=app.config['STREAM_IDLE_TIMEOUT_S'])
+            if message is None or (isinstance(message, str) and message.strip() == 'end'):
+                break
+            if isinstance(message, str):
+                continue
+            if len(message) > app.config['STREAM_MAX_CHUNK_BYTES']:
+                send("error", error=f"Chunk larger than {app.config['STREAM_MAX_CHUNK_BYTES']} bytes")
+                break
+            metrics.BYTES_PROCESSED.inc(len(message))
+
+            due = detector.feed(message)
+            if due is None:
+                continue
+            end_seconds, tensor = due
+            try:
+                with timer("predict"):
+                    score = float(inference_engine.predict(tensor, timeout=app.config['PREDICT_TIMEOUT_S'],
+                                                           model=served.model))
+            except QueueFullError:
+                send("skipped", t=round(end_seconds, 3), reason="server busy")
+                continue
+            detector.record(score)
+            label, confidence = interpret_score(score)
+            send("score", t=round(end_seconds, 3), raw_score=round(score, 4),
+                 label=label, confidence=f"{confidence:.2f}%")
+    except ConnectionClosed:
+        closed = True
+    finally:
+        stream_slots.release()
+
+    summary = detector.summary()
+    if summary["windows_scored"]:
+        label, confidence = interpret_score(summary["mean_score"])
+        log_analysis(f"stream_{stream_id}", summary["sha256"], label, confidence, served.version)
+        summary.update(label=label, confidence=f"{confidence:.2f}%")
+    if not closed:
+        send("summary", stream_id=stream_id, **summary)
+
+if Sock is not None:
+    Sock(app).route('/stream')(analyze_stream)
+else:
+    print("⚠️ flask-sock not installed: live streaming (/stream) is disabled.")
+
+# 6. Asynchronous Jobs
+def run_single_job(job, report_progress):
+    return analyze_file(job.file_path, job.filename, job.file_hash)
+
+def run_long_job(job, report_progress):
+    options = json.loads(job.options or "{}")
+    hop = options.get('hop', app.config['LONG_AUDIO_HOP_S'])
+    max_windows = options.get('max_windows', app.config['LONG_AUDIO_MAX_WINDOWS'])
+    expected = estimate_window_count(job.file_path, hop, max_windows) or max_windows
+    return analyze_long_file(job.file_path, job.filename, job.file_hash, hop, max_windows,
+                             on_progress=lambda done: report_progress(done / expected))
+
+job_manager = JobManager(
+    app,
+    handlers={'single': run_single_job, 'long': run_long_job},
+    workers=app.config['JOB_WORKERS'],
+    bulk_max_running=app.config['JOB_BULK_MAX_RUNNING'],
+)
+
+# Model loading, warm-up and job workers run after the routes are defined (end of file)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+
+    kind = request.form.get('kind', 'single')
+    lane = request.form.get('priority', 'interactive')
+    if kind not in ('single', 'long'):
+        return jsonify({"error": "kind must be 'single' or 'long'"}), 400
+    if lane not in ('interactive', 'bulk'):
+        return jsonify({"error": "priority must be 'interactive' or 'bulk'"}), 400
+
+    options = {}
+    if kind == 'long':
+        try:
+            options['hop'], options['max_windows'] = parse_long_options(request.form)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid options: {e}"}), 400
+
+    job_id = uuid.uuid4().hex
+    filename = secure_filename(file.filename)
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
+    with timer("save_upload"):
+        file_hash, size = save_upload(file, file_path)
+    metrics.BYTES_PROCESSED.inc(size)
+
+    job = job_manager.submit(AnalysisJob(
+        job_id=job_id, kind=kind, lane=lane, filename=filename,
+        file_path=file_path, file_hash=file_hash, options=json.dumps(options)
+    ))
+    return jsonify({"job_id": job.job_id, "status": job.status,
+                    "status_url": f"/jobs/{job.job_id}"}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+# 7. Inference Engine Stats
+@app.route('/inference/stats', methods=['GET'])
+def inference_stats():
+    stats = inference_engine.stats()
+    stats["result_cache"] = result_cache.stats()
+    stats["jobs"] = job_manager.stats()
+    stats["evidence"] = evidence_store.stats() if evidence_store is not None else None
+    stats["spectrogram_previews"] = preview_cache.stats()
+    stats["fingerprints"] = fingerprint_index.stats() if fingerprint_index is not None else None
+    stats["model"] = model_server.status()
+    return jsonify(stats), 200
+
+# Model Registry & Hot Swap
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Registered versions, the one CURRENT names, and what this process is serving."""
+    return jsonify({
+        "registry": app.config['MODEL_REGISTRY_PATH'],
+        "current": model_registry.current(),
+        "versions": model_registry.versions(),
+        "serving": model_server.status(),
+    }), 200
+
+@app.route('/models/activate', methods=['POST'])
+def activate_model():
+    """
+    Hot-swaps this process to {"version": ...}: loaded and warmed in the
+    background while the old version keeps answering. Pass "promote": true
+    to also point the registry's CURRENT at it (all processes follow) once it
+    is serving here: a version that fails to load or warm up is never promoted.
+    """
+    payload = request.get_json(silent=True) or {}
+    version = payload.get('version')
+    try:
+        model_registry.metadata(version or '')
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+
+    promote = bool(payload.get('promote'))
+    started = model_server.activate(version, on_activated=model_registry.set_current if promote else None)
+    return jsonify({"version": version, "started": started, "promote": promote,
+                    "status_url": "/models"}), 202
+
+@app.route('/models/shadow', methods=['POST', 'DELETE'])
+def shadow_model():
+    """
+    Scores a sample of live traffic with a candidate version too: {"version": ..., "rate": 0.1}.
+    The candidate loads in the background; GET /models shows when it is scoring.
+    """
+    if request.method == 'DELETE':
+        model_server.clear_shadow()
+        return jsonify(model_server.status()), 200
+
+    payload = request.get_json(silent=True) or {}
+    version = payload.get('version') or ''
+    try:
+        model_registry.metadata(version)
+        started = model_server.set_shadow(version, float(payload.get('rate', 0.1)))
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({"error": f"Invalid options: {e}"}), 400
+    return jsonify({"version": version, "started": started, "status_url": "/models"}), 202
+
+# 8. Audit Log Query API
+def audit_filters(query):
+    """Applies the optional ?user_id=&prediction=&file_hash=&model_version=&since=&until= filters."""
+    args = request.args
+    if 'user_id' in args:
+        query = query.filter(AuditLog.user_id == int(args['user_id']))
+    if 'prediction' in args:
+        query = query.filter(AuditLog.prediction == args['prediction'])
+    if 'file_hash' in args:
+        query = query.filter(AuditLog.file_hash == args['file_hash'])
+    if 'model_version' in args:
+        query = query.filter(AuditLog.model_version == args['model_version'])
+    if 'since' in args:
+        query = query.filter(AuditLog.timestamp >= datetime.fromisoformat(args['since']))
+    if 'until' in args:
+        query = query.filter(AuditLog.timestamp < datetime.fromisoformat(args['until']))
+    return query
+
+@app.route('/audit', methods=['GET'])
+def audit_log():
+    """
+    Keyset-paginated audit trail, newest first.
+    Pass the returned next_cursor as ?cursor= to get the next page; cost per
+    page stays constant no matter how deep you go (no OFFSET scans).
+    """
+    try:
+        limit = min(int(request.args.get('limit', 100)), app.config['AUDIT_PAGE_MAX'])
+        query = audit_filters(AuditLog.query)
+        if 'cursor' in request.args:
+            query = query.filter(AuditLog.log_id < int(request.args['cursor']))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+
+    rows = query.order_by(AuditLog.log_id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return jsonify({
+        "items": [row.to_dict() for row in rows],
+        "next_cursor": rows[-1].log_id if has_more else None,
+    }), 200
+
+@app.route('/audit/stats', methods=['GET'])
+def audit_stats():
+    """Aggregate counts per prediction for the same filters as /audit."""
+    try:
+        query = audit_filters(db.session.query(AuditLog.prediction, func.count(AuditLog.log_id)))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+
+    counts = {prediction or "unknown": count for prediction, count in query.group_by(AuditLog.prediction).all()}
+    return jsonify({"total": sum(counts.values()), "by_prediction": counts,
+                    "writer": audit_writer.stats()}), 200
+
+# 9. Metrics & Tracing
+profiler = RequestProfiler()
+metrics.REGISTRY.register(metrics.Gauge(
+    "vaani_inference_queue_depth", "Tensors waiting for the micro-batcher.",
+    lambda: inference_engine.stats()["queue_depth"]))
+metrics.REGISTRY.register(metrics.Gauge(
+    "vaani_audit_buffered", "Audit rows waiting to be flushed.",
+    lambda: audit_writer.stats()["buffered"]))
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    # Per-request stage breakdown, returned as a Server-Timing header on demand
+    g.trace_token = metrics.start_capture() if request.headers.get('X-Vaani-Trace') == '1' else None
+    g.profile = profiler.maybe_start()
+
+@app.after_request
+def finish_request_metrics(response):
+    endpoint = request.endpoint or "unknown"
+    start = g.get('request_start')
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+    metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if response.status_code == 503:
+        metrics.REJECTED.inc(stage=endpoint)  # Busy / starting up: load shedding, not a failure
+    elif response.status_code >= 500:
+        metrics.ERRORS.inc(stage=endpoint)
+
+    if g.get('trace_token') is not None:
+        stages = metrics.stop_capture(g.trace_token)
+        g.trace_token = None
+        response.headers['Server-Timing'] = metrics.server_timing_header(stages)
+    if g.get('profile') is not None:
+        profiler.finish(g.profile, endpoint)
+        g.profile = None
+    return response
+
+@app.teardown_request
+def release_request_profiler(exc):
+    # after_request is skipped when a request dies with an unhandled error
+    if g.get('profile') is not None:
+        profiler.finish(g.profile, request.endpoint or "unknown")
+        g.profile = None
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profiler', methods=['GET', 'POST'])
+def profiler_control():
+    """POST {"enabled": true, "sample_rate": 0.05} to profile a sample of requests."""
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        try:
+            profiler.configure(body.get('enabled', False), body.get('sample_rate'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid profiler settings: {e}"}), 400
+    return jsonify(profiler.status()), 200
+
+# 10. Health & Readiness
+MODEL_ENDPOINTS = {'analyze_audio', 'analyze_features', 'analyze_long', 'analyze_batch', 'analyze_stream', 'submit_job'}
+
+@app.before_request
+def reject_until_ready():
+    """Analysis endpoints answer 503 (with Retry-After) until the model is warm."""
+    if request.endpoint in MODEL_ENDPOINTS and not startup.ready:
+        response = jsonify({"error": "Server is starting up, please retry", **startup.status()})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return jsonify({"status": "ok", **startup.status()}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: model loaded and warmed up."""
+    status = startup.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+STARTUP_STEPS = [
+    ("load_model", load_model),
+    ("warm_up", run_warm_up),
+    ("start_job_workers", start_job_workers),
+    ("watch_model_registry", watch_model_registry),
+]
+
+if app.config['EAGER_STARTUP']:
+    for name, step in STARTUP_STEPS:
+        with startup.phase(name):
+            step()
+    startup.mark_ready()
+else:
+    startup.run_in_background(STARTUP_STEPS)
 
 if __name__ == '__main__':
     print("🚀 VAANI Forensic Server is starting...")
@@ -1,99 +1,313 @@
 import os
+import csv
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 import pandas as pd # For nice tables
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-from utils.audio_processor import generate_spectrogram
+from utils.audio_processor import generate_spectrogram, extract_features
+from utils import metrics
+from utils.feature_payload import encode_audio, FeatureClient
+from utils.upload_handler import file_sha256
+from models.backends import load_backend, BACKENDS, TFLITE_MODEL_PATH
 
 # --- CONFIGURATION ---
 TEST_FOLDER = "test_zone"
 MODEL_PATH = "vaani_model.h5"
+MODEL_BACKEND = "keras"  # "keras" or "tflite" (see models/export_tflite.py)
+REPORT_PATH = "batch_report.csv"
 IMG_SIZE = (128, 128)
+FEATURE_MODE = "tensor"  # "tensor" = in-memory features, "image" = legacy PNG round trip
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
+DEFAULT_WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 256       # Files per extract -> predict -> write cycle
+PREDICT_BATCH = 64     # Model batch size inside a chunk
+REPORT_COLUMNS = ["File", "Prediction", "Confidence", "Raw_Score", "Status"]
+UPLOAD_THREADS = 8     # Concurrent POST /analyze/features requests (--server mode)
 
 def prepare_image(img_path):
     """Loads and preprocesses image exactly like the app."""
+    from tensorflow.keras.preprocessing import image  # Only the legacy image mode needs TensorFlow here
+
     img = image.load_img(img_path, target_size=IMG_SIZE, color_mode='grayscale')
     img_array = image.img_to_array(img)
     img_array = np.expand_dims(img_array, axis=0) # Add batch dimension
     img_array /= 255.0  # Normalize
     return img_array
 
-def run_batch_test():
-    print(f"🚀 Starting Batch Forensic Analysis on '{TEST_FOLDER}'...")
-    
-    # 1. Load Model
-    if not os.path.exists(MODEL_PATH):
-        print("❌ Error: Model file not found!")
-        return
-    
-    print("🧠 Loading VAANI Super-Model...")
-    model = load_model(MODEL_PATH)
-    
-    # 2. Find Audio Files
-    audio_extensions = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
-    files = [f for f in os.listdir(TEST_FOLDER) if f.lower().endswith(audio_extensions)]
-    
+def load_features(audio_path):
+    """
+    Worker: decode + feature extraction for one file.
+    Returns (features or None, error message or None, seconds spent, stage timings).
+    """
+    start = time.perf_counter()
+    with metrics.capture() as stages:
+        try:
+            if FEATURE_MODE == "image":
+                temp_img_path = audio_path + "_spec.png"
+                spec_path = generate_spectrogram(audio_path, temp_img_path)
+                if not spec_path:
+                    features, error = None, "Error (Spec Generation)"
+                else:
+                    with metrics.timer("prepare_image"):
+                        features, error = prepare_image(spec_path)[0], None
+                    os.remove(temp_img_path)
+            else:
+                features = extract_features(audio_path)
+                error = None if features is not None else "Error (Feature Extraction)"
+                if features is not None:
+                    features = features[0]
+        except Exception as e:
+            features, error = None, f"Error: {str(e)}"
+    return features, error, time.perf_counter() - start, dict(stages)
+
+def load_payload(audio_path):
+    """
+    Worker (--server mode): features encoded for POST /analyze/features and
+    the file's SHA-256. Same return shape as load_features.
+    """
+    start = time.perf_counter()
+    with metrics.capture() as stages:
+        try:
+            features, error = (encode_audio(audio_path), file_sha256(audio_path)), None
+        except Exception as e:
+            features, error = None, f"Error: {str(e)}"
+    return features, error, time.perf_counter() - start, dict(stages)
+
+def send_payload(client, filename, encoded):
+    """(label, confidence text, error or None) for one clip scored by the server."""
+    payload, audio_sha256 = encoded
+    try:
+        result = client.analyze_payload(payload, filename, audio_sha256)["result"]
+        return result["label"], result["confidence"], None
+    except Exception as e:
+        return None, None, f"Error (Server): {str(e)}"
+
+def interpret(prediction_value):
+    """Logic (Same as App.py)"""
+    if prediction_value > 0.5:
+        return "Real", prediction_value * 100
+    return "Synthetic", (1 - prediction_value) * 100
+
+def completed_files(report_path, retry_errors=False):
+    """
+    Files that already have a row from a previous (possibly interrupted) run.
+    retry_errors=True drops the failed rows from the report first, so those
+    files are scored again without leaving duplicate rows behind.
+    """
+    if not ReportWriter._has_current_header(report_path):
+        return set()
+    try:
+        previous = pd.read_csv(report_path, dtype=str)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        return set()
+
+    if retry_errors:
+        ok = previous[previous["Status"] == "OK"]
+        if len(ok) < len(previous):
+            tmp_path = report_path + ".tmp"
+            ok.to_csv(tmp_path, index=False, columns=REPORT_COLUMNS)
+            os.replace(tmp_path, report_path)
+        previous = ok
+    return set(previous["File"])
+
+def export_parquet(report_path, parquet_path):
+    """
+    Rebuilds the Parquet copy from the CSV journal. Written to a temporary
+    file and renamed, so a crash never leaves a footer-less Parquet file,
+    and a resumed run exports every row, not just its own.
+    """
+    import pyarrow as pa  # Optional dependency, only for Parquet output
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c, pa.string()) for c in REPORT_COLUMNS])
+    table = pa.Table.from_pandas(pd.read_csv(report_path, dtype=str)[REPORT_COLUMNS],
+                                 schema=schema, preserve_index=False)
+    tmp_path = parquet_path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, parquet_path)
+
+class ReportWriter:
+    """Appends result rows to the CSV journal after every chunk."""
+
+    def __init__(self, report_path, resume):
+        append = resume and self._has_current_header(report_path)
+        self._csv_file = open(report_path, "a" if append else "w", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=REPORT_COLUMNS)
+        if not append:
+            self._csv.writeheader()
+
+    @staticmethod
+    def _has_current_header(report_path):
+        """Only append to reports written with the same columns (older reports are restarted)."""
+        if not os.path.exists(report_path):
+            return False
+        with open(report_path, newline="") as f:
+            return next(csv.reader(f), None) == REPORT_COLUMNS
+
+    def write(self, rows):
+        self._csv.writerows(rows)
+        self._csv_file.flush()
+        os.fsync(self._csv_file.fileno())
+
+    def close(self):
+        self._csv_file.close()
+
+def run_batch_test(folder=TEST_FOLDER, workers=DEFAULT_WORKERS, chunk_size=CHUNK_SIZE,
+                   report_path=REPORT_PATH, resume=True, parquet_path=None, backend=MODEL_BACKEND,
+                   model_path=None, server=None, retry_errors=False):
+    """
+    server = base URL of a VAANI server: features are computed here and only they are uploaded.
+    retry_errors = on resume, score files that failed last time again (their old rows are replaced).
+    """
+    print(f"🚀 Starting Batch Forensic Analysis on '{folder}'...")
+
+    # 1. Find Audio Files
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith(AUDIO_EXTENSIONS))
+
     if not files:
-        print(f"❌ No audio files found in {TEST_FOLDER}. Please add some!")
+        print(f"❌ No audio files found in {folder}. Please add some!")
         return
 
-    results = []
-    print(f"📂 Found {len(files)} files. Processing...\n")
+    model_path = model_path or (TFLITE_MODEL_PATH if backend == "tflite" else MODEL_PATH)
+    if server is None and not os.path.exists(model_path):
+        print("❌ Error: Model file not found!")
+        return
 
-    # 3. Process Loop
-    for filename in files:
-        audio_path = os.path.join(TEST_FOLDER, filename)
-        temp_img_path = os.path.join(TEST_FOLDER, filename + "_spec.png")
-        
-        try:
-            # A. Generate Spectrogram
-            spec_path = generate_spectrogram(audio_path, temp_img_path)
-            
-            if not spec_path:
-                results.append({"File": filename, "Status": "Error (Spec Generation)"})
-                continue
-                
-            # B. Predict
-            processed_img = prepare_image(spec_path)
-            prediction_value = model.predict(processed_img, verbose=0)[0][0]
-            
-            # C. Logic (Same as App.py)
-            if prediction_value > 0.5:
-                label = "Real"
-                confidence = prediction_value * 100
-            else:
-                label = "Synthetic"
-                confidence = (1 - prediction_value) * 100
-            
-            # Record Result
-            results.append({
-                "File": filename,
-                "Prediction": label,
-                "Confidence": f"{confidence:.2f}%",
-                "Raw_Score": f"{prediction_value:.4f}"
-            })
-            
-            # Cleanup Image
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
-                
-            print(f"  ✅ Checked {filename}: {label} ({confidence:.1f}%)")
-            
-        except Exception as e:
-            print(f"  ❌ Failed {filename}: {e}")
-            results.append({"File": filename, "Status": f"Error: {str(e)}"})
+    done_before = completed_files(report_path, retry_errors) if resume else set()
+    pending = [f for f in files if f not in done_before]
+    print(f"📂 Found {len(files)} files ({len(done_before)} already in report). "
+          f"Processing {len(pending)} with {workers} workers...\n")
+
+    # 2. Start the workers BEFORE TensorFlow spins up its thread pools,
+    #    so the forked extraction processes never inherit a live TF runtime.
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pool.submit(os.getpid).result()
+
+    # 3. Load Model (or connect to the server that holds it)
+    if server is None:
+        print(f"🧠 Loading VAANI Super-Model ({backend} backend)...")
+        model = load_backend(backend, model_path)
+        extract = load_features
+    else:
+        print(f"🌐 Scoring on {server} (uploading precomputed features only)...")
+        client = FeatureClient(server)
+        sender = ThreadPoolExecutor(max_workers=UPLOAD_THREADS)
+        extract = load_payload
+
+    # 4. Process in chunks: parallel extraction -> one batched predict -> append to report
+    timings = {"extract_cpu": 0.0, "extract_wall": 0.0, "predict": 0.0, "write": 0.0}
+    counts = {"OK": 0, "Error": 0}
+    writer = ReportWriter(report_path, resume)
+    start = time.perf_counter()
 
-    # 4. Final Report
+    try:
+        with pool:
+            for offset in range(0, len(pending), chunk_size):
+                chunk = pending[offset:offset + chunk_size]
+                paths = [os.path.join(folder, f) for f in chunk]
+
+                # A. Extract Features (parallel)
+                t0 = time.perf_counter()
+                extracted = list(pool.map(extract, paths, chunksize=max(1, len(paths) // (workers * 4))))
+                timings["extract_wall"] += time.perf_counter() - t0
+                for _, _, seconds, stages in extracted:
+                    timings["extract_cpu"] += seconds
+                    metrics.record_stages(stages)
+
+                # B. Predict (one batched pass per chunk, or concurrent uploads to the server)
+                ok = [i for i, (features, _, _, _) in enumerate(extracted) if features is not None]
+                verdicts = {}  # i -> (label, confidence text, raw score text)
+                errors = {i: extracted[i][1] for i in range(len(chunk)) if i not in ok}
+                if ok:
+                    t0 = time.perf_counter()
+                    if server is None:
+                        batch = np.stack([extracted[i][0] for i in ok])
+                        with metrics.timer("predict"):
+                            predictions = model.predict(batch, batch_size=PREDICT_BATCH, verbose=0)
+                        for i, p in zip(ok, predictions):
+                            label, confidence = interpret(float(p[0]))
+                            verdicts[i] = (label, f"{confidence:.2f}%", f"{float(p[0]):.4f}")
+                    else:
+                        with metrics.timer("predict"):
+                            replies = list(sender.map(lambda i: send_payload(client, chunk[i], extracted[i][0]), ok))
+                        for i, (label, confidence, error) in zip(ok, replies):
+                            if error is None:
+                                verdicts[i] = (label, confidence, None)
+                            else:
+                                errors[i] = error
+                    timings["predict"] += time.perf_counter() - t0
+
+                # C. Record Results
+                rows = []
+                for i, filename in enumerate(chunk):
+                    if i in verdicts:
+                        label, confidence, raw_score = verdicts[i]
+                        rows.append({
+                            "File": filename,
+                            "Prediction": label,
+                            "Confidence": confidence,
+                            "Raw_Score": raw_score,
+                            "Status": "OK",
+                        })
+                        counts["OK"] += 1
+                    else:
+                        rows.append({"File": filename, "Status": errors[i]})
+                        counts["Error"] += 1
+                        print(f"  ❌ Failed {filename}: {errors[i]}")
+
+                t0 = time.perf_counter()
+                with metrics.timer("write_report"):
+                    writer.write(rows)
+                timings["write"] += time.perf_counter() - t0
+
+                processed = offset + len(chunk)
+                elapsed = time.perf_counter() - start
+                print(f"  ✅ Checked {processed}/{len(pending)} files "
+                      f"({processed / elapsed:.1f} files/sec)")
+    finally:
+        writer.close()
+        if server is not None:
+            sender.shutdown()
+
+    elapsed = time.perf_counter() - start
+    if parquet_path:
+        export_parquet(report_path, parquet_path)
+
+    # 5. Final Report
     print("\n" + "="*50)
     print("📊 FINAL FORENSIC REPORT")
     print("="*50)
-    
-    df = pd.DataFrame(results)
-    print(df.to_string(index=False))
-    
-    # Save to CSV for Excel
-    df.to_csv("batch_report.csv", index=False)
-    print("\n📄 Report saved to 'batch_report.csv'")
+
+    df = pd.read_csv(report_path)
+    if len(df) <= 50:
+        print(df.to_string(index=False))
+    else:
+        print(df["Status"].value_counts(dropna=False).to_string())
+        print(df["Prediction"].value_counts().to_string())
+
+    print(f"\n📄 Report saved to '{report_path}'" + (f" and '{parquet_path}'" if parquet_path else ""))
+    print(f"⏱️  {counts['OK']} scored, {counts['Error']} failed in {elapsed:.1f}s "
+          f"({len(pending) / elapsed if elapsed > 0 else 0:.1f} files/sec)")
+    print(f"   Extract: {timings['extract_wall']:.1f}s wall ({timings['extract_cpu']:.1f}s CPU across workers) | "
+          f"Predict: {timings['predict']:.1f}s | Write: {timings['write']:.1f}s")
+    metrics.print_stage_summary("Per-stage timings (extraction summed across workers)")
+    return {"files": len(pending), "seconds": elapsed, **counts, **timings}
 
 if __name__ == "__main__":
-    run_batch_test()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Batch forensic analysis of a folder of audio files.")
+    parser.add_argument("--folder", default=TEST_FOLDER, help="Folder with audio files")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Feature extraction processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Files per batched prediction")
+    parser.add_argument("--output", default=REPORT_PATH, help="CSV report path (also the resume journal)")
+    parser.add_argument("--parquet", default=None, help="Also export the report to this Parquet file")
+    parser.add_argument("--backend", choices=BACKENDS, default=MODEL_BACKEND, help="Inference backend")
+    parser.add_argument("--server", default=None,
+                        help="Score on a VAANI server (e.g. http://127.0.0.1:5000), uploading features only")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of resuming")
+    parser.add_argument("--retry-errors", action="store_true", help="On resume, score previously failed files again")
+    args = parser.parse_args()
+
+    run_batch_test(folder=args.folder, workers=args.workers, chunk_size=args.chunk_size,
+                   report_path=args.output, resume=not args.no_resume, parquet_path=args.parquet,
+                   backend=args.backend, server=args.server, retry_errors=args.retry_errors)
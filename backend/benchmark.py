@@ -0,0 +1,385 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing as mp
+from contextlib import redirect_stdout
+import numpy as np
+
+from utils.startup import synthetic_clip
+
+# --- CONFIGURATION ---
+REPORTS_PATH = "../data_store/reports"
+OUTPUT_PATH = os.path.join(REPORTS_PATH, "benchmark.json")
+BASELINE_PATH = os.path.join(REPORTS_PATH, "benchmark_baseline.json")
+MODEL_PATH = "vaani_model.h5"
+SECTIONS = ("throughput", "decode", "stages", "e2e")
+# Every extension batch_test.py accepts; m4a has no libsndfile encoder and is made with ffmpeg
+FORMATS = {"wav": ("WAV", "PCM_16"), "flac": ("FLAC", "PCM_16"), "ogg": ("OGG", "VORBIS"),
+           "mp3": ("MP3", "MPEG_LAYER_III"), "m4a": None}
+DEFAULT_COUNT = 32
+DEFAULT_SECONDS = 3.0
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_REPEATS = 10
+DEFAULT_BATCH_SIZES = (1, 8, 32, 64)
+DEFAULT_THRESHOLD = 0.15  # 15% slower (or lower throughput) than baseline = regression
+SEED = 1234
+
+# Only these leaves are compared against the baseline: medians and rates are
+# stable run to run, tails (p95) and one-off timings are reported but not gated.
+GATED_SUFFIXES = {"p50_ms": "lower", "files_per_sec": "higher"}
+
+# --- Corpus ---
+def write_clip(path, y, sample_rate, fmt):
+    import soundfile as sf
+
+    if FORMATS[fmt] is not None:
+        container, subtype = FORMATS[fmt]
+        sf.write(path, y, sample_rate, format=container, subtype=subtype)
+        return
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(f"ffmpeg is needed to encode {fmt}")
+    wav_path = path + ".wav"
+    sf.write(wav_path, y, sample_rate, subtype="PCM_16")
+    try:
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-y", "-i", wav_path, "-c:a", "aac", path], check=True)
+    finally:
+        os.remove(wav_path)
+
+def make_corpus(folder, count=DEFAULT_COUNT, seconds=DEFAULT_SECONDS,
+                sample_rate=DEFAULT_SAMPLE_RATE, fmt="wav", seed=SEED):
+    """
+    Writes `count` deterministic speech-like clips to folder and returns their paths.
+    Every clip has its own seed, so each one hashes differently (no cache hits).
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"clip_{i:05d}.{fmt}")
+        write_clip(path, synthetic_clip(seconds, sample_rate, seed + i), sample_rate, fmt)
+        paths.append(path)
+    return paths
+
+# --- Timing helpers ---
+def summarize(timings):
+    timings = np.asarray(timings) * 1000
+    return {
+        "n": int(len(timings)),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "mean_ms": round(float(timings.mean()), 3),
+    }
+
+def time_calls(fn, args_list, warmup=1):
+    """Calls fn(*args) for each entry of args_list after `warmup` untimed calls."""
+    for args in args_list[:warmup]:
+        fn(*args)
+    timings = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - t0)
+    return summarize(timings)
+
+def quietly(fn, *args, **kwargs):
+    """Runs a chatty pipeline function with its progress output swallowed."""
+    with redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def _save_random_weights(path):
+    import keras
+    from models.cnn_model import build_model
+
+    keras.utils.set_random_seed(SEED)
+    build_model().save_weights(path)
+
+def weights_for_benchmark(workdir):
+    """
+    Trained weights if present, otherwise a seeded random initialisation:
+    throughput and latency do not depend on what the weights are.
+    The random model is built in a spawned process so TensorFlow is not yet
+    running here when the offline tools fork their worker pools.
+    """
+    if os.path.exists(MODEL_PATH):
+        return MODEL_PATH
+    path = os.path.join(workdir, "random.weights.h5")
+    p = mp.get_context("spawn").Process(target=_save_random_weights, args=(path,))
+    p.start()
+    p.join()
+    if p.exitcode != 0:
+        raise RuntimeError(f"could not initialise benchmark weights (exit code {p.exitcode})")
+    return path
+
+# --- Sections ---
+def bench_throughput(corpus, workdir, workers, weights_path):
+    """Files/sec of the two offline tools on the whole corpus."""
+    from utils.dataset_preprocessor import process_dataset
+    import batch_test
+
+    # dataset_preprocessor expects raw/<real|fake>/...
+    raw_path = os.path.join(workdir, "raw")
+    for i, path in enumerate(corpus):
+        category = "real" if i % 2 == 0 else "fake"
+        os.makedirs(os.path.join(raw_path, category), exist_ok=True)
+        shutil.copy(path, os.path.join(raw_path, category, os.path.basename(path)))
+
+    t0 = time.perf_counter()
+    quietly(process_dataset, workers=workers, force=True,
+            raw_path=raw_path, processed_path=os.path.join(workdir, "processed"))
+    preprocess_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    summary = quietly(batch_test.run_batch_test, folder=os.path.dirname(corpus[0]), workers=workers,
+                      report_path=os.path.join(workdir, "batch_report.csv"), resume=False,
+                      model_path=weights_path)
+    batch_seconds = time.perf_counter() - t0
+
+    return {
+        "dataset_preprocessor": {
+            "files": len(corpus), "workers": workers, "seconds": round(preprocess_seconds, 3),
+            "files_per_sec": round(len(corpus) / preprocess_seconds, 3),
+        },
+        "batch_test": {
+            "files": len(corpus), "workers": workers, "seconds": round(batch_seconds, 3),
+            "files_per_sec": round(len(corpus) / batch_seconds, 3),
+            "failed": summary["Error"] if summary else None,
+        },
+    }
+
+def bench_decode(workdir, seconds, sample_rate, repeats):
+    """
+    Per format: the original librosa.load + melspectrogram path against the
+    decode layer (partial soundfile reads, reused soxr resamplers, cached
+    filterbank), with the largest feature difference between the two.
+    """
+    import librosa
+    from utils.audio_processor import (compute_mel_db, spectrogram_to_tensor,
+                                       SAMPLE_RATE, DURATION, N_MELS, FMAX)
+
+    def legacy_mel_db(path):
+        y, sr = librosa.load(path, sr=SAMPLE_RATE, duration=DURATION)
+        S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=N_MELS, fmax=FMAX)
+        return librosa.power_to_db(S, ref=np.max)
+
+    # Clips longer than the 3 s analysed, so partial reads have something to skip
+    clip_seconds = max(seconds, 4 * DURATION)
+    results = {}
+    for fmt in FORMATS:
+        try:
+            paths = make_corpus(os.path.join(workdir, f"decode_{fmt}"), 2, clip_seconds, sample_rate, fmt)
+        except Exception as e:
+            results[fmt] = {"skipped": str(e)}
+            continue
+        calls = [(paths[i % 2],) for i in range(repeats)]
+        legacy = time_calls(legacy_mel_db, calls)
+        fast = time_calls(compute_mel_db, calls)
+
+        old_db, new_db = legacy_mel_db(paths[0]), compute_mel_db(paths[0])
+        frames = min(old_db.shape[1], new_db.shape[1])
+        results[fmt] = {
+            "legacy": legacy,
+            "fast": fast,
+            "speedup": round(legacy["p50_ms"] / fast["p50_ms"], 3) if fast["p50_ms"] else None,
+            "shape_match": old_db.shape == new_db.shape,
+            "max_abs_diff_db": round(float(np.abs(old_db[:, :frames] - new_db[:, :frames]).max()), 4),
+            "max_abs_diff_tensor": round(float(np.abs(spectrogram_to_tensor(old_db[:, :frames])
+                                                      - spectrogram_to_tensor(new_db[:, :frames])).max()), 4),
+        }
+    return results
+
+def bench_stages(corpus, workdir, repeats, batch_sizes, weights_path):
+    """Latency of each pipeline stage in isolation."""
+    from utils.audio_processor import compute_mel_db, generate_spectrogram, extract_features
+    from batch_test import prepare_image
+    from models.cnn_model import build_model
+
+    sample = [(corpus[i % len(corpus)],) for i in range(repeats)]
+    png_path = os.path.join(workdir, "stage_spec.png")
+
+    def load_weights():
+        model = build_model()
+        model.load_weights(weights_path)
+        return model
+
+    results = {
+        "compute_mel_db": time_calls(compute_mel_db, sample),
+        "generate_spectrogram": time_calls(generate_spectrogram, [(p, png_path) for (p,) in sample]),
+        "prepare_image": time_calls(prepare_image, [(png_path,)] * repeats),
+        "extract_features": time_calls(extract_features, sample),
+        "build_model_load": time_calls(load_weights, [()] * max(1, repeats // 3)),
+    }
+
+    model = load_weights()
+    features = extract_features(corpus[0])
+    predict = {}
+    for batch_size in batch_sizes:
+        batch = np.repeat(features, batch_size, axis=0)
+        stats = time_calls(lambda: model.predict(batch, verbose=0), [()] * repeats)
+        stats["per_sample_ms"] = round(stats["p50_ms"] / batch_size, 3)
+        predict[str(batch_size)] = stats
+    results["predict"] = predict
+    return results
+
+def bench_e2e(corpus, workdir, repeats):
+    """
+    POST /analyze through the Flask test client: every corpus file once (cold,
+    full pipeline), then the same file repeatedly (verdict cache hit).
+    """
+    # Keep the benchmark away from the real database, uploads and job workers
+    os.environ["VAANI_DATABASE_URI"] = "sqlite:///" + os.path.abspath(os.path.join(workdir, "bench.db"))
+    os.environ["VAANI_UPLOAD_FOLDER"] = os.path.join(workdir, "uploads")
+    os.environ["VAANI_EAGER_STARTUP"] = "1"
+    os.environ["VAANI_JOB_WORKERS"] = "0"
+    from app import app
+
+    client = app.test_client()
+
+    def post(path):
+        with open(path, "rb") as f:
+            response = client.post("/analyze", data={"file": (f, os.path.basename(path))},
+                                   content_type="multipart/form-data")
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)}")
+
+    t0 = time.perf_counter()
+    cold = time_calls(post, [(p,) for p in corpus], warmup=0)
+    cold_seconds = time.perf_counter() - t0
+    cold["files_per_sec"] = round(len(corpus) / cold_seconds, 3)
+
+    cached = time_calls(post, [(corpus[0],)] * repeats)
+    return {"analyze_cold": cold, "analyze_cached": cached}
+
+# --- Baseline comparison ---
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+def compare_to_baseline(results, baseline, threshold):
+    """Returns [{metric, baseline, current, change}] for every gated metric that regressed."""
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        direction = GATED_SUFFIXES.get(name.rsplit(".", 1)[-1])
+        base = previous.get(name)
+        if direction is None or not base:
+            continue
+        change = (value - base) / base
+        if (direction == "lower" and change > threshold) or (direction == "higher" and -change > threshold):
+            regressions.append({"metric": name, "baseline": base, "current": value,
+                                "change": round(change, 4)})
+    return regressions
+
+def environment():
+    versions = {}
+    for module in ("numpy", "librosa", "soundfile", "tensorflow", "keras", "flask"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+        "thread_env": {k: os.environ[k] for k in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS",
+                                                   "TF_NUM_INTEROP_THREADS") if k in os.environ},
+    }
+
+def run_benchmark(sections=SECTIONS, count=DEFAULT_COUNT, seconds=DEFAULT_SECONDS,
+                  sample_rate=DEFAULT_SAMPLE_RATE, fmt="wav", repeats=DEFAULT_REPEATS,
+                  batch_sizes=DEFAULT_BATCH_SIZES, workers=None, output_path=OUTPUT_PATH,
+                  baseline_path=BASELINE_PATH, threshold=DEFAULT_THRESHOLD, save_baseline=False):
+    workers = workers or os.cpu_count() or 1
+    workdir = tempfile.mkdtemp(prefix="vaani_bench_")
+    try:
+        print(f"🎛️  Generating corpus: {count} x {seconds}s {fmt} @ {sample_rate} Hz (seed {SEED})")
+        corpus = make_corpus(os.path.join(workdir, "corpus"), count, seconds, sample_rate, fmt)
+
+        report = {
+            "config": {"count": count, "seconds": seconds, "sample_rate": sample_rate, "format": fmt,
+                       "repeats": repeats, "batch_sizes": list(batch_sizes), "workers": workers,
+                       "seed": SEED, "sections": list(sections)},
+            "environment": environment(),
+            "results": {},
+        }
+
+        # Throughput first: its process pools must fork before TensorFlow runs in this process
+        weights_path = None
+        for section in SECTIONS:
+            if section not in sections:
+                continue
+            print(f"⏱️  Running '{section}' benchmarks...")
+            if section in ("throughput", "stages") and weights_path is None:
+                weights_path = weights_for_benchmark(workdir)
+            if section == "throughput":
+                report["results"]["throughput"] = bench_throughput(corpus, workdir, workers, weights_path)
+            elif section == "decode":
+                report["results"]["decode"] = bench_decode(workdir, seconds, sample_rate, repeats)
+            elif section == "stages":
+                report["results"]["stages"] = bench_stages(corpus, workdir, repeats, batch_sizes, weights_path)
+            else:
+                report["results"]["e2e"] = bench_e2e(corpus, workdir, repeats)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Compare against the baseline (same config only: different corpora are not comparable)
+    report["regressions"] = []
+    if os.path.exists(baseline_path) and not save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("config") == report["config"]:
+            report["baseline"] = baseline_path
+            report["threshold"] = threshold
+            report["regressions"] = compare_to_baseline(report["results"], baseline["results"], threshold)
+        else:
+            print(f"⚠️ Baseline {baseline_path} was recorded with a different config; not comparing.")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    if save_baseline:
+        os.makedirs(os.path.dirname(baseline_path) or ".", exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(json.dumps(report["results"], indent=2))
+    print(f"\n📄 Results saved to: {output_path}" + (f" (and baseline {baseline_path})" if save_baseline else ""))
+    for r in report["regressions"]:
+        print(f"❌ Regression: {r['metric']} {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+    if "baseline" in report and not report["regressions"]:
+        print(f"✅ No regressions beyond {threshold:.0%} against the baseline.")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproducible benchmark of the VAANI forensic pipeline.")
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="Clips in the synthetic corpus")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="Length of each clip")
+    parser.add_argument("--sample-rate", type=int, default=DEFAULT_SAMPLE_RATE)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="wav")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed calls per stage")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the offline tools")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="JSON results file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the new baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sections, args.count, args.seconds, args.sample_rate, args.format,
+                           args.repeats, args.batch_sizes, args.workers, args.output,
+                           args.baseline, args.threshold, args.save_baseline)
+    sys.exit(1 if report["regressions"] else 0)
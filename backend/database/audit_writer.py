@@ -0,0 +1,139 @@
+import atexit
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+from database.db import db
+from database.models import AuditLog
+
+# --- DEFAULTS ---
+FLUSH_INTERVAL_S = 0.5
+MAX_BATCH = 1000
+DURABILITY_MODES = ('buffered', 'sync')
+
+class AuditWriter:
+    """
+    Write-behind buffer for AuditLog rows.
+
+    Entries are appended to an in-memory buffer and a background thread writes
+    them in ONE bulk INSERT transaction every flush_interval seconds (or as soon
+    as max_batch entries are waiting), instead of one commit per request.
+
+    durability='sync' (or write(..., durable=True)) blocks the caller until the
+    transaction containing its entry has committed, so a request is only
+    acknowledged once its chain-of-custody record is on disk.
+    """
+
+    def __init__(self, app, flush_interval=FLUSH_INTERVAL_S, max_batch=MAX_BATCH,
+                 durability='buffered'):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.app = app
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.durability = durability
+
+        self._buffer = []     # [(row dict, threading.Event or None)]
+        self._cond = threading.Condition()
+        self._stats = {"written": 0, "flushes": 0, "errors": 0, "last_batch": 0}
+        self._thread = threading.Thread(target=self._run, name="vaani-audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    # --- Public API ---
+    def write(self, durable=None, **fields):
+        """
+        Queues one AuditLog row (user_id, filename, file_hash, prediction, confidence_score).
+        Returns once buffered, or once committed if durable.
+        """
+        durable = self.durability == 'sync' if durable is None else durable
+        fields.setdefault("timestamp", datetime.utcnow())
+        done = threading.Event() if durable else None
+
+        with self._cond:
+            self._buffer.append((fields, done))
+            if durable or len(self._buffer) >= self.max_batch:
+                self._cond.notify()
+
+        if done is not None:
+            done.wait()
+            if getattr(done, "error", None):
+                raise RuntimeError(f"Audit log write failed: {done.error}")
+
+    def write_many(self, rows, durable=None):
+        """Queues several rows at once (e.g. a whole /analyze/batch request)."""
+        durable = self.durability == 'sync' if durable is None else durable
+        now = datetime.utcnow()
+        done = threading.Event() if durable else None
+
+        with self._cond:
+            # Copies: the caller keeps its dicts. Every row carries the group's waiter,
+            # which is released once the whole group (always one transaction batch) is written
+            for fields in rows:
+                self._buffer.append(({"timestamp": now, **fields}, done))
+            self._cond.notify()
+
+        if done is not None and rows:
+            done.wait()
+            if getattr(done, "error", None):
+                raise RuntimeError(f"Audit log write failed: {done.error}")
+
+    def flush(self):
+        """Writes everything buffered so far (called at exit, and usable in tests/scripts)."""
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, "buffered": len(self._buffer),
+                    "durability": self.durability}
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._buffer) < self.max_batch and not any(e for _, e in self._buffer):
+                    self._cond.wait(timeout=self.flush_interval)
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        errors = {}  # Row index -> error, filled only by the row-by-row retry
+        with self.app.app_context():
+            try:
+                for i in range(0, len(batch), self.max_batch):
+                    rows = [fields for fields, _ in batch[i:i + self.max_batch]]
+                    db.session.execute(insert(AuditLog), rows)
+                db.session.commit()
+            except Exception as e:
+                # One bad row must not drop the whole batch: retry row by row
+                db.session.rollback()
+                print(f"⚠️ Audit bulk insert failed ({e}), retrying {len(batch)} entries one by one")
+                for i, (fields, _) in enumerate(batch):
+                    try:
+                        db.session.execute(insert(AuditLog), [fields])
+                        db.session.commit()
+                    except Exception as row_error:
+                        db.session.rollback()
+                        errors[i] = str(row_error)
+                        print(f"❌ Audit entry lost: {fields.get('filename')} ({row_error})")
+
+        with self._cond:
+            self._stats["written"] += len(batch) - len(errors)
+            self._stats["errors"] += len(errors)
+            self._stats["flushes"] += 1
+            self._stats["last_batch"] = len(batch)
+
+        # A waiter only hears about failures of its own rows
+        waiters = {}
+        for i, (_, done) in enumerate(batch):
+            if done is not None:
+                waiters.setdefault(done, None)
+                if i in errors and waiters[done] is None:
+                    waiters[done] = errors[i]
+        for done, error in waiters.items():
+            done.error = error
+            done.set()
@@ -1,4 +1,47 @@
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
 
 # Initialize the database object
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+@event.listens_for(Engine, "connect")
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers (the /audit API) run while the audit writer commits,
+    and synchronous=NORMAL is crash-safe in WAL mode with far fewer fsyncs.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+def _add_missing_columns():
+    """
+    create_all() never alters existing tables: add nullable columns that were
+    introduced after the table was created (e.g. audit_logs.model_version).
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def init_db(app):
+    """Creates missing tables and any columns/indexes added to existing tables."""
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        _add_missing_columns()
+        # create_all() skips tables that already exist, so add new indexes explicitly
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
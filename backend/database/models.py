@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from database.db import db
 
@@ -24,15 +25,96 @@ class AuditLog(db.Model):
     Stores metadata about every analysis performed.
     """
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # Keyset pagination (ORDER BY log_id DESC) per filter
+        db.Index('ix_audit_logs_prediction_log_id', 'prediction', 'log_id'),
+        db.Index('ix_audit_logs_user_id_log_id', 'user_id', 'log_id'),
+    )
     
     log_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     filename = db.Column(db.String(255), nullable=False)
-    file_hash = db.Column(db.String(64), nullable=False) # SHA-256 Hash
+    file_hash = db.Column(db.String(64), nullable=False, index=True) # SHA-256 Hash
     prediction = db.Column(db.String(50)) # "Real" or "Fake"
     confidence_score = db.Column(db.Float) # e.g., 98.5
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    model_version = db.Column(db.String(64)) # Model that produced the verdict
+    # Feature uploads: file_hash is the payload's hash; this is the client's unverified audio hash
+    claimed_audio_hash = db.Column(db.String(64))
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            "log_id": self.log_id,
+            "user_id": self.user_id,
+            "filename": self.filename,
+            "file_hash": self.file_hash,
+            "prediction": self.prediction,
+            "confidence_score": self.confidence_score,
+            "model_version": self.model_version,
+            "claimed_audio_hash": self.claimed_audio_hash,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+        }
+
+    def __repr__(self):
+        return f'<Log {self.filename} - {self.prediction}>'
+
+
+class VerdictCache(db.Model):
+    """
+    Content-addressed result cache.
+    One row per (audio SHA-256, model version) already analyzed.
+    """
+    __tablename__ = 'verdict_cache'
+
+    file_hash = db.Column(db.String(64), primary_key=True) # SHA-256 Hash
+    model_version = db.Column(db.String(64), primary_key=True)
+    raw_score = db.Column(db.Float, nullable=False) # 0 = Fake, 1 = Real
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Verdict {self.file_hash[:12]} @ {self.model_version}>'
+
+
+class AnalysisJob(db.Model):
+    """
+    Asynchronous analysis job (POST /jobs).
+    Persisted so queued/running jobs survive a server restart.
+    """
+    __tablename__ = 'analysis_jobs'
+
+    job_id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False) # "single" or "long"
+    lane = db.Column(db.String(20), nullable=False, default='interactive') # "interactive" or "bulk"
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued / running / done / failed
+    progress = db.Column(db.Float, default=0.0) # 0.0 to 1.0
+
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(512), nullable=False)
+    file_hash = db.Column(db.String(64)) # SHA-256 Hash
+    options = db.Column(db.Text) # JSON
+    result = db.Column(db.Text) # JSON
+    error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "lane": self.lane,
+            "status": self.status,
+            "progress": round(self.progress or 0.0, 4),
+            "filename": self.filename,
+            "file_hash": self.file_hash,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
 
     def __repr__(self):
-        return f'<Log {self.filename} - {self.prediction}>'
\ No newline at end of file
+        return f'<Job {self.job_id} {self.kind} - {self.status}>'
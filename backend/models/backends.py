@@ -0,0 +1,93 @@
+import os
+import threading
+import numpy as np
+
+# --- CONFIGURATION ---
+KERAS_MODEL_PATH = "vaani_model.h5"
+TFLITE_MODEL_PATH = "vaani_model.tflite"
+BACKENDS = ('keras', 'tflite')
+
+def _load_interpreter_class():
+    """
+    Lightest available TFLite runtime first, so CPU-only serving nodes don't
+    need the full TensorFlow wheel.
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+class TFLiteBackend:
+    """
+    Keras-compatible predict() over a TFLite flatbuffer.
+    Handles float, dynamic-range and full-int8 models (input/output (de)quantization).
+    """
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None):
+        Interpreter = _load_interpreter_class()
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input['shape'][0])
+        self._lock = threading.Lock()  # Interpreters are not thread-safe
+
+    def _resize(self, batch):
+        if batch != self._batch:
+            shape = list(self._input['shape'])
+            shape[0] = batch
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch = batch
+
+    def predict(self, x, verbose=0, batch_size=None):
+        """(N, 128, 128, 1) float32 -> (N, 1) float32, like keras Model.predict."""
+        x = np.asarray(x, dtype=np.float32)
+        with self._lock:
+            self._resize(len(x))
+
+            if self._input['dtype'] != np.float32:
+                scale, zero_point = self._input['quantization']
+                info = np.iinfo(self._input['dtype'])
+                x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+                x = x.astype(self._input['dtype'])
+
+            self.interpreter.set_tensor(self._input['index'], x)
+            self.interpreter.invoke()
+            y = self.interpreter.get_tensor(self._output['index'])
+
+            if self._output['dtype'] != np.float32:
+                scale, zero_point = self._output['quantization']
+                y = (y.astype(np.float32) - zero_point) * scale
+
+        return y.astype(np.float32)
+
+def load_keras_model(model_path=KERAS_MODEL_PATH, architecture=None):
+    """
+    CRNN from models/cnn_model.py with trained weights (if present).
+    architecture = build_model keyword arguments for non-default (swept) models.
+    """
+    from models.cnn_model import build_model
+    model = build_model(**(architecture or {}))
+    if os.path.exists(model_path):
+        model.load_weights(model_path)
+    return model
+
+def load_backend(backend='keras', model_path=None, architecture=None):
+    """Returns an object with a Keras-style predict(x, verbose=0)."""
+    if backend == 'tflite':
+        return TFLiteBackend(model_path or TFLITE_MODEL_PATH)
+    if backend == 'keras':
+        return load_keras_model(model_path or KERAS_MODEL_PATH, architecture)
+    raise ValueError(f"Unknown backend '{backend}' (expected one of {BACKENDS})")
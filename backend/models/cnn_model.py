@@ -2,9 +2,12 @@ import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, Reshape, Bidirectional, LSTM, BatchNormalization
 
-def build_model(input_shape=(128, 128, 1)):
+def build_model(input_shape=(128, 128, 1), filters=(32, 64, 128), lstm_units=64,
+                dense_units=64, dropout=0.4, learning_rate=None):
     """
     Constructs a Hybrid CRNN (Convolutional Recurrent Neural Network).
+    The defaults are the production architecture; the keyword knobs exist for
+    hyperparameter sweeps (models/sweep.py).
     
     Architecture:
     1. CNN Block: Extracts spatial features (artifacts in frequencies).
@@ -21,44 +24,40 @@ def build_model(input_shape=(128, 128, 1)):
     # --- BLOCK 1: SPATIAL FEATURE EXTRACTION (CNN) ---
     # Input: (128, 128, 1) -> [Height (Freq), Width (Time), Channels]
     
-    # Conv Layer 1
-    model.add(Conv2D(32, (3, 3), activation='relu', padding='same', input_shape=input_shape))
-    model.add(BatchNormalization()) # Stabilizes training
-    model.add(MaxPooling2D(pool_size=(2, 2))) # Output: (64, 64, 32)
-
-    # Conv Layer 2
-    model.add(Conv2D(64, (3, 3), activation='relu', padding='same'))
-    model.add(BatchNormalization())
-    model.add(MaxPooling2D(pool_size=(2, 2))) # Output: (32, 32, 64)
-
-    # Conv Layer 3
-    model.add(Conv2D(128, (3, 3), activation='relu', padding='same'))
-    model.add(BatchNormalization())
-    model.add(MaxPooling2D(pool_size=(2, 2))) # Output: (16, 16, 128)
+    # Conv Layers: each one halves both axes -> (64, 64, 32), (32, 32, 64), (16, 16, 128)
+    for i, n_filters in enumerate(filters):
+        if i == 0:
+            model.add(Conv2D(n_filters, (3, 3), activation='relu', padding='same', input_shape=input_shape))
+        else:
+            model.add(Conv2D(n_filters, (3, 3), activation='relu', padding='same'))
+        model.add(BatchNormalization()) # Stabilizes training
+        model.add(MaxPooling2D(pool_size=(2, 2)))
     
     # --- BLOCK 2: THE BRIDGE (Reshape) ---
     # Current Shape: (Batch, 16, 16, 128) -> (Batch, Freq, Time, Filters)
     # We want: (Batch, Time, Features) for the LSTM.
     # We will keep 'Time' (16) and merge 'Freq' and 'Filters' (16 * 128 = 2048).
     
-    # Target Shape: (16, 2048)
+    # Target Shape: (16, 2048) with the default filters
     # Note: We assume the 2nd dim is Freq and 3rd is Time. 
     # If dimensions are swapped in preprocessing, we Permute first.
     # Here we treat the 16x16 grid as a sequence of 16 time steps, each with 16*128 features.
-    model.add(Reshape((16, 16 * 128))) 
+    steps = input_shape[0] // 2 ** len(filters)
+    model.add(Reshape((steps, (input_shape[1] // 2 ** len(filters)) * filters[-1])))
     
     # --- BLOCK 3: TEMPORAL LEARNING (BiLSTM) ---
     # Bidirectional allows the model to see context from both past and future audio frames.
-    model.add(Bidirectional(LSTM(64, return_sequences=False)))
+    model.add(Bidirectional(LSTM(lstm_units, return_sequences=False)))
     
     # --- BLOCK 4: CLASSIFICATION ---
-    model.add(Dense(64, activation='relu'))
-    model.add(Dropout(0.4)) # Prevents overfitting
+    model.add(Dense(dense_units, activation='relu'))
+    model.add(Dropout(dropout)) # Prevents overfitting
     
     model.add(Dense(1, activation='sigmoid')) # Output: 0 (Real) to 1 (Fake)
 
     # Compile
-    model.compile(optimizer='adam',
+    optimizer = 'adam' if learning_rate is None else tf.keras.optimizers.Adam(learning_rate=learning_rate)
+    model.compile(optimizer=optimizer,
                   loss='binary_crossentropy',
                   metrics=['accuracy'])
     
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import resource
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+# --- CONFIGURATION ---
+PROCESSED_DATASET_PATH = "../data_store/processed_dataset"
+REPORTS_PATH = "../data_store/reports"
+CLASS_NAMES = ['fake', 'real']  # Keras alphabetical order: 0 = Fake, 1 = Real
+LATENCY_BATCH_SIZES = (1, 8, 32)
+LATENCY_REPEATS = 20
+
+def load_evaluation_set(limit=None):
+    """
+    Labelled inputs from the processed dataset: the feature store if it exists,
+    otherwise the spectrogram PNGs (loaded exactly like flow_from_directory).
+    """
+    from utils.feature_store import FeatureStore, FEATURE_STORE_PATH, INDEX_NAME
+
+    if os.path.exists(os.path.join(FEATURE_STORE_PATH, INDEX_NAME)):
+        store = FeatureStore(FEATURE_STORE_PATH)
+        count = len(store) if limit is None else min(limit, len(store))
+        x = np.stack([store.get(i).astype(np.float32) for i in range(count)])
+        return x, store.labels[:count].astype(int)
+
+    from PIL import Image
+    x, y = [], []
+    for label, category in enumerate(CLASS_NAMES):
+        folder = os.path.join(PROCESSED_DATASET_PATH, category)
+        if not os.path.exists(folder):
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith('.png'):
+                continue
+            img = Image.open(os.path.join(folder, filename)).convert('L').resize((128, 128), Image.NEAREST)
+            x.append(np.asarray(img, dtype=np.float32)[..., np.newaxis] / 255.0)
+            y.append(label)
+    if limit is not None:
+        x, y = x[:limit], y[:limit]
+    return np.stack(x), np.asarray(y)
+
+def _max_rss_mb():
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def profile_backend(backend, model_path, x, results):
+    """Runs in a fresh process so each backend's RSS is measured in isolation."""
+    from models.backends import load_backend
+
+    rss_start = _max_rss_mb()
+    t0 = time.perf_counter()
+    model = load_backend(backend, model_path)
+    model.predict(x[:1], verbose=0)  # Warm-up (tracing / tensor allocation)
+    load_seconds = time.perf_counter() - t0
+    rss_loaded = _max_rss_mb()
+
+    scores = np.concatenate([model.predict(x[i:i + 32], verbose=0) for i in range(0, len(x), 32)]).ravel()
+
+    latency = {}
+    for batch_size in LATENCY_BATCH_SIZES:
+        batch = x[:batch_size] if len(x) >= batch_size else np.repeat(x[:1], batch_size, axis=0)
+        timings = []
+        for _ in range(LATENCY_REPEATS):
+            t0 = time.perf_counter()
+            model.predict(batch, verbose=0)
+            timings.append(time.perf_counter() - t0)
+        latency[str(batch_size)] = {
+            "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+        }
+
+    results[backend] = {
+        "scores": scores.tolist(),
+        "load_seconds": round(load_seconds, 3),
+        "rss_mb_before_load": round(rss_start, 1),
+        "rss_mb_after_load": round(rss_loaded, 1),
+        "rss_mb_peak": round(_max_rss_mb(), 1),
+        "latency": latency,
+    }
+
+def compare_backends(keras_path, tflite_path, limit=None, tolerance=0.02):
+    """Accuracy parity + latency/memory comparison of the Keras and TFLite backends."""
+    print("🔍 Loading evaluation set...")
+    x, y = load_evaluation_set(limit)
+    print(f"   {len(x)} samples")
+
+    # Spawn (not fork) so neither child inherits the other's TensorFlow state
+    ctx = mp.get_context("spawn")
+    with ctx.Manager() as manager:
+        results = manager.dict()
+        for backend, path in (('keras', keras_path), ('tflite', tflite_path)):
+            print(f"⏱️  Profiling {backend} backend ({path})...")
+            p = ctx.Process(target=profile_backend, args=(backend, path, x, results))
+            p.start()
+            p.join()
+            if backend not in results:
+                raise RuntimeError(f"{backend} backend failed (exit code {p.exitcode})")
+        results = dict(results)
+
+    keras_scores = np.asarray(results['keras'].pop('scores'))
+    tflite_scores = np.asarray(results['tflite'].pop('scores'))
+    keras_pred = (keras_scores > 0.5).astype(int)
+    tflite_pred = (tflite_scores > 0.5).astype(int)
+    abs_diff = np.abs(keras_scores - tflite_scores)
+
+    report = {
+        "samples": int(len(x)),
+        "parity": {
+            "max_abs_diff": round(float(abs_diff.max()), 6),
+            "mean_abs_diff": round(float(abs_diff.mean()), 6),
+            "label_agreement": round(float((keras_pred == tflite_pred).mean()), 6),
+            "keras_accuracy": round(float((keras_pred == y).mean()), 6),
+            "tflite_accuracy": round(float((tflite_pred == y).mean()), 6),
+            "within_tolerance": bool(abs_diff.max() <= tolerance),
+            "tolerance": tolerance,
+        },
+        "keras": results['keras'],
+        "tflite": results['tflite'],
+    }
+
+    os.makedirs(REPORTS_PATH, exist_ok=True)
+    save_path = os.path.join(REPORTS_PATH, "backend_comparison.json")
+    with open(save_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"\n📄 Comparison saved to: {save_path}")
+    return report
+
+if __name__ == "__main__":
+    from models.backends import KERAS_MODEL_PATH, TFLITE_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Compare Keras and TFLite inference backends.")
+    parser.add_argument("--keras", default=KERAS_MODEL_PATH, help="Keras weights (.h5)")
+    parser.add_argument("--tflite", default=TFLITE_MODEL_PATH, help="TFLite model")
+    parser.add_argument("--limit", type=int, default=None, help="Max samples to evaluate")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Max allowed score difference")
+    args = parser.parse_args()
+
+    report = compare_backends(args.keras, args.tflite, args.limit, args.tolerance)
+    raise SystemExit(0 if report["parity"]["within_tolerance"] else 1)
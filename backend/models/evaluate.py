@@ -0,0 +1,351 @@
+import os
+import csv
+import json
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# --- CONFIGURATION ---
+CORPUS_PATH = "../data_store/dataset"
+REPORTS_PATH = "../data_store/reports"
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
+CLASS_NAMES = ['fake', 'real']  # 0 = Fake, 1 = Real (model score = P(real))
+SHARD_SIZE = 256          # Files per task; workers pick up the next shard when done
+PREDICT_BATCH = 64
+THREADS_PER_WORKER = 1
+SCORE_BINS = 1000         # Histogram resolution = threshold resolution of every curve
+DECISION_THRESHOLD = 0.5  # Same rule as the app: score <= threshold -> Synthetic
+SWEEP_THRESHOLDS = [round(0.05 * i, 2) for i in range(1, 20)]
+TARGET_FPRS = (0.001, 0.01, 0.05)
+
+# --- Corpus ---
+def scan_corpus(root):
+    """
+    [(path, label, source)] for every audio file under a `.../real/...` or
+    `.../fake/...` folder. The folders above the class folder name the source
+    (e.g. root/elevenlabs/fake/x.wav -> "elevenlabs"); "default" if there are none.
+    """
+    items = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        parts = os.path.relpath(dirpath, root).replace(os.sep, "/").split("/")
+        lowered = [p.lower() for p in parts]
+        class_index = next((i for i, p in enumerate(lowered) if p in CLASS_NAMES), None)
+        if class_index is None:
+            continue
+        label = CLASS_NAMES.index(lowered[class_index])
+        source = "/".join(parts[:class_index]) or "default"
+        for filename in sorted(filenames):
+            if filename.lower().endswith(AUDIO_EXTENSIONS):
+                items.append((os.path.join(dirpath, filename), label, source))
+    return items
+
+def read_manifest(path):
+    """[(path, label, source)] from a CSV with columns path,label[,source] (label: real/fake or 1/0)."""
+    items = []
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            label = row["label"].strip().lower()
+            label = CLASS_NAMES.index(label) if label in CLASS_NAMES else int(label)
+            items.append((os.path.join(base, row["path"]), label, row.get("source") or "default"))
+    return items
+
+# --- Incremental metrics ---
+class ScoreHistogram:
+    """
+    Per-source, per-class histograms of model scores.
+
+    Bin k holds scores in (k/bins, (k+1)/bins], so "flagged synthetic at
+    threshold k/bins" (score <= t) is exactly bins[:k]. Every confusion matrix,
+    ROC/PR point and threshold sweep is derived from these counts, so memory is
+    O(sources x bins) however large the corpus, and partial histograms from
+    different workers merge by addition.
+    """
+
+    def __init__(self, bins=SCORE_BINS):
+        self.bins = bins
+        self.counts = {}   # source -> int64 array (2, bins): row = true label
+        self.errors = {}   # source -> failed files
+
+    def add(self, scores, labels, sources):
+        scores = np.clip(np.asarray(scores, dtype=np.float64), 0.0, 1.0)
+        index = np.clip(np.ceil(scores * self.bins).astype(np.int64) - 1, 0, self.bins - 1)
+        labels = np.asarray(labels, dtype=np.int64)
+        sources = np.asarray(sources)
+        for source in np.unique(sources):
+            mask = sources == source
+            counts = self._counts(str(source))
+            np.add.at(counts, (labels[mask], index[mask]), 1)
+
+    def add_error(self, source):
+        self.errors[source] = self.errors.get(source, 0) + 1
+
+    def merge(self, other):
+        for source, counts in other.counts.items():
+            self._counts(source)[:] += counts
+        for source, errors in other.errors.items():
+            self.errors[source] = self.errors.get(source, 0) + errors
+        return self
+
+    def _counts(self, source):
+        if source not in self.counts:
+            self.counts[source] = np.zeros((2, self.bins), dtype=np.int64)
+        return self.counts[source]
+
+    def total(self):
+        counts = np.zeros((2, self.bins), dtype=np.int64)
+        for source_counts in self.counts.values():
+            counts += source_counts
+        return counts
+
+    @property
+    def samples(self):
+        return int(sum(c.sum() for c in self.counts.values()))
+
+def curve(counts):
+    """
+    Cumulative confusion counts at every threshold k/bins, k = 0..bins,
+    with Fake (synthetic) as the positive class. Returns a dict of arrays.
+    """
+    bins = counts.shape[1]
+    fake = np.concatenate([[0], np.cumsum(counts[0])])
+    real = np.concatenate([[0], np.cumsum(counts[1])])
+    n_fake, n_real = int(counts[0].sum()), int(counts[1].sum())
+    tp, fp = fake, real
+    fn, tn = n_fake - tp, n_real - fp
+    tpr = tp / max(n_fake, 1)
+    fpr = fp / max(n_real, 1)
+    precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 1.0)
+    f1 = 2 * precision * tpr / np.maximum(precision + tpr, 1e-12)
+    return {
+        "threshold": np.arange(bins + 1) / bins,
+        "tp": tp, "fp": fp, "tn": tn, "fn": fn,
+        "tpr": tpr, "fpr": fpr, "precision": precision, "recall": tpr, "f1": f1,
+        "accuracy": (tp + tn) / max(n_fake + n_real, 1),
+    }
+
+def _at(c, k):
+    return {
+        "threshold": round(float(c["threshold"][k]), 4),
+        "confusion": {"tp": int(c["tp"][k]), "fp": int(c["fp"][k]), "tn": int(c["tn"][k]), "fn": int(c["fn"][k])},
+        "accuracy": round(float(c["accuracy"][k]), 6),
+        "precision": round(float(c["precision"][k]), 6),
+        "recall": round(float(c["recall"][k]), 6),
+        "fpr": round(float(c["fpr"][k]), 6),
+        "f1": round(float(c["f1"][k]), 6),
+    }
+
+def summarize(counts, errors=0):
+    """Metrics of one histogram (overall or one source)."""
+    bins = counts.shape[1]
+    c = curve(counts)
+    k_decision = int(round(DECISION_THRESHOLD * bins))
+
+    # Thresholds ascend, so TPR/FPR ascend too: integrate directly
+    roc_auc = None
+    if counts[0].sum() and counts[1].sum():
+        roc_auc = float(np.sum(np.diff(c["fpr"]) * (c["tpr"][1:] + c["tpr"][:-1]) / 2))
+    recall_steps = np.diff(c["recall"])
+    average_precision = float(np.sum(recall_steps * c["precision"][1:])) if counts[0].sum() else None
+
+    at_fpr = {}
+    for target in TARGET_FPRS:
+        allowed = np.nonzero(c["fpr"] <= target)[0]
+        at_fpr[str(target)] = _at(c, int(allowed[-1])) if counts[1].sum() and len(allowed) else None
+
+    return {
+        "samples": int(counts.sum()),
+        "fake": int(counts[0].sum()),
+        "real": int(counts[1].sum()),
+        "errors": errors,
+        "at_decision_threshold": _at(c, k_decision),
+        "roc_auc": round(roc_auc, 6) if roc_auc is not None else None,
+        "average_precision": round(average_precision, 6) if average_precision is not None else None,
+        "best_f1": _at(c, int(np.argmax(c["f1"]))),
+        "at_fpr": at_fpr,
+        "threshold_sweep": [_at(c, int(round(t * bins))) for t in SWEEP_THRESHOLDS],
+    }
+
+# --- Workers ---
+_model = None
+
+def init_worker(threads, backend, model_path, version):
+    """Caps the math libraries, then loads the model once for every shard this process scores."""
+    global _model
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    if version:
+        from models.registry import ModelRegistry
+        _model, _ = ModelRegistry().load(version)
+    else:
+        from models.backends import load_backend
+        _model = load_backend(backend, model_path)
+
+def evaluate_shard(items, bins=SCORE_BINS, keep_scores=False):
+    """
+    Extract -> batched predict -> histogram for one shard.
+    Returns (ScoreHistogram, rows or None, stage timings).
+    """
+    from utils.audio_processor import extract_features
+    from utils import metrics
+
+    histogram = ScoreHistogram(bins)
+    rows = [] if keep_scores else None
+    with metrics.capture() as stages:
+        for offset in range(0, len(items), PREDICT_BATCH):
+            batch = items[offset:offset + PREDICT_BATCH]
+            features, kept = [], []
+            for path, label, source in batch:
+                x = extract_features(path)
+                if x is None:
+                    histogram.add_error(source)
+                    if keep_scores:
+                        rows.append((path, source, label, None))
+                    continue
+                features.append(x[0])
+                kept.append((path, label, source))
+            if not kept:
+                continue
+
+            with metrics.timer("predict"):
+                scores = _model.predict(np.stack(features), batch_size=PREDICT_BATCH, verbose=0).ravel()
+            histogram.add(scores, [k[1] for k in kept], [k[2] for k in kept])
+            if keep_scores:
+                rows.extend((path, source, label, float(s)) for (path, label, source), s in zip(kept, scores))
+    return histogram, rows, dict(stages)
+
+# --- Reports ---
+def write_curves(histogram, path):
+    """Overall ROC/PR points at every histogram threshold."""
+    c = curve(histogram.total())
+    columns = ["threshold", "tp", "fp", "tn", "fn", "tpr", "fpr", "precision", "recall", "f1", "accuracy"]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for k in range(len(c["threshold"])):
+            writer.writerow([round(float(c[col][k]), 6) for col in columns])
+
+def build_report(histogram, config):
+    total_errors = sum(histogram.errors.values())
+    sources = sorted(set(histogram.counts) | set(histogram.errors))
+    empty = np.zeros((2, histogram.bins), dtype=np.int64)
+    return {
+        "config": config,
+        "overall": summarize(histogram.total(), total_errors),
+        "per_source": {s: summarize(histogram.counts.get(s, empty), histogram.errors.get(s, 0)) for s in sources},
+    }
+
+def run_evaluation(corpus=CORPUS_PATH, manifest=None, backend='keras', model_path=None, version=None,
+                   workers=None, threads_per_worker=THREADS_PER_WORKER, shard_size=SHARD_SIZE,
+                   bins=SCORE_BINS, limit=None, output_path=REPORTS_PATH, name="evaluation",
+                   keep_scores=False):
+    from utils import metrics
+    from models.backends import KERAS_MODEL_PATH, TFLITE_MODEL_PATH
+
+    items = read_manifest(manifest) if manifest else scan_corpus(corpus)
+    if limit is not None:
+        items = items[:limit]
+    if not items:
+        print(f"❌ No labelled audio found in {manifest or corpus} (expected .../real/ and .../fake/ folders)")
+        return None
+
+    if not version:
+        model_path = model_path or (TFLITE_MODEL_PATH if backend == "tflite" else KERAS_MODEL_PATH)
+        # load_keras_model would quietly build an untrained CRNN: its metrics would be noise
+        if not os.path.exists(model_path):
+            print(f"❌ Model not found: {model_path} (train one, or pass --model / --version)")
+            return None
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    print(f"🔍 Evaluating {version or model_path} on {len(items)} files "
+          f"({len(shards)} shards, {workers} workers x {threads_per_worker} threads)")
+
+    os.makedirs(output_path, exist_ok=True)
+    report_path = os.path.join(output_path, f"{name}.json")
+    curves_path = os.path.join(output_path, f"{name}_curves.csv")
+    scores_path = os.path.join(output_path, f"{name}_scores.csv")
+
+    histogram = ScoreHistogram(bins)
+    scores_file = open(scores_path, "w", newline="") if keep_scores else None
+    scores_writer = csv.writer(scores_file) if keep_scores else None
+    if scores_writer:
+        scores_writer.writerow(["path", "source", "label", "score"])
+
+    # Spawn: each worker starts its own TensorFlow with its own thread limits
+    ctx = mp.get_context("spawn")
+    start = time.perf_counter()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker,
+                                 initargs=(threads_per_worker, backend, model_path, version)) as pool:
+            futures = {pool.submit(evaluate_shard, shard, bins, keep_scores): len(shard) for shard in shards}
+            for future in as_completed(futures):
+                partial, rows, stages = future.result()
+                histogram.merge(partial)
+                metrics.record_stages(stages)
+                if scores_writer:
+                    scores_writer.writerows(rows)
+                done += futures[future]
+                elapsed = time.perf_counter() - start
+                print(f"   ✅ {done}/{len(items)} files ({done / elapsed:.1f} files/sec)")
+    finally:
+        if scores_file:
+            scores_file.close()
+    elapsed = time.perf_counter() - start
+
+    config = {"corpus": manifest or corpus, "model": version or model_path, "backend": backend,
+              "files": len(items), "bins": bins, "decision_threshold": DECISION_THRESHOLD,
+              "positive_class": "fake", "seconds": round(elapsed, 2),
+              "files_per_sec": round(len(items) / elapsed, 2) if elapsed > 0 else None}
+    report = build_report(histogram, config)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    write_curves(histogram, curves_path)
+
+    overall = report["overall"]
+    decision = overall["at_decision_threshold"]
+    print("\n--- Evaluation Report ---")
+    print(f"   Samples: {overall['samples']} ({overall['errors']} failed) in {elapsed:.1f}s")
+    print(f"   @ {DECISION_THRESHOLD}: accuracy={decision['accuracy']} precision={decision['precision']} "
+          f"recall={decision['recall']} fpr={decision['fpr']} {decision['confusion']}")
+    print(f"   ROC AUC={overall['roc_auc']}  AP={overall['average_precision']}  "
+          f"best F1={overall['best_f1']['f1']} @ {overall['best_f1']['threshold']}")
+    for source, summary in report["per_source"].items():
+        d = summary["at_decision_threshold"]
+        print(f"   {source:<20} n={summary['samples']:<7} acc={d['accuracy']:<9} "
+              f"recall={d['recall']:<9} fpr={d['fpr']:<9} auc={summary['roc_auc']}")
+    metrics.print_stage_summary("Per-stage timings (summed across workers)")
+    print(f"\n📄 Report saved to: {report_path} (curves: {curves_path}"
+          + (f", scores: {scores_path}" if keep_scores else "") + ")")
+    return report
+
+if __name__ == "__main__":
+    from models.backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Sharded parallel evaluation of a model on a labelled corpus.")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Folder with [source/]real|fake/ audio")
+    parser.add_argument("--manifest", default=None, help="CSV with path,label[,source] (instead of --corpus)")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras")
+    parser.add_argument("--model", default=None, help="Model file (default: the backend's default path)")
+    parser.add_argument("--version", default=None, help="Model registry version (instead of --model)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores / threads)")
+    parser.add_argument("--threads-per-worker", type=int, default=THREADS_PER_WORKER)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Files per task")
+    parser.add_argument("--bins", type=int, default=SCORE_BINS, help="Score histogram / threshold resolution")
+    parser.add_argument("--limit", type=int, default=None, help="Max files to evaluate")
+    parser.add_argument("--output", default=REPORTS_PATH, help="Report folder")
+    parser.add_argument("--name", default="evaluation", help="Report file prefix")
+    parser.add_argument("--scores", action="store_true", help="Also stream per-file scores to <name>_scores.csv")
+    args = parser.parse_args()
+
+    report = run_evaluation(args.corpus, args.manifest, args.backend, args.model, args.version, args.workers,
+                            args.threads_per_worker, args.shard_size, args.bins, args.limit, args.output,
+                            args.name, args.scores)
+    if report is None:
+        raise SystemExit(1)
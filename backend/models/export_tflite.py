@@ -0,0 +1,72 @@
+import os
+import argparse
+import numpy as np
+import tensorflow as tf
+from models.backends import load_keras_model, KERAS_MODEL_PATH, TFLITE_MODEL_PATH
+from utils.feature_store import FeatureStore, FEATURE_STORE_PATH, INDEX_NAME
+
+# --- CONFIGURATION ---
+QUANTIZATION_MODES = ('none', 'dynamic', 'int8')
+CALIBRATION_SAMPLES = 200
+
+def representative_dataset(store_path=FEATURE_STORE_PATH, samples=CALIBRATION_SAMPLES, seed=42):
+    """
+    Calibration inputs for full-integer quantization: real training features
+    from the feature store, or random spectrogram-like inputs as a fallback.
+    """
+    if os.path.exists(os.path.join(store_path, INDEX_NAME)):
+        store = FeatureStore(store_path)
+        rng = np.random.default_rng(seed)
+        positions = rng.choice(len(store), size=min(samples, len(store)), replace=False)
+        for position in positions:
+            yield [store.get(position).astype(np.float32)[np.newaxis]]
+    else:
+        print("⚠️ No feature store found: calibrating int8 on random inputs (accuracy will suffer).")
+        rng = np.random.default_rng(seed)
+        for _ in range(samples):
+            yield [rng.random((1, 128, 128, 1), dtype=np.float32)]
+
+def export_tflite(keras_path=KERAS_MODEL_PATH, output_path=TFLITE_MODEL_PATH,
+                  quantization='dynamic', allow_select_ops=False):
+    """Converts the trained CRNN into a TFLite flatbuffer."""
+    print(f"🧠 Loading Keras model from: {keras_path}")
+    if not os.path.exists(keras_path):
+        print("⚠️ No trained weights found: exporting random weights (Demo Mode).")
+    model = load_keras_model(keras_path)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == 'dynamic':
+        # Weights in int8, activations float: ~4x smaller, no calibration needed
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == 'int8':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    if allow_select_ops:
+        # Fallback if the BiLSTM doesn't lower to builtin ops on this TF version
+        builtins = tf.lite.OpsSet.TFLITE_BUILTINS_INT8 if quantization == 'int8' else tf.lite.OpsSet.TFLITE_BUILTINS
+        converter.target_spec.supported_ops = [builtins, tf.lite.OpsSet.SELECT_TF_OPS]
+        converter._experimental_lower_tensor_list_ops = False
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"✅ Exported {quantization} TFLite model to: {output_path} "
+          f"({len(tflite_model) / 1024:.0f} KB)")
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the CRNN to TFLite.")
+    parser.add_argument("--weights", default=KERAS_MODEL_PATH, help="Keras weights (.h5)")
+    parser.add_argument("--output", default=TFLITE_MODEL_PATH, help="Output .tflite path")
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default='dynamic')
+    parser.add_argument("--allow-select-ops", action="store_true",
+                        help="Allow TF select ops (needs the full TF runtime to serve)")
+    args = parser.parse_args()
+
+    export_tflite(args.weights, args.output, args.quantization, args.allow_select_ops)
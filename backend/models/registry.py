@@ -0,0 +1,166 @@
+import os
+import json
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from utils.upload_handler import file_sha256
+from models.backends import BACKENDS
+
+# --- CONFIGURATION ---
+REGISTRY_PATH = "../data_store/model_registry"
+METADATA_NAME = "metadata.json"
+CURRENT_NAME = "CURRENT"
+# Keras picks the weights reader from the extension, so artifacts keep theirs
+ARTIFACT_EXTENSIONS = ('.weights.h5', '.h5', '.tflite')
+
+def _artifact_name(path):
+    name = os.path.basename(path).lower()
+    for ext in ARTIFACT_EXTENSIONS:
+        if name.endswith(ext):
+            return "model" + ext
+    raise ValueError(f"Unsupported model artifact '{path}' (expected one of {ARTIFACT_EXTENSIONS})")
+
+class ModelRegistry:
+    """
+    Directory of immutable, versioned model artifacts:
+
+        <root>/<version>/model.h5 | model.weights.h5 | model.tflite
+        <root>/<version>/metadata.json   (backend, sha256, architecture, metrics, feature params...)
+        <root>/CURRENT                   (version the servers should serve)
+
+    A version id is '<UTC timestamp>-<sha256[:8]>', so ids sort by age and
+    name their exact weights. CURRENT is replaced atomically, and every server
+    process polling it picks up a promotion without a restart.
+    """
+
+    def __init__(self, root=REGISTRY_PATH):
+        self.root = root
+
+    # --- Writing ---
+    def register(self, artifact_path, backend='keras', metrics=None, feature_params=None,
+                 notes=None, activate=False, architecture=None):
+        """
+        Copies an artifact into the registry. Returns the new version id.
+        architecture = build_model keyword arguments, for Keras weights of a
+        non-default architecture (e.g. the winner of a sweep).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (expected one of {BACKENDS})")
+        if feature_params is None:
+            from utils.dataset_preprocessor import FEATURE_PARAMS
+            feature_params = FEATURE_PARAMS
+
+        artifact = _artifact_name(artifact_path)
+        digest = file_sha256(artifact_path)
+        version = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{digest[:8]}"
+        os.makedirs(self.root, exist_ok=True)
+
+        # Build the version in a temp dir, then rename: readers never see half a version
+        staging = tempfile.mkdtemp(dir=self.root, prefix=".staging-")
+        try:
+            shutil.copy2(artifact_path, os.path.join(staging, artifact))
+            metadata = {
+                "version": version,
+                "backend": backend,
+                "artifact": artifact,
+                "sha256": digest,
+                "source": os.path.abspath(artifact_path),
+                "created_at": datetime.utcnow().isoformat(),
+                "feature_params": feature_params,
+                "architecture": architecture or {},
+                "metrics": metrics or {},
+                "notes": notes,
+            }
+            with open(os.path.join(staging, METADATA_NAME), "w") as f:
+                json.dump(metadata, f, indent=2)
+            os.rename(staging, os.path.join(self.root, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.set_current(version)
+        return version
+
+    def set_current(self, version):
+        self.metadata(version)  # Raises if the version does not exist
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".current-")
+        with os.fdopen(fd, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_NAME))
+
+    # --- Reading ---
+    def current(self):
+        """Version named by CURRENT, or None."""
+        try:
+            with open(os.path.join(self.root, CURRENT_NAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        """Metadata of every version, newest first."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.root), reverse=True):
+            if os.path.isfile(os.path.join(self.root, name, METADATA_NAME)):
+                found.append(self.metadata(name))
+        return found
+
+    def metadata(self, version):
+        # Versions are plain directory names: no separators, no '.'/'..', no hidden staging dirs
+        if not version or os.path.basename(version) != version or version.startswith('.'):
+            raise KeyError(f"Unknown model version '{version}'")
+        path = os.path.join(self.root, version, METADATA_NAME)
+        if not os.path.isfile(path):
+            raise KeyError(f"Unknown model version '{version}'")
+        with open(path) as f:
+            return json.load(f)
+
+    def artifact_path(self, version):
+        return os.path.join(self.root, version, self.metadata(version)["artifact"])
+
+    def load(self, version):
+        """(model with a Keras-style predict, metadata) for a registered version."""
+        from models.backends import load_backend
+
+        metadata = self.metadata(version)
+        model = load_backend(metadata["backend"], self.artifact_path(version),
+                             architecture=metadata.get("architecture"))
+        return model, metadata
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the VAANI model registry.")
+    parser.add_argument("--root", default=REGISTRY_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List registered versions")
+    register = commands.add_parser("register", help="Add a trained artifact")
+    register.add_argument("artifact", help="Keras weights (.h5) or TFLite model")
+    register.add_argument("--backend", choices=BACKENDS, default="keras")
+    register.add_argument("--metrics", help="JSON file with evaluation metrics")
+    register.add_argument("--notes", default=None)
+    register.add_argument("--activate", action="store_true", help="Also make it CURRENT")
+    activate = commands.add_parser("activate", help="Point CURRENT at a version")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "list":
+        current = registry.current()
+        for meta in registry.versions():
+            marker = "*" if meta["version"] == current else " "
+            print(f"{marker} {meta['version']}  {meta['backend']:<6}  {json.dumps(meta['metrics'])}")
+    elif args.command == "register":
+        metrics = None
+        if args.metrics:
+            with open(args.metrics) as f:
+                metrics = json.load(f)
+        version = registry.register(args.artifact, args.backend, metrics, notes=args.notes,
+                                    activate=args.activate)
+        print(f"✅ Registered {version}" + (" (CURRENT)" if args.activate else ""))
+    else:
+        registry.set_current(args.version)
+        print(f"✅ CURRENT -> {args.version}")
@@ -0,0 +1,242 @@
+import os
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import itertools
+import statistics
+import multiprocessing as mp
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- CONFIGURATION ---
+SWEEPS_PATH = "../data_store/sweeps"
+# build_model() keyword arguments; everything else in a trial is a training parameter
+ARCHITECTURE_KEYS = ('filters', 'lstm_units', 'dense_units', 'dropout', 'learning_rate')
+DEFAULT_SPACE = {
+    "filters": [[32, 64, 128], [16, 32, 64], [32, 64, 128, 256]],
+    "lstm_units": [32, 64, 128],
+    "dense_units": [64],
+    "dropout": [0.3, 0.4, 0.5],
+    "learning_rate": [0.001, 0.0003],
+    "batch_size": [8, 16, 32],
+}
+MAX_EPOCHS = 10
+PATIENCE = 3            # EarlyStopping on val_loss, per trial
+PRUNE_AFTER_EPOCHS = 2  # Median rule: no pruning before this many epochs...
+PRUNE_MIN_PEERS = 3     # ...or before this many other trials reached the same epoch
+THREADS_PER_TRIAL = 2
+RESULT_COLUMNS = ["trial", "status", "best_val_accuracy", "best_val_loss", "epochs_run",
+                  "seconds", "params", "error"]
+
+# --- Search space ---
+def expand_space(space, strategy="random", trials=20, seed=42):
+    """[{param: value}] to evaluate: the full grid, or `trials` random draws without repeats."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if strategy == "grid" or trials >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, trials)
+
+def split_params(params):
+    architecture = {k: v for k, v in params.items() if k in ARCHITECTURE_KEYS}
+    training = {k: v for k, v in params.items() if k not in ARCHITECTURE_KEYS}
+    return architecture, training
+
+# --- Worker process ---
+def init_worker(threads):
+    """Caps the math libraries of this worker BEFORE TensorFlow creates its thread pools."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def run_trial(trial_id, params, config, board):
+    """
+    Trains one configuration on the feature store. `board` is a shared
+    {trial_id: [val_accuracy per epoch]} used for median-rule pruning.
+    Returns a result row (never raises).
+    """
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
+    from models.cnn_model import build_model
+    from utils.feature_store import FeatureStore, make_dataset
+
+    class MedianPruning(tf.keras.callbacks.Callback):
+        """Stops a trial whose val_accuracy is below the median of its peers at the same epoch."""
+
+        def __init__(self):
+            super().__init__()
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            score = float((logs or {}).get("val_accuracy", 0.0))
+            board[trial_id] = list(board.get(trial_id, [])) + [score]
+            if epoch + 1 < config["prune_after_epochs"]:
+                return
+            peers = [h[epoch] for t, h in board.items() if t != trial_id and len(h) > epoch]
+            if len(peers) >= config["prune_min_peers"] and score < statistics.median(peers):
+                self.pruned = True
+                self.model.stop_training = True
+
+    trial_dir = os.path.join(config["sweep_dir"], f"trial_{trial_id:04d}")
+    os.makedirs(trial_dir, exist_ok=True)
+    checkpoint_path = os.path.join(trial_dir, "model.weights.h5")
+    start = time.perf_counter()
+    row = {"trial": trial_id, "params": json.dumps(params), "error": ""}
+
+    try:
+        tf.keras.backend.clear_session()
+        tf.keras.utils.set_random_seed(config["seed"] + trial_id)
+        architecture, training = split_params(params)
+
+        store = FeatureStore(config["store_path"])
+        batch_size = int(training.get("batch_size", 8))
+        train_ds = make_dataset(store, 'training', batch_size, shuffle=True, seed=config["seed"])
+        val_ds = make_dataset(store, 'validation', batch_size, shuffle=False)
+
+        model = build_model(input_shape=(128, 128, 1), **architecture)
+        pruning = MedianPruning()
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=int(training.get("epochs", config["max_epochs"])),
+            verbose=0,
+            callbacks=[
+                ModelCheckpoint(checkpoint_path, monitor='val_accuracy', save_best_only=True,
+                                save_weights_only=True, verbose=0),
+                EarlyStopping(monitor='val_loss', patience=config["patience"]),
+                pruning,
+            ],
+        )
+
+        row.update(
+            status="pruned" if pruning.pruned else "completed",
+            best_val_accuracy=round(max(history.history["val_accuracy"]), 4),
+            best_val_loss=round(min(history.history["val_loss"]), 4),
+            epochs_run=len(history.history["loss"]),
+        )
+        with open(os.path.join(trial_dir, "history.json"), "w") as f:
+            json.dump({k: [float(v) for v in values] for k, values in history.history.items()}, f)
+    except Exception as e:
+        row.update(status="failed", error=str(e))
+
+    row["seconds"] = round(time.perf_counter() - start, 1)
+    row["checkpoint"] = checkpoint_path if os.path.exists(checkpoint_path) else None
+    return row
+
+# --- Export ---
+def export_best(rows, sweep_dir, register=False, activate=False):
+    """
+    Copies the best trial's weights to <sweep_dir>/best.weights.h5 (+ best.json)
+    and optionally adds them to the model registry, architecture included, so
+    the server builds the matching CRNN when it loads that version.
+    """
+    candidates = [r for r in rows if r.get("checkpoint") and r["status"] != "failed"]
+    if not candidates:
+        print("❌ No trial produced a checkpoint.")
+        return None
+    best = max(candidates, key=lambda r: (r["best_val_accuracy"], -r["best_val_loss"]))
+    params = json.loads(best["params"])
+    architecture, training = split_params(params)
+
+    best_path = os.path.join(sweep_dir, "best.weights.h5")
+    shutil.copy2(best["checkpoint"], best_path)
+    summary = {"trial": best["trial"], "architecture": architecture, "training": training,
+               "best_val_accuracy": best["best_val_accuracy"], "best_val_loss": best["best_val_loss"]}
+    with open(os.path.join(sweep_dir, "best.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"🏆 Best trial {best['trial']}: val_accuracy={best['best_val_accuracy']} {params}")
+    print(f"   Weights: {best_path}")
+
+    if register:
+        from models.registry import ModelRegistry
+        metrics = {"best_val_accuracy": best["best_val_accuracy"], "best_val_loss": best["best_val_loss"],
+                   "epochs_run": best["epochs_run"], "sweep": os.path.basename(sweep_dir), **training}
+        version = ModelRegistry().register(best_path, 'keras', metrics, architecture=architecture,
+                                           notes=f"Best of sweep {os.path.basename(sweep_dir)}",
+                                           activate=activate)
+        summary["registry_version"] = version
+        print(f"🗂️  Registered as {version}" + (" (now CURRENT)" if activate else ""))
+    return summary
+
+# --- Driver ---
+def run_sweep(space=None, strategy="random", trials=20, workers=None, threads_per_trial=THREADS_PER_TRIAL,
+              max_epochs=MAX_EPOCHS, patience=PATIENCE, seed=42, output_path=SWEEPS_PATH,
+              register=False, activate=False):
+    from utils.feature_store import ensure_feature_store, FEATURE_STORE_PATH
+
+    # Build (or refresh) the store up front: trials only memory-map it
+    ensure_feature_store(store_path=FEATURE_STORE_PATH)
+
+    configs = expand_space(space or DEFAULT_SPACE, strategy, trials, seed)
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_trial)
+    sweep_dir = os.path.join(output_path, datetime.utcnow().strftime("%Y%m%dT%H%M%S"))
+    os.makedirs(sweep_dir, exist_ok=True)
+    with open(os.path.join(sweep_dir, "space.json"), "w") as f:
+        json.dump({"space": space or DEFAULT_SPACE, "strategy": strategy, "seed": seed,
+                   "max_epochs": max_epochs, "patience": patience}, f, indent=2)
+
+    config = {"sweep_dir": sweep_dir, "store_path": FEATURE_STORE_PATH, "seed": seed,
+              "max_epochs": max_epochs, "patience": patience,
+              "prune_after_epochs": PRUNE_AFTER_EPOCHS, "prune_min_peers": PRUNE_MIN_PEERS}
+    print(f"🚀 Sweep {sweep_dir}: {len(configs)} trials, {workers} workers x {threads_per_trial} threads")
+
+    # Spawn: every worker gets a fresh TensorFlow with its own thread limits
+    ctx = mp.get_context("spawn")
+    results_path = os.path.join(sweep_dir, "results.csv")
+    rows = []
+    with ctx.Manager() as manager, open(results_path, "w", newline="") as results_file:
+        board = manager.dict()
+        writer = csv.DictWriter(results_file, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=init_worker, initargs=(threads_per_trial,)) as pool:
+            futures = [pool.submit(run_trial, i, params, config, board) for i, params in enumerate(configs)]
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                rows.append(row)
+                writer.writerow(row)
+                results_file.flush()
+                print(f"   [{done}/{len(configs)}] trial {row['trial']} {row['status']}: "
+                      f"val_accuracy={row.get('best_val_accuracy')} in {row['seconds']}s")
+
+    print(f"\n📄 Results table: {results_path}")
+    ranked = sorted((r for r in rows if r["status"] != "failed"),
+                    key=lambda r: r["best_val_accuracy"], reverse=True)
+    for r in ranked[:10]:
+        print(f"   {r['trial']:>4}  {r['status']:<9}  acc={r['best_val_accuracy']:<7} "
+              f"loss={r['best_val_loss']:<7} epochs={r['epochs_run']:<3} {r['params']}")
+
+    return export_best(rows, sweep_dir, register, activate)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the VAANI CRNN.")
+    parser.add_argument("--space", help="JSON file {param: [values]} (default: built-in space)")
+    parser.add_argument("--strategy", choices=("random", "grid"), default="random")
+    parser.add_argument("--trials", type=int, default=20, help="Random draws (ignored for grid)")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent trials (default: cores / threads)")
+    parser.add_argument("--threads-per-trial", type=int, default=THREADS_PER_TRIAL)
+    parser.add_argument("--epochs", type=int, default=MAX_EPOCHS, help="Max epochs per trial")
+    parser.add_argument("--patience", type=int, default=PATIENCE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=SWEEPS_PATH)
+    parser.add_argument("--register", action="store_true", help="Add the best model to the registry")
+    parser.add_argument("--activate", action="store_true", help="...and make it CURRENT")
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+
+    run_sweep(space, args.strategy, args.trials, args.workers, args.threads_per_trial, args.epochs,
+              args.patience, args.seed, args.output, args.register or args.activate, args.activate)
@@ -7,14 +7,27 @@ import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
 from models.cnn_model import build_model
+from models.registry import ModelRegistry
+from utils.audio_processor import extract_features
+from utils.feature_store import FeatureStore, ensure_feature_store, make_dataset, FEATURE_STORE_PATH
 
 # --- CONFIGURATION ---
 DATASET_PATH = "../data_store/processed_dataset"
+RAW_DATASET_PATH = "../data_store/dataset"
 REPORTS_PATH = "../data_store/reports"
 MODEL_SAVE_PATH = "vaani_model.h5"
 IMG_SIZE = (128, 128)
 BATCH_SIZE = 8
 EPOCHS = 10
+VALIDATION_SPLIT = 0.2
+# "store"  = memory-mapped float16 feature store + tf.data (built from RAW_DATASET_PATH on first run)
+# "images" = PNGs in DATASET_PATH, "audio" = in-memory features straight from RAW_DATASET_PATH
+FEATURE_SOURCE = "store"
+CLASS_NAMES = ['fake', 'real']  # Keras alphabetical order: 0 = Fake, 1 = Real
+AUDIO_EXTENSIONS = ('.mp3', '.wav')
+# Add the best checkpoint to the model registry (servers pick it up once it is CURRENT)
+REGISTER_MODEL = True
+ACTIVATE_MODEL = False
 
 # Create reports folder if it doesn't exist
 os.makedirs(REPORTS_PATH, exist_ok=True)
@@ -64,6 +77,11 @@ def plot_confusion_matrix(model, val_generator):
     # 2. Get True Labels
     y_true = val_generator.classes
     
+    save_evaluation_reports(y_true, y_pred)
+    return y_true, y_pred
+
+def save_evaluation_reports(y_true, y_pred):
+    """Draws the Confusion Matrix Heatmap and writes the Classification Report."""
     # 3. Compute Matrix
     cm = confusion_matrix(y_true, y_pred)
     
@@ -90,9 +108,73 @@ def plot_confusion_matrix(model, val_generator):
     with open(os.path.join(REPORTS_PATH, "metrics_report.txt"), "w") as f:
         f.write(report)
 
+def register_trained_model(history, y_true=None, y_pred=None):
+    """Registers the best checkpoint with its training and validation metrics."""
+    if not REGISTER_MODEL or not os.path.exists(MODEL_SAVE_PATH):
+        return None
+
+    metrics = {"feature_source": FEATURE_SOURCE, "epochs": len(history.history['loss'])}
+    for key, values in history.history.items():
+        metrics[f"final_{key}"] = round(float(values[-1]), 4)
+    if history.history.get('val_accuracy'):
+        metrics["best_val_accuracy"] = round(float(max(history.history['val_accuracy'])), 4)
+    if y_true is not None:
+        metrics["validation_samples"] = int(len(y_true))
+        metrics["validation_accuracy"] = round(float((np.asarray(y_true) == np.asarray(y_pred)).mean()), 4)
+
+    version = ModelRegistry().register(MODEL_SAVE_PATH, 'keras', metrics, activate=ACTIVATE_MODEL)
+    print(f"🗂️  Registered model version {version}" + (" (now CURRENT)" if ACTIVATE_MODEL else
+          f"\n   (Promote it with 'python -m models.registry activate {version}')"))
+    return version
+
+def load_audio_features(dataset_path=RAW_DATASET_PATH):
+    """
+    Builds (X, y) arrays straight from the raw audio folders using the same
+    in-memory feature path as the server (no PNG round trip).
+    Split is deterministic: the first VALIDATION_SPLIT of each class (sorted by name)
+    is held out, mirroring flow_from_directory(validation_split=...).
+    """
+    x_train, y_train, x_val, y_val = [], [], [], []
+
+    for label, category in enumerate(CLASS_NAMES):
+        folder = os.path.join(dataset_path, category)
+        if not os.path.exists(folder):
+            print(f"⚠️ Warning: Source folder not found: {folder}")
+            continue
+
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(AUDIO_EXTENSIONS))
+        split_at = int(len(files) * VALIDATION_SPLIT)
+
+        for i, filename in enumerate(files):
+            features = extract_features(os.path.join(folder, filename))
+            if features is None:
+                continue
+            if i < split_at:
+                x_val.append(features[0])
+                y_val.append(label)
+            else:
+                x_train.append(features[0])
+                y_train.append(label)
+
+        print(f"   - '{category}': {len(files)} files")
+
+    def to_arrays(x, y):
+        x = np.stack(x) if x else np.zeros((0, *IMG_SIZE, 1), dtype=np.float32)
+        return x, np.asarray(y, dtype=np.float32)
+
+    return to_arrays(x_train, y_train), to_arrays(x_val, y_val)
+
 def train():
     print("🚀 Initializing Training Pipeline (Phase 7: Visualization Mode)...")
 
+    if FEATURE_SOURCE == "store":
+        train_on_feature_store()
+        return
+
+    if FEATURE_SOURCE == "audio":
+        train_on_audio_features()
+        return
+
     # 1. Data Generators
     # Validation Split: 20% for testing the graphs
     datagen = ImageDataGenerator(rescale=1./255, validation_split=0.2)
@@ -128,7 +210,64 @@ def train():
     
     # 5. Generate Reports
     plot_training_history(history)
-    plot_confusion_matrix(model, val_generator)
+    y_true, y_pred = plot_confusion_matrix(model, val_generator)
+    register_trained_model(history, y_true, y_pred)
+
+def train_on_audio_features():
+    """Same training run, fed by in-memory features instead of PNG generators."""
+    print(f"📂 Extracting features from: {RAW_DATASET_PATH}")
+    (x_train, y_train), (x_val, y_val) = load_audio_features()
+
+    model = build_model(input_shape=(128, 128, 1))
+    checkpoint = ModelCheckpoint(MODEL_SAVE_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
+
+    print(f"🔥 Starting Training for {EPOCHS} Epochs...")
+    history = model.fit(
+        x_train, y_train,
+        validation_data=(x_val, y_val),
+        batch_size=BATCH_SIZE,
+        epochs=EPOCHS,
+        shuffle=True,
+        callbacks=[checkpoint]
+    )
+
+    print("✅ Training Complete.")
+
+    plot_training_history(history)
+    predictions = model.predict(x_val, batch_size=BATCH_SIZE)
+    y_pred = (predictions > 0.5).astype(int).ravel()
+    save_evaluation_reports(y_val.astype(int), y_pred)
+    register_trained_model(history, y_val.astype(int), y_pred)
+
+def train_on_feature_store():
+    """Same training run, fed by the memory-mapped feature store through tf.data."""
+    ensure_feature_store(raw_path=RAW_DATASET_PATH, store_path=FEATURE_STORE_PATH)
+
+    store = FeatureStore(FEATURE_STORE_PATH)
+    print(f"📂 Loading {len(store)} feature tensors from: {FEATURE_STORE_PATH}")
+
+    train_ds = make_dataset(store, 'training', BATCH_SIZE, shuffle=True)
+    val_ds = make_dataset(store, 'validation', BATCH_SIZE, shuffle=False) # Fixed order for the Confusion Matrix
+
+    model = build_model(input_shape=(128, 128, 1))
+    checkpoint = ModelCheckpoint(MODEL_SAVE_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
+
+    print(f"🔥 Starting Training for {EPOCHS} Epochs...")
+    history = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=EPOCHS,
+        callbacks=[checkpoint]
+    )
+
+    print("✅ Training Complete.")
+
+    plot_training_history(history)
+    predictions = model.predict(val_ds)
+    y_pred = (predictions > 0.5).astype(int).ravel()
+    y_true = store.labels[store.positions('validation')].astype(int)
+    save_evaluation_reports(y_true, y_pred)
+    register_trained_model(history, y_true, y_pred)
 
 if __name__ == "__main__":
     train()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("librosa")
+pytest.importorskip("matplotlib")
+keras_image = pytest.importorskip("tensorflow.keras.preprocessing.image")
+
+from utils.audio_processor import generate_spectrogram, extract_features
+
+# (sample rate, seconds, channels): resampled, short, stereo and native-rate inputs
+PARITY_CASES = [(48000, 3.5, 1), (16000, 1.0, 1), (44100, 3.0, 2), (22050, 4.0, 1)]
+
+def write_clip(path, sr, seconds, channels, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * seconds)) / sr
+    tone = 0.3 * np.sin(2 * np.pi * (220 + 400 * t) * t)  # Chirp: structure across bands and frames
+    y = (tone + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+    if channels > 1:
+        y = np.stack([y, np.roll(y, 17)], axis=1)
+    sf.write(path, y, sr)
+    return path
+
+@pytest.mark.parametrize("sr,seconds,channels", PARITY_CASES)
+def test_tensor_matches_png_pipeline(tmp_path, sr, seconds, channels):
+    """extract_features must stay bit-exact with specshow -> PNG -> load_img (what the model was trained on)."""
+    audio = write_clip(str(tmp_path / "clip.wav"), sr, seconds, channels)
+    png = generate_spectrogram(audio, str(tmp_path / "clip.png"))
+    assert png is not None
+
+    img = keras_image.load_img(png, target_size=(128, 128), color_mode='grayscale')
+    expected = keras_image.img_to_array(img) / 255.0
+    actual = extract_features(audio)[0]
+
+    assert actual.shape == expected.shape == (128, 128, 1)
+    assert float(np.abs(actual - expected).max()) == 0.0
@@ -0,0 +1,62 @@
+import zlib
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("soundfile")
+pytest.importorskip("soxr")
+
+from utils.feature_payload import (encode_features, decode_payload, payload_sha256, params_id,
+                                   PayloadError, HEADER, MAGIC, PAYLOAD_VERSION, MAX_FRAMES)
+from utils.audio_processor import N_MELS
+
+def mel_db(frames=MAX_FRAMES, seed=0):
+    rng = np.random.default_rng(seed)
+    return (-80.0 * rng.random((N_MELS, frames))).astype(np.float32)
+
+def forge(matrix, magic=MAGIC, version=PAYLOAD_VERSION, params=None, raw_size=None, body=None):
+    """Hand-built payload (no shuffle), to corrupt one field at a time."""
+    S = np.asarray(matrix, dtype='<f2')
+    raw = S.tobytes()
+    header = HEADER.pack(magic, version, 0, S.shape[0], S.shape[1], 0,
+                         params_id() if params is None else params,
+                         len(raw) if raw_size is None else raw_size)
+    return header + (zlib.compress(raw) if body is None else body)
+
+@pytest.mark.parametrize("shuffle", [True, False])
+def test_round_trip_is_float16_exact(shuffle):
+    S = mel_db()
+    decoded = decode_payload(encode_features(S, shuffle=shuffle))
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, S.astype(np.float16).astype(np.float32))
+
+def test_forged_header_round_trips():
+    assert decode_payload(forge(mel_db(frames=10))).shape == (N_MELS, 10)
+
+@pytest.mark.parametrize("payload, reason", [
+    (b"", "shorter"),
+    (b"VMEL", "shorter"),
+    (forge(mel_db(frames=10), magic=b"NOPE"), "Not a VAANI"),
+    (forge(mel_db(frames=10), version=PAYLOAD_VERSION + 1), "Unsupported payload version"),
+    (forge(mel_db(frames=10), params=params_id() ^ 1), "other parameters"),
+    (forge(mel_db(frames=MAX_FRAMES + 1)), "Unexpected shape"),
+    (forge(mel_db(frames=10)[:64]), "Unexpected shape"),
+    (forge(mel_db(frames=10), raw_size=10), "does not match its shape"),
+    (forge(mel_db(frames=10), body=b"not zlib at all"), "Corrupt body"),
+    (forge(mel_db(frames=10), body=zlib.compress(bytes(N_MELS * 10 * 2 - 2))), "declared size"),
+    (forge(mel_db(frames=10), body=zlib.compress(bytes(N_MELS * 10 * 2 * 100))), "declared size"),
+])
+def test_malformed_payloads_are_rejected(payload, reason):
+    with pytest.raises(PayloadError, match=reason):
+        decode_payload(payload)
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, 1000.0, -1000.0])
+def test_values_outside_a_db_spectrogram_are_rejected(value):
+    S = mel_db(frames=10)
+    S[3, 4] = value
+    with pytest.raises(PayloadError, match="dB Mel-spectrogram"):
+        decode_payload(forge(S))
+
+def test_payload_hash_changes_with_the_content():
+    a, b = encode_features(mel_db(seed=0)), encode_features(mel_db(seed=1))
+    assert payload_sha256(a) != payload_sha256(b)
+    assert payload_sha256(a) == payload_sha256(bytes(a))
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.fingerprint_index import FingerprintIndex, descriptor
+
+def clip(seed):
+    """Stand-in for a (1, 128, 128, 1) model input: smooth random structure in [0, 1]."""
+    rng = np.random.default_rng(seed)
+    coarse = rng.random((16, 16))
+    image = np.kron(coarse, np.ones((8, 8))) + 0.05 * rng.standard_normal((128, 128))
+    image = (image - image.min()) / (image.max() - image.min())
+    return image.reshape(1, 128, 128, 1).astype(np.float32)
+
+def test_near_copy_matches_and_reports_the_original(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "fp"))
+    original = clip(0)
+    index.add(original, "ab" * 32)
+
+    copy = original + 0.01 * np.random.default_rng(1).standard_normal(original.shape).astype(np.float32)
+    match = index.search(copy)
+    assert match is not None
+    assert match[0] == "ab" * 32 and match[1] >= index.min_similarity
+
+def test_reversed_and_shuffled_audio_do_not_match(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "fp"))
+    original = clip(0)
+    index.add(original, "ab" * 32)
+
+    reversed_clip = original[:, :, ::-1, :]
+    segments = original.reshape(1, 128, 8, 16, 1)[:, :, np.random.default_rng(2).permutation(8)]
+    shuffled = segments.reshape(1, 128, 128, 1)
+
+    assert float(descriptor(reversed_clip) @ descriptor(original)) < 0.9
+    assert index.search(reversed_clip) is None
+    assert index.search(shuffled) is None
+
+def test_unrelated_clip_does_not_match(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "fp"))
+    index.add(clip(0), "ab" * 32)
+    assert index.search(clip(3)) is None
+
+def test_index_reopens_with_its_entries(tmp_path):
+    root = str(tmp_path / "fp")
+    index = FingerprintIndex(root)
+    original = clip(0)
+    index.add(original, "cd" * 32)
+    index.flush()
+
+    reopened = FingerprintIndex(root)
+    assert reopened.count == 1
+    assert reopened.search(original)[0] == "cd" * 32
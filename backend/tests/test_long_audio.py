@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("soxr")
+
+from utils.long_audio import iter_windows, estimate_window_count, WINDOW_SECONDS, BLOCK_SECONDS
+from utils.audio_processor import SAMPLE_RATE
+
+def write_silence(path, seconds):
+    sf.write(path, np.zeros(int(round(seconds * SAMPLE_RATE)), dtype=np.float32), SAMPLE_RATE)
+    return path
+
+def write_ramp(path, seconds):
+    """Sample value = its own time / 400 s, so a window tells where it was cut from."""
+    t = np.arange(int(round(seconds * SAMPLE_RATE))) / SAMPLE_RATE
+    sf.write(path, (t / 400.0).astype(np.float32), SAMPLE_RATE, subtype='FLOAT')
+    return path
+
+def collect(path, hop, max_windows):
+    coverage = {}
+    starts = [start for start, samples in iter_windows(path, hop, max_windows, coverage)]
+    return starts, coverage
+
+def test_exact_fit_is_not_truncated(tmp_path):
+    # 3 s window + 3 hops of 1.5 s = exactly 4 windows
+    path = write_silence(str(tmp_path / "fit.wav"), WINDOW_SECONDS + 3 * 1.5)
+    starts, coverage = collect(path, 1.5, 4)
+    assert starts == [0.0, 1.5, 3.0, 4.5]
+    assert coverage["truncated"] is False
+    assert estimate_window_count(path, 1.5, 4) == 4
+
+def test_tail_is_scored_with_a_window_ending_at_the_clip_end(tmp_path):
+    path = write_silence(str(tmp_path / "tail.wav"), 5.0)
+    starts, coverage = collect(path, 1.5, 10)
+    assert starts[:2] == [0.0, 1.5]
+    assert starts[-1] == pytest.approx(5.0 - WINDOW_SECONDS)
+    assert coverage["truncated"] is False
+    assert estimate_window_count(path, 1.5, 10) == len(starts)
+
+def test_cap_reports_truncation(tmp_path):
+    path = write_silence(str(tmp_path / "long.wav"), WINDOW_SECONDS + 3 * 1.5 + 0.5)
+    starts, coverage = collect(path, 1.5, 4)
+    assert len(starts) == 4
+    assert coverage["truncated"] is True
+
+def test_hops_longer_than_a_decode_block_stay_in_sync(tmp_path):
+    hop = 4.5 * BLOCK_SECONDS
+    path = write_ramp(str(tmp_path / "ramp.wav"), 200.0)
+    coverage = {}
+    windows = list(iter_windows(path, hop, 100, coverage))
+
+    assert [start for start, _ in windows] == [0.0, hop, 2 * hop, 3 * hop, 4 * hop]
+    for start, samples in windows:
+        assert len(samples) == int(WINDOW_SECONDS * SAMPLE_RATE)
+        assert float(samples[0]) == pytest.approx(start / 400.0, abs=1e-6)
+    assert coverage["truncated"] is False
+    assert coverage["seconds"] == pytest.approx(200.0)
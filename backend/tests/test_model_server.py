@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from models.registry import ModelRegistry
+from utils.model_server import ModelServer
+
+class FakeModel:
+    def __init__(self, version):
+        self.version = version
+
+def make_registry(tmp_path, count):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    versions = []
+    for i in range(count):
+        artifact = tmp_path / f"candidate_{i}.tflite"
+        artifact.write_bytes(f"weights {i}".encode())
+        versions.append(registry.register(str(artifact), 'tflite', feature_params={}))
+    return registry, versions
+
+def make_server(registry, broken=()):
+    def warm_up(model):
+        if model.version in broken:
+            raise RuntimeError("warm-up failed")
+    return ModelServer(lambda version: (FakeModel(version), registry.metadata(version)), warm_up)
+
+def test_promotes_only_once_the_new_version_serves(tmp_path):
+    registry, (v1, v2) = make_registry(tmp_path, 2)
+    registry.set_current(v1)
+    server = make_server(registry)
+    server.serve(v1, FakeModel(v1))
+    pinned = server.active  # What an in-flight request holds
+
+    assert server.activate(v2, wait=True, on_activated=registry.set_current)
+    assert server.active.version == v2
+    assert registry.current() == v2
+    assert pinned.version == v1 and pinned.model.version == v1
+
+def test_version_that_fails_warm_up_is_never_promoted(tmp_path):
+    registry, (v1, v2) = make_registry(tmp_path, 2)
+    registry.set_current(v1)
+    server = make_server(registry, broken={v2})
+    server.serve(v1, FakeModel(v1))
+
+    server.activate(v2, wait=True, on_activated=registry.set_current)
+    assert server.active.version == v1
+    assert registry.current() == v1
+    assert server.status()["last_error"].startswith(v2)
+
+def test_promoting_the_active_version_needs_no_reload(tmp_path):
+    registry, (v1,) = make_registry(tmp_path, 1)
+    server = make_server(registry)
+    server.serve(v1, FakeModel(v1))
+
+    assert not server.activate(v1, on_activated=registry.set_current)
+    assert registry.current() == v1
+
+def test_shadow_loads_off_the_request_thread(tmp_path):
+    registry, (v1, v2) = make_registry(tmp_path, 2)
+    server = make_server(registry)
+    server.serve(v1, FakeModel(v1))
+
+    with pytest.raises(ValueError):
+        server.set_shadow(v2, 0.0)
+    assert server.set_shadow(v2, 0.5, wait=True)
+    assert server.shadow.version == v2 and server.shadow_rate == 0.5
+    assert server.status()["shadow_loading"] is None
+
+@pytest.mark.parametrize("version", ["", ".", "..", "../registry", "a/../..", ".staging-x"])
+def test_registry_rejects_names_outside_its_versions(tmp_path, version):
+    registry, _ = make_registry(tmp_path, 1)
+    (tmp_path / "metadata.json").write_text('{"artifact": "../../etc/passwd"}')
+    with pytest.raises(KeyError):
+        registry.metadata(version)
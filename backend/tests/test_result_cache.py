@@ -0,0 +1,51 @@
+import pytest
+
+flask = pytest.importorskip("flask")
+pytest.importorskip("flask_sqlalchemy")
+
+from database.db import db, init_db
+from utils.result_cache import ResultCache
+
+CLIP = "a" * 64
+OTHER_CLIP = "b" * 64
+
+@pytest.fixture
+def app(tmp_path):
+    app = flask.Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'cache.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+def test_verdicts_are_keyed_by_hash_and_model_version(app):
+    cache = ResultCache()
+    cache.put(CLIP, "v1", 0.9)
+
+    assert cache.get(CLIP, "v1") == 0.9
+    assert cache.get(CLIP, "v2") is None        # A promotion re-scores the same evidence
+    assert cache.get(OTHER_CLIP, "v1") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_versions_of_one_clip_are_cached_side_by_side(app):
+    cache = ResultCache()
+    cache.put(CLIP, "v1", 0.9)
+    cache.put(CLIP, "v2", 0.1)
+    assert cache.get(CLIP, "v1") == 0.9
+    assert cache.get(CLIP, "v2") == 0.1
+
+def test_database_tier_survives_restarts_and_lru_eviction(app):
+    ResultCache().put(CLIP, "v1", 0.25)
+
+    restarted = ResultCache(max_entries=1)  # Empty in-process tier
+    assert restarted.get(CLIP, "v1") == 0.25
+    restarted.put(OTHER_CLIP, "v1", 0.75)   # Evicts CLIP from the LRU
+    assert restarted.get(CLIP, "v1") == 0.25
+    assert restarted.stats()["entries"] == 1
+
+def test_uncommitted_puts_are_visible_after_the_batch_commit(app):
+    cache = ResultCache()
+    cache.put(CLIP, "v1", 0.5, commit=False)
+    db.session.commit()
+    assert ResultCache().get(CLIP, "v1") == 0.5
@@ -0,0 +1,82 @@
+import os
+import importlib
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+pytest.importorskip("matplotlib")
+
+from utils.spectrogram_preview import PreviewCache, PREVIEW_WIDTH, PREVIEW_HEIGHT
+
+CLIP_A = "a" * 64
+CLIP_B = "b" * 64
+
+def mel_db(seed):
+    return (-80.0 * np.random.default_rng(seed).random((128, 130))).astype(np.float32)
+
+def never_decodes(path):
+    raise AssertionError(f"unexpected decode of {path}")
+
+def test_etag_depends_on_id_and_size_only():
+    etag = PreviewCache.etag(CLIP_A, PREVIEW_WIDTH, PREVIEW_HEIGHT)
+    assert etag == PreviewCache.etag(CLIP_A, PREVIEW_WIDTH, PREVIEW_HEIGHT)
+    assert etag != PreviewCache.etag(CLIP_B, PREVIEW_WIDTH, PREVIEW_HEIGHT)
+    assert etag != PreviewCache.etag(CLIP_A, 500, 200)
+
+def test_previews_render_once_from_the_remembered_matrix():
+    cache = PreviewCache(never_decodes)
+    cache.remember(CLIP_A, mel_db(0))
+    cache.remember(CLIP_B, mel_db(1))
+
+    png_a = cache.get(CLIP_A)
+    assert png_a.startswith(b"\x89PNG")
+    assert cache.get(CLIP_A) is png_a
+    assert cache.get(CLIP_B) != png_a
+    assert cache.stats()["hits"] == 1
+    assert cache.get("c" * 64) is None
+
+def test_source_budget_evicts_oldest_matrices_first():
+    one = mel_db(0).astype(np.float16).nbytes
+    cache = PreviewCache(never_decodes, max_source_bytes=2 * one)
+    for i in range(3):
+        cache.remember(f"{i:064d}", mel_db(i))
+    assert not cache.knows(f"{0:064d}")
+    assert cache.knows(f"{1:064d}") and cache.knows(f"{2:064d}")
+    assert cache.stats()["source_bytes"] == 2 * one
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    pytest.importorskip("flask")
+    pytest.importorskip("tensorflow")
+    root = tmp_path_factory.mktemp("server")
+    os.environ.update({
+        "VAANI_UPLOAD_FOLDER": str(root / "uploads"),
+        "VAANI_DATABASE_URI": f"sqlite:///{root / 'vaani.db'}",
+        "VAANI_EVIDENCE_FOLDER": "",
+        "VAANI_FINGERPRINT_INDEX_PATH": "",
+        "VAANI_MODEL_REGISTRY_PATH": str(root / "registry"),
+        "VAANI_MODEL_REGISTRY_POLL_S": "0",
+        "VAANI_JOB_WORKERS": "0",
+        "VAANI_WARMUP": "0",
+    })
+    server = importlib.import_module("app")
+    server.preview_cache.remember(CLIP_A, mel_db(0))
+    return server.app.test_client()
+
+def test_conditional_get_is_answered_with_304(client):
+    first = client.get(f"/spectrogram/{CLIP_A}")
+    assert first.status_code == 200 and first.mimetype == "image/png"
+    etag = first.headers["ETag"].strip('"')
+    assert etag == PreviewCache.etag(CLIP_A, PREVIEW_WIDTH, PREVIEW_HEIGHT)
+
+    again = client.get(f"/spectrogram/{CLIP_A}", headers={"If-None-Match": f'"{etag}"'})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"].strip('"') == etag
+
+    resized = client.get(f"/spectrogram/{CLIP_A}?w=500&h=200", headers={"If-None-Match": f'"{etag}"'})
+    assert resized.status_code == 200
+
+def test_unknown_or_malformed_ids_are_404(client):
+    assert client.get(f"/spectrogram/{CLIP_B}").status_code == 404
+    assert client.get("/spectrogram/not-a-hash").status_code == 404
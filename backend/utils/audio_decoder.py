@@ -0,0 +1,104 @@
+import math
+import threading
+from functools import lru_cache
+import numpy as np
+import soundfile as sf
+import soxr
+
+# Same defaults as librosa.load / melspectrogram / power_to_db, so features match
+N_FFT = 2048
+HOP_LENGTH = 512
+TOP_DB = 80.0
+AMIN = 1e-10
+RESAMPLE_QUALITY = 'HQ'  # librosa's default res_type is 'soxr_hq'
+
+_resamplers = threading.local()
+
+# --- Decode ---
+def _resampler(in_rate, out_rate):
+    """One soxr stream per (in_rate, out_rate) and thread, reused across files."""
+    cache = getattr(_resamplers, "streams", None)
+    if cache is None:
+        cache = _resamplers.streams = {}
+    key = (in_rate, out_rate)
+    if key not in cache:
+        cache[key] = soxr.ResampleStream(in_rate, out_rate, 1, dtype='float32', quality=RESAMPLE_QUALITY)
+    stream = cache[key]
+    stream.clear()
+    return stream
+
+def resample(y, in_rate, out_rate):
+    """soxr resampling, trimmed/padded to ceil(len * ratio) like librosa.resample(fix=True)."""
+    if in_rate == out_rate:
+        return y
+    y_hat = _resampler(in_rate, out_rate).resample_chunk(y, last=True)
+    size = int(math.ceil(len(y) * out_rate / in_rate))
+    if len(y_hat) < size:
+        return np.pad(y_hat, (0, size - len(y_hat)))
+    return y_hat[:size]
+
+def _read_soundfile(source, offset, duration):
+    with sf.SoundFile(source) as f:
+        native_rate = f.samplerate
+        start = int(round(offset * native_rate))
+        if start:
+            f.seek(start)
+        frames = -1 if duration is None else int(duration * native_rate)
+        y = f.read(frames, dtype='float32', always_2d=True)
+    return y.mean(axis=1), native_rate
+
+def decode_audio(source, sr, duration=None, offset=0.0):
+    """
+    Mono float32 samples at sr. Seeks straight to offset and reads only the
+    frames needed when libsndfile can decode the format (wav, flac, ogg, mp3);
+    anything else (m4a) goes through librosa/audioread as before.
+    source is a path or a seekable binary file object.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    try:
+        y, native_rate = _read_soundfile(source, offset, duration)
+    except sf.LibsndfileError:
+        import librosa  # Deferred: heavy (numba) import
+
+        if hasattr(source, "seek"):
+            source.seek(0)
+        y, _ = librosa.load(source, sr=sr, offset=offset, duration=duration)
+        return y
+    return resample(y, native_rate, sr)
+
+# --- Features ---
+@lru_cache(maxsize=16)
+def mel_filterbank(sr, n_fft, n_mels, fmax):
+    import librosa
+    basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmax=fmax).astype(np.float32)
+    basis.setflags(write=False)
+    return basis
+
+@lru_cache(maxsize=16)
+def stft_window(n_fft):
+    """Periodic Hann window (scipy.signal.get_window('hann', n_fft, fftbins=True))."""
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+def power_frames(y, n_fft=N_FFT, hop_length=HOP_LENGTH):
+    """|STFT|^2 of already padded samples, shape (frames, 1 + n_fft // 2)."""
+    count = 1 + (len(y) - n_fft) // hop_length
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop_length][:count]
+    spectrum = np.fft.rfft(frames * stft_window(n_fft), axis=1)
+    return (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+
+def mel_spectrogram(y, sr, n_mels, fmax, n_fft=N_FFT, hop_length=HOP_LENGTH):
+    """
+    librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels, fmax=fmax) with the
+    filterbank and window cached instead of rebuilt on every call.
+    """
+    y = np.pad(np.asarray(y, dtype=np.float32), n_fft // 2)  # stft(center=True), zero padding
+    return mel_filterbank(sr, n_fft, n_mels, fmax) @ power_frames(y, n_fft, hop_length).T
+
+def power_to_db(S, top_db=TOP_DB):
+    """librosa.power_to_db(S, ref=np.max)."""
+    S_dB = 10.0 * np.log10(np.maximum(S, AMIN))
+    S_dB -= 10.0 * np.log10(max(float(np.max(S)), AMIN))
+    return np.maximum(S_dB, S_dB.max() - top_db)
@@ -1,35 +1,140 @@
 import os
-import librosa
-import librosa.display
-import matplotlib
-matplotlib.use('Agg') # Fix for running on server without a monitor
-import matplotlib.pyplot as plt
+from functools import lru_cache
 import numpy as np
+from utils.metrics import timer
+from utils.audio_decoder import decode_audio, mel_spectrogram, power_to_db
+
+# librosa (numba) and matplotlib are imported on first use, not at import time,
+# so the server can start answering health checks before they are loaded.
+
+# --- FEATURE PARAMETERS (must match training) ---
+SAMPLE_RATE = 22050
+DURATION = 3.0
+N_MELS = 128
+FMAX = 8000
+IMG_SIZE = (128, 128)
+
+# Pixel size of the PNG written by generate_spectrogram:
+# figsize=(10, 4) at the default 100 dpi, cropped tight with no padding.
+RENDER_WIDTH = 1000
+RENDER_HEIGHT = 400
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg') # Fix for running on server without a monitor
+    import matplotlib.pyplot as plt
+    return plt
+
+def compute_mel_db(audio_path):
+    """
+    Loads up to DURATION seconds of audio and returns the Mel-spectrogram in dB
+    (shape: N_MELS x frames), exactly as generate_spectrogram computes it.
+    audio_path may also be a seekable binary file object (an in-memory upload).
+    """
+    # 1. Load Audio (Limit to 3 seconds to match training)
+    with timer("decode"):
+        y = decode_audio(audio_path, SAMPLE_RATE, duration=DURATION)
+
+    # 2. Generate Mel Spectrogram
+    with timer("mel"):
+        S = mel_spectrogram(y, SAMPLE_RATE, n_mels=N_MELS, fmax=FMAX)
+        return power_to_db(S)
 
 def generate_spectrogram(audio_path, image_path):
     """
     Generates a Mel-spectrogram from audio, matching Kaggle training settings exactly.
     """
     try:
-        # 1. Load Audio (Limit to 3 seconds to match training)
-        y, sr = librosa.load(audio_path, sr=22050, duration=3.0)
-        
-        # 2. Generate Mel Spectrogram
-        S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmax=8000)
-        S_dB = librosa.power_to_db(S, ref=np.max)
-        
-        # 3. Plot without Axes or Borders (CRITICAL FIX)
-        plt.figure(figsize=(10, 4))
-        librosa.display.specshow(S_dB, sr=sr, fmax=8000)
-        plt.axis('off')             # Hide numbers
-        plt.tight_layout(pad=0)     # Remove padding
-        
-        # 4. Save
-        plt.savefig(image_path, bbox_inches='tight', pad_inches=0)
-        plt.close()
-        
+        import librosa.display
+        plt = _pyplot()
+
+        S_dB = compute_mel_db(audio_path)
+
+        with timer("render"):
+            # 3. Plot without Axes or Borders (CRITICAL FIX)
+            plt.figure(figsize=(10, 4))
+            librosa.display.specshow(S_dB, sr=SAMPLE_RATE, fmax=FMAX)
+            plt.axis('off')             # Hide numbers
+            plt.tight_layout(pad=0)     # Remove padding
+
+            # 4. Save
+            plt.savefig(image_path, bbox_inches='tight', pad_inches=0)
+            plt.close()
+
         return image_path
-        
+
     except Exception as e:
         print(f"Error generating spectrogram: {e}")
-        return None
\ No newline at end of file
+        return None
+
+@lru_cache(maxsize=1)
+def _grayscale_lut():
+    """
+    Grey level (0..1) of each of the 256 'magma' colours specshow paints with,
+    after Agg rounds them to 8-bit RGB and PIL converts the PNG to 'L'.
+    """
+    import matplotlib
+    rgb = matplotlib.colormaps['magma'](np.arange(256))[:, :3]
+    rgb = np.round(rgb * 255).astype(np.int64)
+    # PIL ITU-R 601-2 luma transform in fixed point (same as Image.convert('L'))
+    luma = (rgb[:, 0] * 19595 + rgb[:, 1] * 38470 + rgb[:, 2] * 7471 + 0x8000) >> 16
+    return (luma / 255.0).astype(np.float32)
+
+@lru_cache(maxsize=64)
+def _sampling_grid(n_mels, n_frames):
+    """
+    Maps each pixel of the 128x128 model input back to the (mel bin, frame) cell
+    it shows after the PNG is rendered at RENDER_WIDTH x RENDER_HEIGHT and
+    resized by Keras load_img (nearest neighbour).
+    """
+    out_h, out_w = IMG_SIZE
+
+    # PIL nearest resize: output pixel i reads source pixel floor((i + 0.5) * in / out)
+    src_rows = np.floor((np.arange(out_h) + 0.5) * RENDER_HEIGHT / out_h)
+    src_cols = np.floor((np.arange(out_w) + 0.5) * RENDER_WIDTH / out_w)
+
+    # pcolormesh fills every pixel whose centre lies inside a cell.
+    # Low frequencies are drawn at the bottom, so image row 0 is the highest bin.
+    mel_bins = np.floor((RENDER_HEIGHT - src_rows - 0.5) * n_mels / RENDER_HEIGHT).astype(np.intp)
+    frames = np.floor((src_cols + 0.5) * n_frames / RENDER_WIDTH).astype(np.intp)
+
+    return np.clip(mel_bins, 0, n_mels - 1), np.clip(frames, 0, n_frames - 1)
+
+def spectrogram_to_tensor(S_dB):
+    """
+    Converts a dB Mel-spectrogram straight into the normalized (128, 128, 1) float32
+    array the CRNN expects, reproducing the specshow -> PNG -> load_img pipeline
+    in NumPy (no matplotlib figure, no disk I/O).
+    """
+    S_dB = np.asarray(S_dB, dtype=np.float32)
+    n_mels, n_frames = S_dB.shape
+
+    # 1. Colour normalization (specshow autoscales to the data range)
+    lo, hi = float(S_dB.min()), float(S_dB.max())
+    if hi > lo:
+        norm = (S_dB - lo) / (hi - lo)
+    else:
+        norm = np.zeros_like(S_dB)
+
+    # 2. Colormap quantization (256 levels) -> grey level
+    idx = np.clip((norm * 256).astype(np.intp), 0, 255)
+    gray = _grayscale_lut()[idx]
+
+    # 3. Render + resize geometry
+    mel_bins, frames = _sampling_grid(n_mels, n_frames)
+    img = gray[np.ix_(mel_bins, frames)]
+
+    return img[..., np.newaxis]
+
+def extract_features(audio_path):
+    """
+    In-memory feature extraction: audio file -> (1, 128, 128, 1) model input.
+    Returns None on failure, like generate_spectrogram.
+    """
+    try:
+        S_dB = compute_mel_db(audio_path)
+        with timer("tensor"):
+            return np.expand_dims(spectrogram_to_tensor(S_dB), axis=0)
+    except Exception as e:
+        print(f"Error extracting features: {e}")
+        return None
@@ -1,57 +1,215 @@
 import os
-import shutil
-from utils.audio_processor import generate_spectrogram
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.audio_processor import generate_spectrogram, SAMPLE_RATE, DURATION, N_MELS, FMAX
+from utils.upload_handler import file_sha256
+from utils import metrics
 
 # Define paths
 RAW_DATASET_PATH = "../data_store/dataset"
 PROCESSED_DATASET_PATH = "../data_store/processed_dataset"
+MANIFEST_NAME = "manifest.json"
 
-def process_dataset():
-    """
-    Iterates through the 'real' and 'fake' folders in the raw dataset,
-    converts every audio file to a spectrogram, and saves it in the processed folder.
-    """
-    categories = ['real', 'fake']
-    
-    print(f"🚀 Starting Data Preprocessing...")
-    print(f"   Source: {RAW_DATASET_PATH}")
-    print(f"   Target: {PROCESSED_DATASET_PATH}")
-
-    for category in categories:
-        # 1. Setup paths
-        source_folder = os.path.join(RAW_DATASET_PATH, category)
-        target_folder = os.path.join(PROCESSED_DATASET_PATH, category)
-        
-        # 2. Create target folder if it doesn't exist
-        os.makedirs(target_folder, exist_ok=True)
-        
-        # 3. Get list of files
+CATEGORIES = ['real', 'fake']
+AUDIO_EXTENSIONS = ('.mp3', '.wav')
+DEFAULT_WORKERS = os.cpu_count() or 1
+MANIFEST_SAVE_EVERY = 50  # Checkpoint the manifest so a crash doesn't lose finished work
+
+# Anything that changes the output image invalidates the whole manifest
+FEATURE_PARAMS = {
+    "format": "png-specshow-v1",
+    "sr": SAMPLE_RATE,
+    "duration": DURATION,
+    "n_mels": N_MELS,
+    "fmax": FMAX,
+}
+
+def output_for(key):
+    """Create a matching image path (real/audio.wav -> real/audio_wav.png)"""
+    category, filename = key.split("/", 1)
+    return f"{category}/{filename.replace('.', '_')}.png"
+
+def load_manifest(path):
+    """Returns the manifest dict, or a fresh one if missing/corrupt."""
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: Ignoring unreadable manifest ({e})")
+    return {"feature_params": None, "files": {}}
+
+def save_manifest(manifest, path):
+    """Atomic write: a crash mid-save never leaves a half-written manifest."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def scan_sources(raw_path):
+    """Returns {"category/filename": absolute source path} for every audio file."""
+    sources = {}
+    for category in CATEGORIES:
+        source_folder = os.path.join(raw_path, category)
         if not os.path.exists(source_folder):
             print(f"⚠️ Warning: Source folder not found: {source_folder}")
             continue
-            
-        files = [f for f in os.listdir(source_folder) if f.endswith(('.mp3', '.wav'))]
-        print(f"\n📂 Processing '{category}' category: {len(files)} files found.")
-
-        # 4. Process each file
-        count = 0
-        for filename in files:
-            source_file = os.path.join(source_folder, filename)
-            
-            # Create a matching image filename (audio.wav -> audio_wav.png)
-            image_filename = filename.replace('.', '_') + '.png'
-            target_file = os.path.join(target_folder, image_filename)
-            
-            # Generate!
+        for filename in sorted(os.listdir(source_folder)):
+            if filename.endswith(AUDIO_EXTENSIONS):
+                sources[f"{category}/{filename}"] = os.path.join(source_folder, filename)
+    return sources
+
+def plan_work(sources, manifest, processed_path):
+    """
+    Splits sources into (to_process, unchanged) and returns the keys of removed sources.
+    mtime+size are checked first; the hash is only computed when they differ,
+    so touching a file without changing it doesn't trigger a rebuild.
+    """
+    entries = manifest["files"]
+    to_process, unchanged = [], []
+
+    for key, source_file in sources.items():
+        st = os.stat(source_file)
+        entry = entries.get(key)
+        target_file = os.path.join(processed_path, entry["output"]) if entry else None
+
+        if entry and entry.get("status") == "ok" and os.path.exists(target_file):
+            if entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                unchanged.append(key)
+                continue
+            if entry["size"] == st.st_size and entry["sha256"] == file_sha256(source_file):
+                entry["mtime"] = st.st_mtime
+                unchanged.append(key)
+                continue
+
+        to_process.append(key)
+
+    removed = [key for key in entries if key not in sources]
+    return to_process, unchanged, removed
+
+def process_file(key, source_file, processed_path):
+    """
+    Worker: one audio file -> one spectrogram PNG.
+    Never raises; failures are returned so one bad file can't kill the run.
+    Returns (key, stage timings, manifest entry).
+    """
+    start = time.perf_counter()
+    output = output_for(key)
+    target_file = os.path.join(processed_path, output)
+
+    with metrics.capture() as stages:
+        try:
+            st = os.stat(source_file)
+            with metrics.timer("hash"):
+                digest = file_sha256(source_file)
             result = generate_spectrogram(source_file, target_file)
-            
-            if result:
-                count += 1
-                if count % 10 == 0:
-                    print(f"   - Processed {count}/{len(files)}...")
-        
-        print(f"✅ Finished '{category}': {count} images generated.")
+            status = "ok" if result else "error"
+            error = None if result else "spectrogram generation failed"
+        except Exception as e:
+            st, digest, status, error = None, None, "error", str(e)
+
+    return key, dict(stages), {
+        "output": output,
+        "mtime": st.st_mtime if st else None,
+        "size": st.st_size if st else None,
+        "sha256": digest,
+        "status": status,
+        "error": error,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+def remove_outputs(removed, manifest, processed_path):
+    """Deletes the PNGs of sources that no longer exist."""
+    for key in removed:
+        entry = manifest["files"].pop(key)
+        target_file = os.path.join(processed_path, entry["output"])
+        if os.path.exists(target_file):
+            os.remove(target_file)
+
+def process_dataset(workers=DEFAULT_WORKERS, force=False,
+                    raw_path=RAW_DATASET_PATH, processed_path=PROCESSED_DATASET_PATH):
+    """
+    Converts every audio file in the raw 'real'/'fake' folders to a spectrogram
+    in the processed folder, in parallel, only for new or changed files.
+    """
+    print(f"🚀 Starting Data Preprocessing...")
+    print(f"   Source: {raw_path}")
+    print(f"   Target: {processed_path}")
+    print(f"   Workers: {workers}")
+
+    for category in CATEGORIES:
+        os.makedirs(os.path.join(processed_path, category), exist_ok=True)
+
+    manifest_path = os.path.join(processed_path, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    # 1. Feature parameters changed -> everything is stale
+    if force or manifest.get("feature_params") != FEATURE_PARAMS:
+        if manifest["files"]:
+            print("♻️  Feature parameters changed (or --force): rebuilding all outputs.")
+        for entry in manifest["files"].values():
+            entry["status"] = "stale"
+        manifest["feature_params"] = FEATURE_PARAMS
+
+    # 2. Plan
+    sources = scan_sources(raw_path)
+    to_process, unchanged, removed = plan_work(sources, manifest, processed_path)
+    remove_outputs(removed, manifest, processed_path)
+    print(f"\n📂 {len(sources)} sources: {len(to_process)} to process, "
+          f"{len(unchanged)} unchanged, {len(removed)} removed.")
+
+    # 3. Process in parallel
+    start = time.perf_counter()
+    done, failed = 0, 0
+
+    if to_process:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(process_file, key, sources[key], processed_path): key
+                for key in to_process
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    key, stages, entry = future.result()
+                    metrics.record_stages(stages)
+                except Exception as e:
+                    # Worker process died (e.g. native crash in a decoder)
+                    entry = {"output": output_for(key),
+                             "mtime": None, "size": None, "sha256": None,
+                             "status": "error", "error": f"worker crashed: {e}", "seconds": None}
+
+                manifest["files"][key] = entry
+                done += 1
+                if entry["status"] != "ok":
+                    failed += 1
+                    print(f"   ❌ Failed {key}: {entry['error']}")
+
+                if done % 10 == 0 or done == len(to_process):
+                    elapsed = time.perf_counter() - start
+                    print(f"   - Processed {done}/{len(to_process)} "
+                          f"({done / elapsed:.1f} files/sec)...")
+
+                if done % MANIFEST_SAVE_EVERY == 0:
+                    save_manifest(manifest, manifest_path)
+
+    save_manifest(manifest, manifest_path)
+
+    # 4. Summary
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"\n✅ Finished: {done - failed} images generated, {failed} failed, "
+          f"{len(unchanged)} skipped in {elapsed:.1f}s ({rate:.1f} files/sec).")
+    metrics.print_stage_summary("Per-stage timings (summed across workers)")
+    return manifest
 
 if __name__ == "__main__":
     # This block allows us to run this script directly to prepare data
-    process_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the raw dataset into spectrograms.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of worker processes")
+    parser.add_argument("--force", action="store_true", help="Reprocess every file")
+    args = parser.parse_args()
+
+    process_dataset(workers=args.workers, force=args.force)
@@ -0,0 +1,101 @@
+import os
+import queue
+import atexit
+import shutil
+import tempfile
+import threading
+
+# --- DEFAULTS ---
+EVIDENCE_PATH = "../data_store/evidence"
+QUEUE_SIZE = 256
+COPY_CHUNK = 1024 * 1024
+
+class EvidenceStore:
+    """
+    Content-addressed archive of original uploads: <root>/<sha[:2]>/<sha256>.
+
+    put() hands an upload buffer to a background thread and returns at once,
+    so the request never waits on the (possibly network-attached) volume.
+    Identical uploads map to the same path and are stored once. Files are
+    written to a temporary name and renamed into place, so a reader never sees
+    a partial copy. If the queue is full the caller writes inline rather than
+    dropping evidence.
+    """
+
+    def __init__(self, root=EVIDENCE_PATH, queue_size=QUEUE_SIZE):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "duplicates": 0, "errors": 0, "inline_writes": 0}
+        self._thread = threading.Thread(target=self._run, name="vaani-evidence-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.drain)
+
+    # --- Public API ---
+    def path_for(self, file_hash):
+        return os.path.join(self.root, file_hash[:2], file_hash)
+
+    def put(self, file_hash, buffer):
+        """
+        Queues buffer (a readable, seekable file object) for storage under
+        file_hash. Takes ownership: the buffer is closed once written.
+        Returns the path the evidence will live at.
+        """
+        target = self.path_for(file_hash)
+        if os.path.exists(target):
+            buffer.close()
+            self._count("duplicates")
+            return target
+
+        try:
+            self._queue.put_nowait((target, buffer))
+        except queue.Full:
+            self._count("inline_writes")
+            self._store(target, buffer)
+        return target
+
+    def drain(self):
+        """Blocks until everything queued so far is on disk (called at exit)."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize(), "root": self.root}
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            target, buffer = self._queue.get()
+            try:
+                self._store(target, buffer)
+            finally:
+                self._queue.task_done()
+
+    def _store(self, target, buffer):
+        tmp_path = None
+        try:
+            if os.path.exists(target):
+                self._count("duplicates")
+                return
+            folder = os.path.dirname(target)
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+            with os.fdopen(fd, 'wb') as out:
+                buffer.seek(0)
+                shutil.copyfileobj(buffer, out, COPY_CHUNK)
+            os.replace(tmp_path, target)
+            tmp_path = None
+            self._count("stored")
+        except Exception as e:
+            self._count("errors")
+            print(f"❌ Evidence not persisted: {os.path.basename(target)} ({e})")
+        finally:
+            buffer.close()
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
@@ -0,0 +1,142 @@
+import os
+import json
+import zlib
+import struct
+import hashlib
+import numpy as np
+from utils.audio_processor import compute_mel_db, SAMPLE_RATE, DURATION, N_MELS, FMAX
+from utils.audio_decoder import N_FFT, HOP_LENGTH, TOP_DB
+
+# --- FORMAT ---
+# Compact precomputed features for edge clients: the dB Mel-spectrogram that
+# compute_mel_db / generate_spectrogram produce, as zlib-compressed float16.
+#
+#   header (little endian, 20 bytes)
+#     4s  magic            b"VMEL"
+#     B   format version   PAYLOAD_VERSION
+#     B   flags            bit 0: float16 bytes are shuffled (all low bytes, then all high bytes)
+#     H   n_mels
+#     H   n_frames
+#     H   reserved (0)
+#     I   params id        crc32 of FEATURE_PARAMS (see params_id)
+#     I   raw size         uncompressed byte count (n_mels * n_frames * 2)
+#   body: zlib(float16 matrix, row-major, n_mels x n_frames)
+MAGIC = b"VMEL"
+PAYLOAD_VERSION = 1
+HEADER = struct.Struct("<4sBBHHHII")
+FLAG_SHUFFLED = 0x01
+CONTENT_TYPE = "application/x-vaani-mel"
+COMPRESSION_LEVEL = 9
+
+# Anything that changes the matrix changes the params id, and the server rejects the payload
+FEATURE_PARAMS = {
+    "sr": SAMPLE_RATE,
+    "duration": DURATION,
+    "n_mels": N_MELS,
+    "fmax": FMAX,
+    "n_fft": N_FFT,
+    "hop_length": HOP_LENGTH,
+    "top_db": TOP_DB,
+    "ref": "max",
+}
+MAX_FRAMES = 1 + int(SAMPLE_RATE * DURATION) // HOP_LENGTH
+DB_RANGE = (-200.0, 200.0)  # Anything outside is not a power_to_db output
+
+class PayloadError(ValueError):
+    """The payload is malformed or was computed with other feature parameters."""
+
+def params_id(params=FEATURE_PARAMS):
+    return zlib.crc32(json.dumps(params, sort_keys=True).encode()) & 0xFFFFFFFF
+
+# --- Encode (clients) ---
+def encode_features(S_dB, shuffle=True):
+    """(N_MELS, frames) dB Mel-spectrogram -> payload bytes."""
+    S = np.asarray(S_dB, dtype='<f2')
+    if S.ndim != 2:
+        raise PayloadError(f"Expected a 2-D (n_mels, frames) matrix, got shape {S.shape}")
+    raw = S.tobytes()
+    if shuffle:
+        raw = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 2).T.tobytes()
+    header = HEADER.pack(MAGIC, PAYLOAD_VERSION, FLAG_SHUFFLED if shuffle else 0,
+                         S.shape[0], S.shape[1], 0, params_id(), len(raw))
+    return header + zlib.compress(raw, COMPRESSION_LEVEL)
+
+def encode_audio(audio_path):
+    """Audio file -> payload bytes, computed exactly like the server's /analyze."""
+    return encode_features(compute_mel_db(audio_path))
+
+# --- Decode (server) ---
+def decode_payload(payload):
+    """
+    Payload bytes -> (N_MELS, frames) float32 dB matrix.
+    Raises PayloadError unless version, feature parameters, shape and values check out.
+    """
+    if len(payload) < HEADER.size:
+        raise PayloadError("Payload shorter than its header")
+    magic, version, flags, n_mels, n_frames, _, params, raw_size = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise PayloadError("Not a VAANI feature payload")
+    if version != PAYLOAD_VERSION:
+        raise PayloadError(f"Unsupported payload version {version} (server speaks {PAYLOAD_VERSION})")
+    if params != params_id():
+        raise PayloadError(f"Features computed with other parameters (params id {params:08x}, "
+                           f"expected {params_id():08x}: {FEATURE_PARAMS})")
+    if n_mels != N_MELS or not 1 <= n_frames <= MAX_FRAMES:
+        raise PayloadError(f"Unexpected shape ({n_mels}, {n_frames}), expected ({N_MELS}, 1..{MAX_FRAMES})")
+    if raw_size != n_mels * n_frames * 2:
+        raise PayloadError("Header size does not match its shape")
+
+    decompressor = zlib.decompressobj()
+    try:
+        raw = decompressor.decompress(payload[HEADER.size:], raw_size)  # Bounded: no zip bombs
+    except zlib.error as e:
+        raise PayloadError(f"Corrupt body: {e}")
+    if len(raw) != raw_size or decompressor.unconsumed_tail:
+        raise PayloadError("Body does not match the declared size")
+
+    if flags & FLAG_SHUFFLED:
+        raw = np.frombuffer(raw, dtype=np.uint8).reshape(2, -1).T.tobytes()
+    S = np.frombuffer(raw, dtype='<f2').reshape(n_mels, n_frames).astype(np.float32)
+    if not np.isfinite(S).all() or S.min() < DB_RANGE[0] or S.max() > DB_RANGE[1]:
+        raise PayloadError("Values are not a dB Mel-spectrogram")
+    return S
+
+def payload_sha256(payload):
+    """Hash that keys a feature upload on the server (cache, audit log, fingerprints, preview)."""
+    return hashlib.sha256(payload).hexdigest()
+
+# --- HTTP client ---
+class FeatureClient:
+    """
+    Sends locally computed features to POST /analyze/features instead of the
+    audio file: a few KB per clip instead of megabytes of WAV.
+
+        client = FeatureClient("http://server:5000")
+        report = client.analyze("call.wav")
+    """
+
+    def __init__(self, base_url="http://127.0.0.1:5000", timeout=30.0, session=None):
+        import requests  # Client side only
+
+        self.url = base_url.rstrip("/") + "/analyze/features"
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def analyze_payload(self, payload, filename, audio_sha256=None):
+        """Posts an already encoded payload. Returns the JSON report (raises on HTTP errors)."""
+        headers = {"Content-Type": CONTENT_TYPE, "X-Filename": filename}
+        if audio_sha256:
+            headers["X-Audio-SHA256"] = audio_sha256
+        response = self.session.post(self.url, data=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def analyze(self, audio_path):
+        """
+        Encodes audio_path locally and sends it. The file's SHA-256 goes along
+        as X-Audio-SHA256: audited as the client's claim, next to the payload hash.
+        """
+        from utils.upload_handler import file_sha256
+
+        return self.analyze_payload(encode_audio(audio_path), os.path.basename(audio_path),
+                                    file_sha256(audio_path))
\ No newline at end of file
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.audio_processor import extract_features, SAMPLE_RATE, DURATION, N_MELS, FMAX, IMG_SIZE
+
+# Define paths
+RAW_DATASET_PATH = "../data_store/dataset"
+FEATURE_STORE_PATH = "../data_store/feature_store"
+INDEX_NAME = "index.json"
+
+CLASS_NAMES = ['fake', 'real']  # Keras alphabetical order: 0 = Fake, 1 = Real
+AUDIO_EXTENSIONS = ('.mp3', '.wav')
+SHARD_SIZE = 4096  # 4096 x 128 x 128 x float16 = 128 MB per shard
+VALIDATION_SPLIT = 0.2
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+FEATURE_PARAMS = {
+    "format": "tensor-float16-v1",
+    "sr": SAMPLE_RATE,
+    "duration": DURATION,
+    "n_mels": N_MELS,
+    "fmax": FMAX,
+    "shape": [IMG_SIZE[0], IMG_SIZE[1], 1],
+}
+
+def is_validation(key, validation_split=VALIDATION_SPLIT):
+    """
+    Deterministic split from a stable hash of the file key, so adding files
+    never moves existing ones between train and validation.
+    """
+    return (zlib.crc32(key.encode("utf-8")) % 1000) < validation_split * 1000
+
+def _extract(source_file):
+    """Worker: audio file -> (128, 128, 1) float16, or None on failure."""
+    features = extract_features(source_file)
+    if features is None:
+        return None
+    return features[0].astype(np.float16)
+
+def collect_sources(raw_path=RAW_DATASET_PATH):
+    """[(key, path, label)] of every labelled audio file, in a fixed order."""
+    sources = []
+    for label, category in enumerate(CLASS_NAMES):
+        folder = os.path.join(raw_path, category)
+        if not os.path.exists(folder):
+            print(f"⚠️ Warning: Source folder not found: {folder}")
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if filename.lower().endswith(AUDIO_EXTENSIONS):
+                sources.append((f"{category}/{filename}", os.path.join(folder, filename), label))
+    return sources
+
+def source_signature(sources):
+    """[key, size, mtime_ns] per source: any added, removed or rewritten file changes it."""
+    signature = []
+    for key, path, _ in sources:
+        st = os.stat(path)
+        signature.append([key, st.st_size, st.st_mtime_ns])
+    return signature
+
+def stale_reason(raw_path=RAW_DATASET_PATH, store_path=FEATURE_STORE_PATH):
+    """Why the store at store_path does not reflect raw_path (None if it is current)."""
+    try:
+        with open(os.path.join(store_path, INDEX_NAME)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return "no feature store found"
+    if index.get("feature_params") != FEATURE_PARAMS:
+        return "feature parameters changed"
+    if index.get("sources") != source_signature(collect_sources(raw_path)):
+        return "dataset files were added, removed or modified"
+    return None
+
+def ensure_feature_store(raw_path=RAW_DATASET_PATH, store_path=FEATURE_STORE_PATH, **build_options):
+    """(Re)builds the store unless it was built from exactly the current dataset."""
+    reason = stale_reason(raw_path, store_path)
+    if reason is not None:
+        print(f"📦 Building the feature store ({reason})...")
+        build_feature_store(raw_path=raw_path, store_path=store_path, **build_options)
+
+def _write_shard(store_path, shard_id, items):
+    shard_name = f"shard_{shard_id:05d}.npy"
+    np.save(os.path.join(store_path, shard_name), np.stack(items))
+    return {"file": shard_name, "count": len(items)}
+
+def build_feature_store(raw_path=RAW_DATASET_PATH, store_path=FEATURE_STORE_PATH,
+                        workers=DEFAULT_WORKERS, shard_size=SHARD_SIZE):
+    """
+    Extracts features for every labelled audio file and writes them as
+    sharded float16 .npy arrays plus a label/split index.
+    """
+    print("🚀 Building Feature Store...")
+    print(f"   Source: {raw_path}")
+    print(f"   Target: {store_path}")
+    os.makedirs(store_path, exist_ok=True)
+
+    # 1. Collect sources in a fixed order (the signature is taken before reading,
+    #    so a file changed mid-build makes the store stale rather than silently mixed)
+    sources = collect_sources(raw_path)
+    signature = source_signature(sources)
+
+    # Drop the old index and shards first: a crash mid-build leaves no index, never one over stale shards
+    for name in os.listdir(store_path):
+        if name == INDEX_NAME or (name.startswith("shard_") and name.endswith(".npy")):
+            os.remove(os.path.join(store_path, name))
+
+    # 2. Extract in parallel (executor.map keeps input order)
+    start = time.perf_counter()
+    shards, keys, labels, splits, buffer = [], [], [], [], []
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_extract, [s[1] for s in sources], chunksize=16)
+        for (key, _, label), features in zip(sources, results):
+            if features is None:
+                failed += 1
+                continue
+
+            buffer.append(features)
+            keys.append(key)
+            labels.append(label)
+            splits.append(is_validation(key))
+
+            if len(buffer) == shard_size:
+                shards.append(_write_shard(store_path, len(shards), buffer))
+                buffer = []
+                print(f"   - {len(keys)}/{len(sources)} stored "
+                      f"({len(keys) / (time.perf_counter() - start):.1f} files/sec)...")
+
+    if buffer:
+        shards.append(_write_shard(store_path, len(shards), buffer))
+
+    # 3. Index
+    np.save(os.path.join(store_path, "labels.npy"), np.asarray(labels, dtype=np.int8))
+    np.save(os.path.join(store_path, "is_validation.npy"), np.asarray(splits, dtype=bool))
+    index = {
+        "feature_params": FEATURE_PARAMS,
+        "class_names": CLASS_NAMES,
+        "shard_size": shard_size,
+        "shards": shards,
+        "keys": keys,
+        "sources": signature,
+    }
+    with open(os.path.join(store_path, INDEX_NAME), "w") as f:
+        json.dump(index, f, indent=1)
+
+    print(f"✅ Stored {len(keys)} feature tensors in {len(shards)} shards "
+          f"({failed} failed) in {time.perf_counter() - start:.1f}s.")
+    return index
+
+class FeatureStore:
+    """Read-only, memory-mapped view over a feature store directory."""
+
+    def __init__(self, store_path=FEATURE_STORE_PATH):
+        with open(os.path.join(store_path, INDEX_NAME)) as f:
+            self.index = json.load(f)
+        if self.index["feature_params"] != FEATURE_PARAMS:
+            raise ValueError("Feature store was built with different feature parameters; rebuild it.")
+
+        self.shard_size = self.index["shard_size"]
+        self.shards = [np.load(os.path.join(store_path, s["file"]), mmap_mode='r')
+                       for s in self.index["shards"]]
+        self.labels = np.load(os.path.join(store_path, "labels.npy"))
+        self.is_validation = np.load(os.path.join(store_path, "is_validation.npy"))
+        self.keys = self.index["keys"]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def positions(self, subset):
+        """Global row numbers of 'training' or 'validation', in store order."""
+        mask = self.is_validation if subset == 'validation' else ~self.is_validation
+        return np.flatnonzero(mask)
+
+    def get(self, position):
+        shard_id, row = divmod(int(position), self.shard_size)
+        return self.shards[shard_id][row]
+
+def make_dataset(store, subset, batch_size, shuffle=False, shuffle_buffer=2048,
+                 cache=False, seed=42):
+    """
+    tf.data pipeline over a FeatureStore: parallel memmap reads, shuffle
+    buffer, batching and prefetch. cache=True keeps the decoded float32
+    subset in RAM after the first epoch (only for stores that fit in memory;
+    by default reads stay memory-mapped).
+    With shuffle=False the order is the store order, so
+    store.labels[store.positions(subset)] lines up with predictions.
+    """
+    import tensorflow as tf  # Deferred: the builder's worker processes never need TF
+
+    positions = store.positions(subset)
+    labels = store.labels[positions].astype(np.float32)
+    feature_shape = tuple(FEATURE_PARAMS["shape"])
+
+    def load(position):
+        return store.get(position).astype(np.float32)
+
+    def tf_load(position, label):
+        features = tf.numpy_function(load, [position], tf.float32)
+        features.set_shape(feature_shape)
+        return features, label
+
+    ds = tf.data.Dataset.from_tensor_slices((positions, labels))
+    ds = ds.map(tf_load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    if cache:
+        ds = ds.cache()
+    if shuffle:
+        ds = ds.shuffle(min(shuffle_buffer, max(len(positions), 1)), seed=seed,
+                        reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped training feature store.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of worker processes")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Tensors per shard file")
+    args = parser.parse_args()
+
+    build_feature_store(workers=args.workers, shard_size=args.shard_size)
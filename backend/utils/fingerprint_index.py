@@ -0,0 +1,259 @@
+import os
+import json
+import atexit
+import threading
+import numpy as np
+
+# --- DEFAULTS ---
+FINGERPRINT_PATH = "../data_store/fingerprints"
+FINGERPRINT_VERSION = "mel-grid-v2"  # Changing the descriptor invalidates an existing index
+GRID_BANDS = 16          # Descriptor grid: mel bands...
+GRID_SEGMENTS = 16       # ...x time segments of the 128 x 128 model input
+PROFILE_WEIGHT = 0.5     # Share of the static band profile next to the time contours
+DESCRIPTOR_SIZE = GRID_BANDS * GRID_SEGMENTS + GRID_BANDS
+DIMS = 128               # Embedding size = SimHash bits
+BANDS = 8                # LSH tables, 16 bits each
+BAND_BITS = DIMS // BANDS
+MIN_SIMILARITY = 0.97    # Cosine similarity that counts as "the same recording"
+INITIAL_CAPACITY = 1 << 16
+FLUSH_EVERY = 256        # Inserts between metadata checkpoints
+COMPACT_EVERY = 1 << 16  # Unindexed inserts that trigger a background compaction
+PROJECTION_SEED = 20240601
+
+# On-disk layout (raw arrays are memory-mapped, grown by doubling)
+META_NAME = "meta.json"
+PROJECTION_NAME = "projection.npy"
+EMBEDDINGS_NAME = "embeddings.f16"   # (capacity, DIMS) float16
+KEYS_NAME = "keys.u16"               # (capacity, BANDS) uint16 band hashes
+HASHES_NAME = "hashes.u8"            # (capacity, 32) SHA-256 of the clip
+ORDER_NAME = "order.npy"             # (BANDS, compacted) entry ids sorted by band key
+OFFSETS_NAME = "offsets.npy"         # (BANDS, 2**BAND_BITS + 1) bucket starts in ORDER
+
+def _unit(v):
+    v = v - v.mean()
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+def descriptor(tensor):
+    """
+    Perceptual summary of a (…, 128, 128, 1) model input, in time order: the
+    level of GRID_BANDS mel bands over GRID_SEGMENTS time segments, each band
+    as its contour around its own mean, plus the static band profile at a
+    lower weight. Block means survive re-encoding and resampling; the
+    per-clip normalization done by spectrogram_to_tensor already removes gain
+    changes. Reversed or reshuffled audio has different contours, so it does
+    not match the original.
+    """
+    image = np.asarray(tensor, dtype=np.float32).reshape(tensor.shape[-3], tensor.shape[-2])
+    rows, cols = image.shape
+    grid = image.reshape(GRID_BANDS, rows // GRID_BANDS, GRID_SEGMENTS, cols // GRID_SEGMENTS).mean(axis=(1, 3))
+    contours = _unit((grid - grid.mean(axis=1, keepdims=True)).ravel())
+    profile = _unit(grid.mean(axis=1)) * PROFILE_WEIGHT
+    d = np.concatenate([contours, profile])
+    return d / max(float(np.linalg.norm(d)), 1e-12)
+
+class FingerprintIndex:
+    """
+    Near-duplicate lookup over every clip the server has adjudicated. A match
+    only annotates a report: every upload is still scored by the model.
+
+    A clip's descriptor is randomly projected to a DIMS-dim unit embedding
+    (float16, kept for exact re-scoring). The embedding's sign bits are a
+    SimHash, cut into BANDS keys of BAND_BITS bits: a near duplicate agrees
+    with the original on at least one key with high probability, so only the
+    entries in those buckets are compared.
+
+    Buckets live in a CSR layout per band (entry ids sorted by key + bucket
+    offsets), saved as .npy and memory-mapped on startup, so a million-entry
+    index opens instantly and costs page cache rather than heap. Inserts go
+    to the memory-mapped arrays plus a small in-memory delta; once the delta
+    reaches COMPACT_EVERY entries a background thread rebuilds the CSR
+    arrays and swaps them in. Lookups and inserts stay O(bucket size).
+
+    One process should own an index directory (it is not shared-writer safe).
+    """
+
+    def __init__(self, root=FINGERPRINT_PATH, min_similarity=MIN_SIMILARITY):
+        self.root = root
+        self.min_similarity = min_similarity
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._since_flush = 0
+        self._stats = {"lookups": 0, "matches": 0, "inserts": 0, "compactions": 0}
+
+        meta = self._read_meta()
+        if meta and meta.get("version") == FINGERPRINT_VERSION and meta.get("dims") == DIMS:
+            self.count, self.capacity = meta["count"], meta["capacity"]
+            self._compacted = meta["compacted"]
+            self._projection = np.load(os.path.join(root, PROJECTION_NAME))
+        else:
+            if meta:
+                print(f"⚠️ Fingerprint index {root} was built with other parameters, starting over")
+            self.count, self.capacity, self._compacted = 0, INITIAL_CAPACITY, 0
+            self._projection = np.random.default_rng(PROJECTION_SEED).standard_normal(
+                (DESCRIPTOR_SIZE, DIMS)).astype(np.float32)
+            np.save(os.path.join(root, PROJECTION_NAME), self._projection)
+            for name in (EMBEDDINGS_NAME, KEYS_NAME, HASHES_NAME, ORDER_NAME, OFFSETS_NAME):
+                if os.path.exists(os.path.join(root, name)):
+                    os.remove(os.path.join(root, name))
+
+        self._open_arrays()
+        self._load_buckets()
+        atexit.register(self.flush)
+
+    # --- Storage ---
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path(META_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _open_arrays(self):
+        def mapped(name, dtype, width):
+            path = self._path(name)
+            size = self.capacity * width * np.dtype(dtype).itemsize
+            with open(path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            return np.memmap(path, dtype=dtype, mode="r+", shape=(self.capacity, width))
+
+        self._embeddings = mapped(EMBEDDINGS_NAME, np.float16, DIMS)
+        self._keys = mapped(KEYS_NAME, np.uint16, BANDS)
+        self._hashes = mapped(HASHES_NAME, np.uint8, 32)
+
+    def _grow(self):
+        for array in (self._embeddings, self._keys, self._hashes):
+            array.flush()
+        self.capacity *= 2
+        self._open_arrays()
+
+    def _load_buckets(self):
+        """Memory-maps the compacted CSR buckets and re-indexes the tail into the delta."""
+        if self._compacted and os.path.exists(self._path(ORDER_NAME)):
+            self._order = np.load(self._path(ORDER_NAME), mmap_mode="r")
+            self._offsets = np.load(self._path(OFFSETS_NAME), mmap_mode="r")
+        else:
+            self._compacted = 0
+            self._order = self._offsets = None
+        self._delta = [dict() for _ in range(BANDS)]
+        for entry in range(self._compacted, self.count):
+            self._add_to_delta(entry, self._keys[entry])
+
+    def _add_to_delta(self, entry, keys):
+        for band, key in enumerate(keys):
+            self._delta[band].setdefault(int(key), []).append(entry)
+
+    def flush(self):
+        """Persists the arrays and the entry count (atomic metadata replace)."""
+        with self._lock:
+            for array in (self._embeddings, self._keys, self._hashes):
+                array.flush()
+            meta = {"version": FINGERPRINT_VERSION, "dims": DIMS, "bands": BANDS,
+                    "count": self.count, "capacity": self.capacity, "compacted": self._compacted}
+            tmp_path = self._path(META_NAME + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._path(META_NAME))
+            self._since_flush = 0
+
+    # --- Fingerprints ---
+    def embed(self, tensor):
+        """(unit float32 embedding, band keys) of a model input tensor."""
+        e = descriptor(tensor) @ self._projection
+        e /= max(float(np.linalg.norm(e)), 1e-12)
+        bits = (e > 0).reshape(BANDS, BAND_BITS)
+        keys = (bits * (1 << np.arange(BAND_BITS, dtype=np.uint32))).sum(axis=1).astype(np.uint16)
+        return e, keys
+
+    # --- Lookup / insert ---
+    def search(self, tensor):
+        """
+        Nearest previously indexed clip: (file_hash, similarity) when it is at
+        least min_similarity, else None.
+        """
+        embedding, keys = self.embed(tensor)
+        with self._lock:
+            self._stats["lookups"] += 1
+            candidates = self._candidates(keys)
+            if len(candidates) == 0:
+                return None
+            similarity = self._embeddings[candidates].astype(np.float32) @ embedding
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.min_similarity:
+                return None
+            self._stats["matches"] += 1
+            return bytes(self._hashes[candidates[best]]).hex(), round(float(similarity[best]), 4)
+
+    def _candidates(self, keys):
+        found = []
+        for band, key in enumerate(keys):
+            key = int(key)
+            if self._order is not None:
+                start, end = self._offsets[band, key], self._offsets[band, key + 1]
+                if end > start:
+                    found.append(self._order[band, start:end])
+            bucket = self._delta[band].get(key)
+            if bucket:
+                found.append(np.asarray(bucket))
+        return np.unique(np.concatenate(found)) if found else found
+
+    def add(self, tensor, file_hash):
+        """Indexes an adjudicated clip under its SHA-256."""
+        embedding, keys = self.embed(tensor)
+        with self._lock:
+            if self.count == self.capacity:
+                self._grow()
+            entry = self.count
+            self._embeddings[entry] = embedding
+            self._keys[entry] = keys
+            self._hashes[entry] = np.frombuffer(bytes.fromhex(file_hash), dtype=np.uint8)
+            self.count += 1
+            self._add_to_delta(entry, keys)
+            self._stats["inserts"] += 1
+
+            self._since_flush += 1
+            if self._since_flush >= FLUSH_EVERY:
+                self.flush()
+            if self.count - self._compacted >= COMPACT_EVERY and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self._compact, args=(self.count,),
+                                 name="vaani-fingerprint-compactor", daemon=True).start()
+
+    # --- Compaction ---
+    def _compact(self, upto):
+        """Rebuilds the CSR buckets for entries [0, upto) off the request path."""
+        try:
+            keys = np.asarray(self._keys[:upto])
+            order = np.argsort(keys, axis=0, kind="stable").T.astype(np.int32)
+            offsets = np.zeros((BANDS, (1 << BAND_BITS) + 1), dtype=np.int64)
+            for band in range(BANDS):
+                offsets[band, 1:] = np.cumsum(np.bincount(keys[:, band], minlength=1 << BAND_BITS))
+
+            for name, array in ((ORDER_NAME, order), (OFFSETS_NAME, offsets)):
+                tmp_path = self._path(name + ".tmp.npy")
+                np.save(tmp_path, array)
+                os.replace(tmp_path, self._path(name))
+
+            with self._lock:
+                self._order = np.load(self._path(ORDER_NAME), mmap_mode="r")
+                self._offsets = np.load(self._path(OFFSETS_NAME), mmap_mode="r")
+                self._compacted = upto
+                self._delta = [dict() for _ in range(BANDS)]
+                for entry in range(upto, self.count):
+                    self._add_to_delta(entry, self._keys[entry])
+                self._stats["compactions"] += 1
+                self.flush()
+        except Exception as e:
+            print(f"⚠️ Fingerprint index compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def stats(self):
+        with self._lock:
+            return {"entries": self.count, "compacted": self._compacted,
+                    "min_similarity": self.min_similarity, **self._stats}
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+# --- DEFAULTS ---
+MAX_BATCH_SIZE = 16
+MAX_WAIT_MS = 10
+MAX_QUEUE_SIZE = 256
+
+class QueueFullError(Exception):
+    """Raised when the batcher cannot accept more work (backpressure)."""
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a Keras model.
+
+    Request threads call predict() with their own (1, 128, 128, 1) tensor.
+    A single worker thread collects whatever is queued (up to max_batch_size,
+    waiting at most max_wait_ms after the first item), runs ONE forward pass
+    and hands every caller back its own score.
+
+    Callers may pin the model a tensor is scored with (model=...): during a
+    hot swap, requests that started on the old version finish on it, and a
+    batch that straddles the swap runs one forward pass per model.
+    """
+
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 max_queue_size=MAX_QUEUE_SIZE):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "rejected": 0,
+            "batches": 0,
+            "errors": 0,
+            "batch_size_histogram": {},
+        }
+        self._worker = threading.Thread(target=self._run, name="vaani-batcher", daemon=True)
+        self._worker.start()
+
+    # --- Public API ---
+    def set_model(self, model):
+        """Attaches (or replaces) the model used for the next batch."""
+        self.model = model
+
+    def submit(self, tensor, model=None):
+        """Queues one tensor and returns a Future resolving to its raw score."""
+        future = Future()
+        try:
+            self._queue.put_nowait((tensor, future, model or self.model))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise QueueFullError("Inference queue is full")
+        with self._lock:
+            self._stats["requests"] += 1
+        return future
+
+    def predict(self, tensor, timeout=None, model=None):
+        """Blocking helper: returns the model's score for a single tensor."""
+        return self.submit(tensor, model).result(timeout=timeout)
+
+    def predict_batch(self, tensors, timeout=None, model=None):
+        """
+        Scores an (N, 128, 128, 1) array. Rows are queued individually so they
+        share forward passes with concurrent single-file requests.
+        """
+        futures = [self.submit(tensors[i:i + 1], model) for i in range(len(tensors))]
+        return np.array([f.result(timeout=timeout) for f in futures], dtype=np.float32)
+
+    def stats(self):
+        """Snapshot of queue depth and batching behaviour."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["batch_size_histogram"] = dict(self._stats["batch_size_histogram"])
+        snapshot["queue_depth"] = self._queue.qsize()
+        snapshot["max_queue_size"] = self._queue.maxsize
+        snapshot["max_batch_size"] = self.max_batch_size
+        snapshot["max_wait_ms"] = self.max_wait * 1000.0
+        return snapshot
+
+    # --- Worker ---
+    def _collect(self):
+        """Blocks for the first item, then drains until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Normally one group; two while a hot swap is in progress
+            groups = {}
+            for tensor, future, model in batch:
+                groups.setdefault(id(model), (model, [], []))
+                groups[id(model)][1].append(tensor)
+                groups[id(model)][2].append(future)
+
+            for model, tensors, futures in groups.values():
+                try:
+                    if model is None:
+                        raise RuntimeError("Model not loaded yet")
+                    scores = model.predict(np.concatenate(tensors, axis=0), verbose=0)
+                    for future, score in zip(futures, scores):
+                        future.set_result(float(score[0]))
+                except Exception as e:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    for future in futures:
+                        future.set_exception(e)
+
+            with self._lock:
+                self._stats["batches"] += 1
+                histogram = self._stats["batch_size_histogram"]
+                histogram[len(batch)] = histogram.get(len(batch), 0) + 1
@@ -0,0 +1,187 @@
+import json
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from database.db import db
+from database.models import AnalysisJob
+from utils.inference_engine import QueueFullError
+
+# --- DEFAULTS ---
+WORKERS = 2
+LANES = ('interactive', 'bulk')  # Checked in this order
+PROGRESS_MIN_STEP = 0.05         # Don't commit progress updates more often than every 5 %
+RETRY_BACKOFF_S = 0.5            # First wait before re-running a job the inference queue turned away...
+RETRY_BACKOFF_MAX_S = 30.0       # ...doubling up to this
+
+class JobManager:
+    """
+    Bounded local worker pool for heavy analyses, with persisted job state.
+
+    Two priority lanes: workers always take 'interactive' jobs first, and at
+    most bulk_max_running workers may run 'bulk' jobs at the same time, so
+    single-file requests are never stuck behind a large bulk submission.
+
+    handlers: {kind: callable(job, report_progress) -> result dict}
+              Called inside an app context; report_progress(fraction) is optional.
+
+    A handler that hits inference backpressure (QueueFullError) does not fail
+    its job: the job goes back to 'queued' and is re-scheduled in its lane
+    after an exponential backoff.
+
+    One server process should own the pool (set workers=0 elsewhere): on start
+    it re-queues every job still marked queued/running.
+    """
+
+    def __init__(self, app, handlers, workers=WORKERS, bulk_max_running=None):
+        self.app = app
+        self.handlers = handlers
+        self.workers = workers
+        self.bulk_max_running = bulk_max_running or max(1, workers - 1)
+        self._queues = {lane: deque() for lane in LANES}
+        self._bulk_running = 0
+        self._retries = {}  # job_id -> backpressure retries so far
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # --- Lifecycle ---
+    def start(self):
+        """Re-queues jobs left over from a previous run, then starts the workers."""
+        with self.app.app_context():
+            pending = (AnalysisJob.query
+                       .filter(AnalysisJob.status.in_(('queued', 'running')))
+                       .order_by(AnalysisJob.created_at)
+                       .all())
+            for job in pending:
+                job.status = 'queued'
+                job.progress = 0.0
+                job.started_at = None
+            db.session.commit()
+            recovered = [(job.job_id, job.lane) for job in pending]
+
+        with self._cond:
+            for job_id, lane in recovered:
+                self._queues[lane if lane in self._queues else 'bulk'].append(job_id)
+
+        if recovered:
+            print(f"♻️  Recovered {len(recovered)} unfinished jobs.")
+
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"vaani-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    # --- Public API ---
+    def submit(self, job):
+        """Persists a new AnalysisJob (status 'queued') and schedules it."""
+        if job.kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        if job.lane not in self._queues:
+            raise ValueError(f"Unknown priority lane: {job.lane}")
+
+        job.status = 'queued'
+        job.progress = 0.0
+        db.session.add(job)
+        db.session.commit()
+
+        with self._cond:
+            self._queues[job.lane].append(job.job_id)
+            self._cond.notify()
+        return job
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": {lane: len(q) for lane, q in self._queues.items()},
+                "backing_off": len(self._retries),
+                "bulk_running": self._bulk_running,
+                "bulk_max_running": self.bulk_max_running,
+            }
+
+    # --- Worker ---
+    def _next_job(self):
+        """Blocks until a job is runnable; returns (job_id, lane)."""
+        with self._cond:
+            while True:
+                if self._queues['interactive']:
+                    return self._queues['interactive'].popleft(), 'interactive'
+                if self._queues['bulk'] and self._bulk_running < self.bulk_max_running:
+                    self._bulk_running += 1
+                    return self._queues['bulk'].popleft(), 'bulk'
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            job_id, lane = self._next_job()
+            try:
+                with self.app.app_context():
+                    self._execute(job_id, lane)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                if lane == 'bulk':
+                    with self._cond:
+                        self._bulk_running -= 1
+                        self._cond.notify_all()
+
+    def _requeue(self, job_id, lane):
+        with self._cond:
+            self._queues[lane].append(job_id)
+            self._cond.notify()
+
+    def _retry_later(self, job_id, lane):
+        """Puts a job turned away by backpressure back in 'queued' and re-schedules it after a backoff."""
+        db.session.rollback()
+        job = db.session.get(AnalysisJob, job_id)
+        job.status = 'queued'
+        job.progress = 0.0
+        job.started_at = None
+        db.session.commit()
+
+        with self._cond:
+            retries = self._retries.get(job_id, 0)
+            self._retries[job_id] = retries + 1
+        delay = min(RETRY_BACKOFF_S * (2 ** retries), RETRY_BACKOFF_MAX_S)
+        timer = threading.Timer(delay, self._requeue, args=(job_id, lane))
+        timer.daemon = True
+        timer.start()
+
+    def _execute(self, job_id, lane):
+        # Atomic claim: a job is only ever run once, even if another process recovered it too
+        claimed = (AnalysisJob.query
+                   .filter_by(job_id=job_id, status='queued')
+                   .update({"status": 'running', "started_at": datetime.utcnow()}))
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(AnalysisJob, job_id)
+
+        last = {"progress": 0.0}
+
+        def report_progress(fraction):
+            fraction = min(max(float(fraction), 0.0), 1.0)
+            if fraction - last["progress"] >= PROGRESS_MIN_STEP:
+                last["progress"] = fraction
+                job.progress = fraction
+                db.session.commit()
+
+        try:
+            result = self.handlers[job.kind](job, report_progress)
+            job.result = json.dumps(result)
+            job.status = 'done'
+            job.progress = 1.0
+        except QueueFullError:
+            self._retry_later(job_id, lane)
+            return
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(AnalysisJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            print(f"❌ Job {job_id} failed: {e}")
+
+        with self._cond:
+            self._retries.pop(job_id, None)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
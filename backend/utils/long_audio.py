@@ -0,0 +1,188 @@
+import numpy as np
+import soundfile as sf
+import soxr
+from utils.metrics import timer
+from utils.audio_processor import spectrogram_to_tensor, SAMPLE_RATE, DURATION, N_MELS, FMAX
+from utils.audio_decoder import mel_spectrogram, power_to_db
+
+# --- DEFAULTS ---
+WINDOW_SECONDS = DURATION   # Same 3 s context the CRNN was trained on
+HOP_SECONDS = 1.5
+MAX_WINDOWS = 2000
+WINDOW_BATCH = 32
+BLOCK_SECONDS = 10.0         # Decode granularity (bounded memory)
+
+def _stream_soundfile(audio_path, block_seconds):
+    """Yields mono float32 blocks at SAMPLE_RATE, resampling on the fly with soxr."""
+    info = sf.info(audio_path)
+    blocksize = max(1, int(block_seconds * info.samplerate))
+    resampler = None
+    if info.samplerate != SAMPLE_RATE:
+        resampler = soxr.ResampleStream(info.samplerate, SAMPLE_RATE, 1, dtype='float32')
+
+    for block in sf.blocks(audio_path, blocksize=blocksize, dtype='float32', always_2d=True):
+        mono = block.mean(axis=1)
+        yield resampler.resample_chunk(mono) if resampler else mono
+
+    if resampler:
+        yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+def _stream_fallback(audio_path, block_seconds, max_seconds):
+    """Formats soundfile can't read (e.g. m4a): decode once, capped to what the windows can use."""
+    import librosa  # Deferred: heavy (numba) import
+
+    y, _ = librosa.load(audio_path, sr=SAMPLE_RATE, duration=max_seconds)
+    block = int(block_seconds * SAMPLE_RATE)
+    for i in range(0, len(y), block):
+        yield y[i:i + block]
+
+def stream_audio(audio_path, block_seconds=BLOCK_SECONDS, max_seconds=None):
+    """Mono float32 blocks at SAMPLE_RATE, never holding the whole file in memory."""
+    try:
+        sf.info(audio_path)
+    except Exception:
+        return _stream_fallback(audio_path, block_seconds, max_seconds)
+    return _stream_soundfile(audio_path, block_seconds)
+
+def iter_windows(audio_path, hop_seconds=HOP_SECONDS, max_windows=MAX_WINDOWS, coverage=None):
+    """
+    Cuts the audio into overlapping WINDOW_SECONDS windows every hop_seconds,
+    plus one last window aligned to the end of the clip when the hops leave
+    audio unscored. Yields (start_seconds, samples). Only one window + one
+    decode block live at a time.
+    coverage: optional dict, filled in once the generator is exhausted with
+    "truncated" (max_windows stopped it before the end of the audio) and
+    "seconds" (audio decoded; a lower bound when truncated).
+    """
+    window = int(WINDOW_SECONDS * SAMPLE_RATE)
+    hop = max(1, int(hop_seconds * SAMPLE_RATE))
+    # One hop past the last window the cap allows: enough to tell "fits exactly" from "cut short"
+    max_seconds = WINDOW_SECONDS + hop_seconds * max_windows
+    coverage = {} if coverage is None else coverage
+    coverage.update(truncated=False, seconds=0.0)
+
+    buffer = np.zeros(0, dtype=np.float32)
+    last = None       # Last window yielded...
+    last_start = 0    # ...and its first sample
+    consumed = 0      # Samples dropped from the front of the buffer so far
+    pending_skip = 0  # Rest of a hop longer than what was buffered: dropped from the next blocks
+    emitted = 0
+
+    for block in stream_audio(audio_path, max_seconds=max_seconds):
+        buffer = np.concatenate([buffer, block])
+        if pending_skip:
+            drop = min(pending_skip, len(buffer))
+            buffer = buffer[drop:]
+            consumed += drop
+            pending_skip -= drop
+            if pending_skip:
+                continue
+        while len(buffer) >= window:
+            if emitted >= max_windows:
+                coverage.update(truncated=True, seconds=(consumed + len(buffer)) / SAMPLE_RATE)
+                return
+            last, last_start = buffer[:window], consumed
+            yield consumed / SAMPLE_RATE, last
+            emitted += 1
+            drop = min(hop, len(buffer))
+            buffer = buffer[drop:]
+            consumed += drop
+            pending_skip = hop - drop
+
+    total = consumed + len(buffer)
+    coverage["seconds"] = total / SAMPLE_RATE
+
+    # Clip shorter than one window: score what there is, like the 3 s pipeline does
+    if emitted == 0:
+        if len(buffer) > 0:
+            yield 0.0, buffer
+        return
+
+    # Audio after the last full hop: one more window, ending exactly at the end of the clip
+    # (hops longer than a window skip audio on purpose, so there is no tail to cover)
+    if total > last_start + window and hop <= window:
+        if emitted >= max_windows:
+            coverage["truncated"] = True
+            return
+        yield (total - window) / SAMPLE_RATE, np.concatenate([last[:hop], buffer])[-window:]
+
+def estimate_window_count(audio_path, hop_seconds=HOP_SECONDS, max_windows=MAX_WINDOWS):
+    """Expected number of windows (for progress reporting), or None if the duration is unknown."""
+    try:
+        duration = sf.info(audio_path).duration
+    except Exception:
+        return None
+    hops = max(0, int((duration - WINDOW_SECONDS) // hop_seconds))
+    tail = duration - WINDOW_SECONDS - hops * hop_seconds > 1.0 / SAMPLE_RATE
+    return min(1 + hops + int(tail), max_windows)
+
+def window_tensor(samples):
+    """Same features as extract_features, for an in-memory window."""
+    with timer("mel"):
+        S_dB = power_to_db(mel_spectrogram(samples, SAMPLE_RATE, n_mels=N_MELS, fmax=FMAX))
+    with timer("tensor"):
+        return spectrogram_to_tensor(S_dB)
+
+def suspicious_segments(windows, threshold=0.5):
+    """Merges consecutive/overlapping windows scored as Synthetic into time segments."""
+    segments = []
+    for w in windows:
+        if w["score"] > threshold:
+            continue
+        if segments and w["start"] <= segments[-1]["end"]:
+            seg = segments[-1]
+            seg["end"] = max(seg["end"], w["end"])
+            seg["min_score"] = min(seg["min_score"], w["score"])
+            seg["windows"] += 1
+        else:
+            segments.append({"start": w["start"], "end": w["end"],
+                             "min_score": w["score"], "windows": 1})
+    return segments
+
+def analyze_long_audio(audio_path, predict_batch, hop_seconds=HOP_SECONDS,
+                       max_windows=MAX_WINDOWS, batch_size=WINDOW_BATCH, on_progress=None):
+    """
+    Scores every window of a long recording.
+    predict_batch: callable (N, 128, 128, 1) float32 -> N raw scores.
+    on_progress: optional callable(windows_done) after every batch.
+    Returns per-window scores, a timeline of suspicious segments and an aggregate verdict.
+    """
+    windows, starts, tensors = [], [], []
+    coverage = {}
+
+    def flush():
+        scores = predict_batch(np.stack(tensors))
+        for start, score in zip(starts, scores):
+            windows.append({"start": round(start, 3),
+                            "end": round(start + WINDOW_SECONDS, 3),
+                            "score": round(float(score), 4)})
+        starts.clear()
+        tensors.clear()
+        if on_progress:
+            on_progress(len(windows))
+
+    for start, samples in iter_windows(audio_path, hop_seconds, max_windows, coverage):
+        starts.append(start)
+        tensors.append(window_tensor(samples))
+        if len(tensors) == batch_size:
+            flush()
+    if tensors:
+        flush()
+
+    if not windows:
+        raise ValueError("No audio could be decoded")
+
+    scores = np.array([w["score"] for w in windows])
+    mean_score = float(scores.mean())
+    return {
+        "windows": windows,
+        "segments": suspicious_segments(windows),
+        "aggregate": {
+            "mean_score": round(mean_score, 4),
+            "min_score": round(float(scores.min()), 4),
+            "synthetic_ratio": round(float((scores <= 0.5).mean()), 4),
+            "window_count": len(windows),
+            "truncated": coverage["truncated"],
+            "seconds_decoded": round(coverage["seconds"], 3),
+        },
+    }
@@ -0,0 +1,190 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Latency buckets (seconds): 1 ms .. 60 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage timings of the current request / task, when someone is capturing them
+_capture = ContextVar("vaani_stage_capture", default=None)
+_capture_lock = threading.Lock()  # Pool threads running in a copied context share the same dict
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=None):
+    items = list(key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Gauge:
+    """Value read from a callback at scrape time (e.g. queue depth)."""
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {float(self.callback())}")
+        except Exception:
+            pass
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        """{label key: (sum, count)} for quick summaries."""
+        with self._lock:
+            return {key: (series[-2], series[-1]) for key, series in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# --- Pipeline metrics ---
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "vaani_stage_seconds", "Time spent in each pipeline stage."))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "vaani_request_seconds", "End-to-end HTTP request latency."))
+REQUESTS = REGISTRY.register(Counter(
+    "vaani_requests_total", "HTTP requests handled."))
+ERRORS = REGISTRY.register(Counter(
+    "vaani_errors_total", "Failed requests / pipeline errors."))
+REJECTED = REGISTRY.register(Counter(
+    "vaani_rejected_total", "Requests / files turned away by backpressure or startup (503), not errors."))
+CACHE_HITS = REGISTRY.register(Counter(
+    "vaani_cache_hits_total", "Verdict cache hits."))
+CACHE_MISSES = REGISTRY.register(Counter(
+    "vaani_cache_misses_total", "Verdict cache misses."))
+BYTES_PROCESSED = REGISTRY.register(Counter(
+    "vaani_bytes_processed_total", "Audio bytes received for analysis."))
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    captured = _capture.get()
+    if captured is not None:
+        with _capture_lock:
+            captured[stage] = captured.get(stage, 0.0) + seconds
+
+@contextmanager
+def timer(stage):
+    """with timer("decode"): ...  -> vaani_stage_seconds{stage="decode"}"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - t0)
+
+def start_capture():
+    """Starts collecting {stage: seconds} for the current context. Returns a reset token."""
+    return _capture.set({})
+
+def stop_capture(token):
+    """Stops collecting and returns what was captured since start_capture()."""
+    captured = _capture.get() or {}
+    _capture.reset(token)
+    return captured
+
+@contextmanager
+def capture():
+    """with capture() as stages: ...  (used by worker processes to ship timings back)"""
+    token = start_capture()
+    stages = _capture.get()
+    try:
+        yield stages
+    finally:
+        _capture.reset(token)
+
+def record_stages(stages):
+    """Merges stage timings measured in another process into this registry."""
+    for stage, seconds in (stages or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+def stage_summary():
+    """{stage: {"count", "total_s", "mean_ms"}} for end-of-run reports."""
+    summary = {}
+    for key, (total, count) in STAGE_SECONDS.snapshot().items():
+        stage = dict(key).get("stage", "?")
+        summary[stage] = {"count": count, "total_s": round(total, 3),
+                          "mean_ms": round(1000 * total / count, 3) if count else 0.0}
+    return summary
+
+def print_stage_summary(title="Per-stage timings"):
+    summary = stage_summary()
+    if not summary:
+        return
+    print(f"\n⏱️  {title}:")
+    for stage, s in sorted(summary.items(), key=lambda item: -item[1]["total_s"]):
+        print(f"   {stage:<16} {s['count']:>8} calls  {s['total_s']:>10.2f}s total  {s['mean_ms']:>9.2f} ms avg")
+
+def server_timing_header(stages):
+    """Per-request trace in the standard Server-Timing header format (durations in ms)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in stages.items())
@@ -0,0 +1,225 @@
+import time
+import random
+import threading
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# --- DEFAULTS ---
+SHADOW_THREADS = 1
+SHADOW_MAX_PENDING = 64
+
+# One loaded model. Requests read ModelServer.active ONCE and keep this tuple,
+# so a swap mid-request cannot mix one version's cache key with another's score.
+ServedModel = namedtuple("ServedModel", ["version", "model", "metadata"])
+
+class ModelServer:
+    """
+    The model a server process answers with, swappable without downtime.
+
+    activate() loads and warms a new version on a background thread while
+    requests keep being scored by the current one, then replaces `active` in a
+    single assignment. In-flight requests hold their own ServedModel and finish
+    on the old version; it is freed once the last of them completes.
+
+    An optional shadow (candidate) model, also loaded in the background,
+    scores a random sample of traffic off the request path; only agreement
+    statistics are kept.
+    """
+
+    def __init__(self, loader, warm_up=None):
+        self.loader = loader      # version -> (model, metadata)
+        self.warm_up = warm_up    # model -> None, raises if the model is unusable
+        self.active = None
+        self.shadow = None
+        self.shadow_rate = 0.0
+
+        self._lock = threading.Lock()
+        self._loading = None      # Version being loaded in the background
+        self._on_activated = []   # Callbacks of the load in progress, run once it serves
+        self._shadow_loading = None
+        self._history = []        # [{"version", "activated_at", "load_seconds"}]
+        self._last_error = None
+        self._shadow_pool = ThreadPoolExecutor(max_workers=SHADOW_THREADS, thread_name_prefix="vaani-shadow")
+        self._shadow_pending = 0
+        self._shadow_stats = self._empty_shadow_stats()
+
+    # --- Serving ---
+    def serve(self, version, model, metadata=None):
+        """Installs an already loaded model (startup)."""
+        self._install(ServedModel(version, model, metadata or {}), load_seconds=None)
+
+    def activate(self, version, wait=False, on_activated=None):
+        """
+        Loads + warms `version` in the background, then swaps it in.
+        on_activated(version) runs only once that version is serving (e.g. to
+        promote it in the registry); never if it fails to load or warm up.
+        Returns False if that version is already active or loading.
+        """
+        with self._lock:
+            already_active = bool(self.active and self.active.version == version)
+            if not already_active:
+                if self._loading != version:
+                    self._on_activated = []  # A newer load supersedes the pending one's callbacks
+                if on_activated is not None:
+                    self._on_activated.append(on_activated)
+                if self._loading == version:
+                    return False
+                self._loading = version
+        if already_active:
+            if on_activated is not None:
+                on_activated(version)
+            return False
+
+        thread = threading.Thread(target=self._load_and_swap, args=(version,),
+                                  name="vaani-model-loader", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _load(self, version):
+        t0 = time.perf_counter()
+        model, metadata = self.loader(version)
+        if self.warm_up is not None:
+            self.warm_up(model)
+        return ServedModel(version, model, metadata), time.perf_counter() - t0
+
+    def _load_and_swap(self, version):
+        callbacks = []
+        try:
+            served, seconds = self._load(version)
+            with self._lock:
+                if self._loading == version:
+                    callbacks, self._on_activated = self._on_activated, []
+            self._install(served, seconds)
+            print(f"✅ Model {version} is now serving (loaded + warmed in {seconds:.2f}s)")
+        except Exception as e:
+            self._last_error = f"{version}: {e}"
+            traceback.print_exc()
+            print(f"❌ Could not activate model {version}: {e} (still serving "
+                  f"{self.active.version if self.active else 'nothing'})")
+        finally:
+            with self._lock:
+                if self._loading == version:
+                    self._loading = None
+                    self._on_activated = []
+
+        for callback in callbacks:
+            try:
+                callback(version)
+            except Exception as e:
+                self._last_error = f"{version}: serving, but on_activated failed: {e}"
+                print(f"⚠️ Model {version} is serving, but its activation callback failed: {e}")
+
+    def _install(self, served, load_seconds):
+        with self._lock:
+            self.active = served
+            self._history.append({"version": served.version, "activated_at": time.time(),
+                                  "load_seconds": round(load_seconds, 3) if load_seconds else None})
+            del self._history[:-20]
+            if self.shadow is not None and self.shadow.version == served.version:
+                self.shadow = None  # The candidate was promoted
+
+    # --- Shadow scoring ---
+    def set_shadow(self, version, rate, wait=False):
+        """
+        Loads a candidate on a background thread, then scores `rate` of the
+        traffic with it too. Returns False if that version is already loading.
+        """
+        if not 0.0 < rate <= 1.0:
+            raise ValueError("rate must be in (0, 1]")
+        with self._lock:
+            if self._shadow_loading == version:
+                return False
+            self._shadow_loading = version
+
+        thread = threading.Thread(target=self._load_shadow, args=(version, rate),
+                                  name="vaani-shadow-loader", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _load_shadow(self, version, rate):
+        try:
+            served, seconds = self._load(version)
+            with self._lock:
+                if self._shadow_loading != version:
+                    return  # Cleared or replaced while loading
+                self.shadow, self.shadow_rate = served, rate
+                self._shadow_stats = self._empty_shadow_stats()
+            print(f"🕵️ Shadowing {rate:.0%} of traffic with {version} (loaded in {seconds:.2f}s)")
+        except Exception as e:
+            self._last_error = f"shadow {version}: {e}"
+            traceback.print_exc()
+            print(f"❌ Could not load shadow model {version}: {e}")
+        finally:
+            with self._lock:
+                if self._shadow_loading == version:
+                    self._shadow_loading = None
+
+    def clear_shadow(self):
+        with self._lock:
+            self.shadow, self.shadow_rate = None, 0.0
+            self._shadow_loading = None
+
+    def maybe_shadow(self, tensor, primary_score):
+        """Schedules a shadow prediction for a sample of requests. Never blocks or raises."""
+        shadow = self.shadow
+        if shadow is None or random.random() >= self.shadow_rate:
+            return
+        with self._lock:
+            if self._shadow_pending >= SHADOW_MAX_PENDING:
+                self._shadow_stats["dropped"] += 1
+                return
+            self._shadow_pending += 1
+        self._shadow_pool.submit(self._score_shadow, shadow, tensor, primary_score)
+
+    def _score_shadow(self, shadow, tensor, primary_score):
+        try:
+            score = float(shadow.model.predict(tensor, verbose=0)[0][0])
+            with self._lock:
+                s = self._shadow_stats
+                s["scored"] += 1
+                s["abs_diff_sum"] += abs(score - primary_score)
+                s["max_abs_diff"] = max(s["max_abs_diff"], abs(score - primary_score))
+                if (score > 0.5) == (primary_score > 0.5):
+                    s["label_agreements"] += 1
+        except Exception:
+            with self._lock:
+                self._shadow_stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    @staticmethod
+    def _empty_shadow_stats():
+        return {"scored": 0, "label_agreements": 0, "abs_diff_sum": 0.0,
+                "max_abs_diff": 0.0, "errors": 0, "dropped": 0}
+
+    # --- Introspection ---
+    def status(self):
+        with self._lock:
+            s = dict(self._shadow_stats)
+            shadow = None
+            if self.shadow is not None:
+                scored = s.pop("scored")
+                agreements = s.pop("label_agreements")
+                shadow = {
+                    "version": self.shadow.version,
+                    "rate": self.shadow_rate,
+                    "scored": scored,
+                    "label_agreement": round(agreements / scored, 4) if scored else None,
+                    "mean_abs_diff": round(s.pop("abs_diff_sum") / scored, 6) if scored else None,
+                    **{k: round(v, 6) for k, v in s.items() if k != "abs_diff_sum"},
+                }
+            return {
+                "active": self.active.version if self.active else None,
+                "active_metadata": self.active.metadata if self.active else None,
+                "loading": self._loading,
+                "shadow_loading": self._shadow_loading,
+                "last_error": self._last_error,
+                "shadow": shadow,
+                "history": list(self._history),
+            }
@@ -0,0 +1,59 @@
+import os
+import time
+import random
+import cProfile
+import threading
+
+PROFILES_PATH = "../data_store/profiles"
+MAX_PROFILES = 50
+
+class RequestProfiler:
+    """
+    Runtime-switchable cProfile hook: when enabled, a random sample of requests
+    is profiled and dumped as .prof files (open with snakeviz / pstats).
+    Only one request is profiled at a time to keep the overhead bounded.
+    """
+
+    def __init__(self, output_dir=PROFILES_PATH, max_profiles=MAX_PROFILES):
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.profiled = 0
+        self._busy = threading.Lock()
+
+    def configure(self, enabled, sample_rate=None):
+        self.enabled = bool(enabled)
+        if sample_rate is not None:
+            self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        if self.enabled:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+    def status(self):
+        return {"enabled": self.enabled, "sample_rate": self.sample_rate,
+                "profiled": self.profiled, "output_dir": self.output_dir}
+
+    def maybe_start(self):
+        """Returns a running profiler for this request, or None if not sampled."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile, name):
+        profile.disable()
+        try:
+            path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}.prof")
+            profile.dump_stats(path)
+            self.profiled += 1
+            self._prune()
+        finally:
+            self._busy.release()
+
+    def _prune(self):
+        files = sorted(f for f in os.listdir(self.output_dir) if f.endswith('.prof'))
+        for f in files[:-self.max_profiles]:
+            os.remove(os.path.join(self.output_dir, f))
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from database.db import db
+from database.models import VerdictCache
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+
+LRU_SIZE = 4096
+
+class ResultCache:
+    """
+    Two-tier verdict cache keyed by (audio SHA-256, model version).
+
+    Tier 1: in-process LRU (no I/O at all).
+    Tier 2: the 'verdict_cache' table in the app's SQLAlchemy database,
+            so verdicts survive restarts and are shared between workers.
+    Values are the model's raw score; label/confidence are derived from it.
+    """
+
+    def __init__(self, max_entries=LRU_SIZE):
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_hash, model_version):
+        key = (file_hash, model_version)
+
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                CACHE_HITS.inc(tier="memory")
+                return self._lru[key]
+
+        # Tier 2: persistent store (needs an app context)
+        row = db.session.get(VerdictCache, key)
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            CACHE_MISSES.inc()
+            return None
+
+        self._remember(key, row.raw_score)
+        with self._lock:
+            self.hits += 1
+        CACHE_HITS.inc(tier="database")
+        return row.raw_score
+
+    def put(self, file_hash, model_version, raw_score, commit=True):
+        key = (file_hash, model_version)
+        self._remember(key, raw_score)
+
+        db.session.merge(VerdictCache(file_hash=file_hash, model_version=model_version,
+                                      raw_score=raw_score))
+        if commit:
+            db.session.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._lru), "hits": self.hits, "misses": self.misses}
+
+    def _remember(self, key, raw_score):
+        with self._lock:
+            self._lru[key] = raw_score
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
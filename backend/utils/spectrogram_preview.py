@@ -0,0 +1,147 @@
+import io
+import hashlib
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from utils.metrics import timer
+
+# --- DEFAULTS ---
+PREVIEW_WIDTH = 1000     # Same size as the matplotlib figure (figsize=(10, 4) at 100 dpi)
+PREVIEW_HEIGHT = 400
+MAX_WIDTH = 2000
+MAX_HEIGHT = 1000
+COLORMAP = 'magma'       # What specshow picks for dB data (all values <= 0)
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+SOURCES_MAX_BYTES = 64 * 1024 * 1024  # float16 dB matrices kept for lazy rendering (~33 KB per clip)
+PNG_COMPRESS_LEVEL = 1   # Previews are small and flat: speed over the last few percent
+RENDER_VERSION = "lut-v1"  # Part of every ETag: bump when the rendering changes
+
+@lru_cache(maxsize=4)
+def colormap_lut(name=COLORMAP):
+    """(256, 3) uint8 RGB table of a matplotlib colormap, built once (no figure)."""
+    import matplotlib
+    rgb = matplotlib.colormaps[name](np.arange(256))[:, :3]
+    lut = np.round(rgb * 255).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+def render_png(S_dB, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT):
+    """
+    dB Mel-spectrogram -> PNG bytes, drawn like specshow: autoscaled colours,
+    256-level colormap, low frequencies at the bottom, no axes or margins.
+    """
+    S_dB = np.asarray(S_dB, dtype=np.float32)
+    lo, hi = float(S_dB.min()), float(S_dB.max())
+    norm = (S_dB - lo) / (hi - lo) if hi > lo else np.zeros_like(S_dB)
+    index = np.clip((norm * 256).astype(np.intp), 0, 255)[::-1]  # Row 0 = highest mel bin
+
+    image = Image.fromarray(colormap_lut()[index])
+    image = image.resize((width, height), Image.NEAREST)  # Cells stay crisp, like pcolormesh
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+class PreviewCache:
+    """
+    Lazily rendered spectrogram previews, addressed by the clip's SHA-256.
+
+    Analyses only remember(id, S_dB): the dB matrix they computed anyway,
+    kept as float16 in an LRU bounded by bytes. Never a path: an upload
+    folder entry can be overwritten by the next upload with the same name,
+    while the id (and the ETag) would keep promising the old content. Ids
+    that are no longer remembered are looked up with resolve_source, which
+    must return a content-addressed path (the evidence store). Nothing is
+    drawn until a client asks for the preview. Rendered PNGs are kept in an
+    LRU bounded by total bytes.
+
+    The content of a preview is fully determined by (id, size, RENDER_VERSION),
+    so etag() is known without rendering: a conditional GET that matches is
+    answered with 304 before any decode or cache lookup.
+    """
+
+    def __init__(self, load_mel_db, resolve_source=None, max_bytes=CACHE_MAX_BYTES,
+                 max_source_bytes=SOURCES_MAX_BYTES):
+        self.load_mel_db = load_mel_db          # content-addressed audio path -> dB matrix
+        self.resolve_source = resolve_source    # id -> content-addressed audio path or None
+        self.max_bytes = max_bytes
+        self.max_source_bytes = max_source_bytes
+
+        self._lock = threading.Lock()
+        self._images = OrderedDict()   # (id, width, height) -> PNG bytes
+        self._sources = OrderedDict()  # id -> float16 dB matrix
+        self._bytes = 0
+        self._source_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+    # --- Sources ---
+    def remember(self, preview_id, S_dB):
+        """Keeps the dB matrix the preview of preview_id is drawn from (cheap, no rendering)."""
+        S_dB = np.asarray(S_dB, dtype=np.float16)
+        if S_dB.nbytes > self.max_source_bytes:
+            return
+        with self._lock:
+            previous = self._sources.pop(preview_id, None)
+            if previous is not None:
+                self._source_bytes -= previous.nbytes
+            self._sources[preview_id] = S_dB
+            self._source_bytes += S_dB.nbytes
+            while self._source_bytes > self.max_source_bytes:
+                _, evicted = self._sources.popitem(last=False)
+                self._source_bytes -= evicted.nbytes
+
+    def _mel_db(self, preview_id):
+        with self._lock:
+            S_dB = self._sources.get(preview_id)
+        if S_dB is not None:
+            return S_dB.astype(np.float32)
+        path = self.resolve_source(preview_id) if self.resolve_source is not None else None
+        return self.load_mel_db(path) if path is not None else None
+
+    # --- Previews ---
+    @staticmethod
+    def etag(preview_id, width, height):
+        return hashlib.sha256(f"{preview_id}:{width}x{height}:{RENDER_VERSION}".encode()).hexdigest()[:32]
+
+    def knows(self, preview_id):
+        with self._lock:
+            if preview_id in self._sources:
+                return True
+        return self.resolve_source is not None and self.resolve_source(preview_id) is not None
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def get(self, preview_id, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT):
+        """PNG bytes of the preview (rendered on first request), or None if the id is unknown."""
+        key = (preview_id, width, height)
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self._stats["hits"] += 1
+                return png
+            self._stats["misses"] += 1
+
+        S_dB = self._mel_db(preview_id)
+        if S_dB is None:
+            return None
+        with timer("render_preview"):
+            png = render_png(S_dB, width, height)
+
+        with self._lock:
+            if key not in self._images and len(png) <= self.max_bytes:
+                self._images[key] = png
+                self._bytes += len(png)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._images.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self._stats["evictions"] += 1
+        return png
+
+    def stats(self):
+        with self._lock:
+            return {"images": len(self._images), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "sources": len(self._sources), "source_bytes": self._source_bytes, **self._stats}
@@ -0,0 +1,140 @@
+import hashlib
+import numpy as np
+import soxr
+from utils.metrics import timer
+from utils.audio_processor import spectrogram_to_tensor, SAMPLE_RATE, N_MELS, FMAX
+from utils.audio_decoder import mel_filterbank, power_frames, power_to_db, N_FFT, HOP_LENGTH
+
+# --- DEFAULTS ---
+WINDOW_FRAMES = 128     # Rolling context scored by the CRNN (~2.97 s)
+SCORE_EVERY_S = 0.5
+# Raw PCM accepted from clients: format -> (NumPy dtype, full-scale value)
+PCM_FORMATS = {'s16le': ('<i2', 32768.0), 'f32le': ('<f4', 1.0)}
+
+class IncrementalMel:
+    """
+    Mel power spectrogram computed chunk by chunk.
+
+    Only the samples that still belong to a future frame (< n_fft) are kept
+    between chunks, so each push() computes just the new frames. The stream
+    starts with n_fft // 2 zeros, like librosa.stft(center=True), so frames
+    line up with the ones the file pipeline produces.
+    """
+
+    def __init__(self, sr=SAMPLE_RATE, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS, fmax=FMAX):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self._mel_basis = mel_filterbank(sr, n_fft, n_mels, fmax)
+        self._pending = np.zeros(n_fft // 2, dtype=np.float32)
+
+    def push(self, samples):
+        """Appends mono float32 samples. Returns the new frames, shape (n_mels, k)."""
+        buffer = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        if len(buffer) < self.n_fft:
+            self._pending = buffer
+            return np.zeros((self.n_mels, 0), dtype=np.float32)
+
+        count = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        power = power_frames(buffer, self.n_fft, self.hop_length)
+        self._pending = buffer[count * self.hop_length:].copy()
+        return self._mel_basis @ power.T
+
+class StreamDetector:
+    """
+    State of one live stream: raw PCM in, model-ready tensors out on a fixed cadence.
+
+    Memory per stream is constant: a resampler, fewer than N_FFT pending
+    samples, a (N_MELS x window_frames) ring of mel frames and running score
+    totals. CPU per chunk is proportional to the new audio only; at most one
+    window is scored per chunk, so a client that sends large chunks cannot
+    make the server fall behind.
+    """
+
+    def __init__(self, input_rate, pcm_format='s16le', window_frames=WINDOW_FRAMES,
+                 score_every_s=SCORE_EVERY_S):
+        if pcm_format not in PCM_FORMATS:
+            raise ValueError(f"format must be one of {sorted(PCM_FORMATS)}")
+        if input_rate <= 0 or window_frames <= 0 or score_every_s <= 0:
+            raise ValueError("sample_rate, window and cadence must be positive")
+
+        dtype, self._scale = PCM_FORMATS[pcm_format]
+        self._dtype = np.dtype(dtype)
+        self.input_rate = input_rate
+        self.window_frames = window_frames
+        self.score_every = max(1, round(score_every_s * SAMPLE_RATE / HOP_LENGTH))
+
+        self._resampler = None
+        if input_rate != SAMPLE_RATE:
+            self._resampler = soxr.ResampleStream(input_rate, SAMPLE_RATE, 1, dtype='float32')
+        self._mel = IncrementalMel()
+        self._ring = np.zeros((N_MELS, window_frames), dtype=np.float32)
+        self._carry = b''       # Trailing bytes of a sample split across messages
+        self._since_score = 0
+
+        self.frames = 0
+        self.bytes_received = 0
+        self._sha256 = hashlib.sha256()
+        self._scores = {"count": 0, "sum": 0.0, "min": None, "max": None, "synthetic": 0}
+
+    def feed(self, data):
+        """
+        Consumes one chunk of raw PCM bytes. Returns (end_seconds, (1, 128, 128, 1) tensor)
+        when a window is due for scoring, otherwise None.
+        """
+        self._sha256.update(data)
+        self.bytes_received += len(data)
+
+        data = self._carry + data
+        usable = len(data) - len(data) % self._dtype.itemsize
+        self._carry = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=self._dtype).astype(np.float32) / self._scale
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples)
+
+        with timer("stream_mel"):
+            self._append(self._mel.push(samples))
+
+        if self.frames < self.window_frames or self._since_score < self.score_every:
+            return None
+        self._since_score = 0
+        with timer("tensor"):
+            return self.frames * HOP_LENGTH / SAMPLE_RATE, self._window_tensor()
+
+    def record(self, score, threshold=0.5):
+        """Adds a window score to the running totals used by summary()."""
+        s = self._scores
+        s["count"] += 1
+        s["sum"] += score
+        s["min"] = score if s["min"] is None else min(s["min"], score)
+        s["max"] = score if s["max"] is None else max(s["max"], score)
+        if score <= threshold:
+            s["synthetic"] += 1
+
+    def summary(self):
+        s = self._scores
+        return {
+            "seconds": round(self.frames * HOP_LENGTH / SAMPLE_RATE, 3),
+            "bytes": self.bytes_received,
+            "sha256": self._sha256.hexdigest(),
+            "windows_scored": s["count"],
+            "synthetic_windows": s["synthetic"],
+            "mean_score": round(s["sum"] / s["count"], 4) if s["count"] else None,
+            "min_score": round(s["min"], 4) if s["count"] else None,
+            "max_score": round(s["max"], 4) if s["count"] else None,
+        }
+
+    def _append(self, mel):
+        k = mel.shape[1]
+        if k == 0:
+            return
+        if k >= self.window_frames:
+            self._ring[:] = mel[:, -self.window_frames:]
+        else:
+            self._ring[:, :-k] = self._ring[:, k:]
+            self._ring[:, -k:] = mel
+        self.frames += k
+        self._since_score += k
+
+    def _window_tensor(self):
+        return spectrogram_to_tensor(power_to_db(self._ring))[np.newaxis]
@@ -0,0 +1,133 @@
+import io
+import os
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+SPOOL_MAX_BYTES = 16 * 1024 * 1024  # Larger uploads roll over to an unnamed temp file
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
+# Formats libsndfile decodes from a file object; the rest (m4a) need a path for audioread
+IN_MEMORY_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+class UploadTooLarge(Exception):
+    """Raised when an upload (or archive member) exceeds its byte budget."""
+
+def save_stream(stream, dest_path, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """
+    Copies a binary stream to disk and computes its SHA-256 in the same pass.
+    Returns (hex_digest, bytes_written). Raises UploadTooLarge past max_bytes.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with open(dest_path, 'wb') as out:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                out.close()
+                os.remove(dest_path)
+                raise UploadTooLarge(f"more than {max_bytes} bytes")
+            sha256.update(chunk)
+            out.write(chunk)
+
+    return sha256.hexdigest(), size
+
+def save_upload(file_storage, dest_path, chunk_size=CHUNK_SIZE):
+    """
+    Streams an uploaded file to disk and computes its SHA-256 in the same pass.
+    Returns (hex_digest, bytes_written).
+    """
+    return save_stream(file_storage.stream, dest_path, chunk_size=chunk_size)
+
+def spool_stream(stream, max_bytes=None, spool_max=SPOOL_MAX_BYTES, chunk_size=CHUNK_SIZE):
+    """
+    Reads a binary stream into a SpooledTemporaryFile (RAM up to spool_max bytes,
+    an unnamed, self-deleting temp file beyond that) and computes its SHA-256
+    in the same pass. Returns (buffer rewound to 0, hex_digest, bytes_read).
+    Raises UploadTooLarge past max_bytes.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max)
+
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise UploadTooLarge(f"more than {max_bytes} bytes")
+            sha256.update(chunk)
+            buffer.write(chunk)
+    except Exception:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    return buffer, sha256.hexdigest(), size
+
+def take_upload(file_storage, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """
+    Hashes an already parsed upload where it is (the form parser spooled it
+    once; no second copy) and takes ownership of its stream, so closing the
+    request no longer closes it. Returns (stream rewound to 0, hex_digest, size).
+    Raises UploadTooLarge past max_bytes.
+    """
+    stream = file_storage.stream
+    stream.seek(0)
+    sha256 = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise UploadTooLarge(f"more than {max_bytes} bytes")
+        sha256.update(chunk)
+
+    stream.seek(0)
+    file_storage.stream = io.BytesIO()  # The request closes this placeholder instead
+    return stream, sha256.hexdigest(), size
+
+def decodable_in_memory(filename):
+    return filename.lower().endswith(IN_MEMORY_EXTENSIONS)
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iter_archive_members(file_storage):
+    """
+    Yields (member_name, readable stream, declared_size) for every audio file
+    in an uploaded zip/tar archive. Directories and non-audio members are skipped.
+    """
+    name = file_storage.filename.lower()
+    stream = file_storage.stream
+
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member, info.file_size
+    else:
+        with tarfile.open(fileobj=stream, mode='r:*') as archive:
+            for info in archive:
+                if not info.isfile() or not info.name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+                member = archive.extractfile(info)
+                if member is not None:
+                    yield info.name, member, info.size
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file on disk (used to fingerprint model weights)."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -43,13 +43,12 @@ const UploadComponent = () => {
             // Handle Success
             setStatus("Analysis Complete!");
             setResult(response.data); // Save the JSON response
-            
-            // Construct the image URL. Note: In production, we'd serve static files differently.
-            // For now, we assume the backend saves it in a place we can reach, 
-            // OR we rely on the backend sending a valid path.
-            // *Crucial Fix for Localhost*: We need to fetch the image properly.
-            // For this specific lab setup, let's just show the JSON data first to prove connection.
-            
+
+            // The server returns /spectrogram/<sha256>: rendered on first view, cached (ETag) after
+            if (response.data.spectrogram) {
+                setPreviewUrl(`http://127.0.0.1:5000${response.data.spectrogram}`);
+            }
+
         } catch (error) {
             console.error("Upload Error:", error);
             setStatus("Error: Could not connect to the Forensic Engine.");
@@ -93,6 +92,9 @@ const UploadComponent = () => {
                     <p><strong>Prediction:</strong> <span className={result.result.label === "Synthetic" ? "text-danger fw-bold" : "text-success fw-bold"}>{result.result.label}</span></p>
                     <p><strong>Confidence:</strong> {result.result.confidence}</p>
                     <p><strong>Note:</strong> {result.result.note}</p>
+                    {previewUrl && (
+                        <img src={previewUrl} alt="Mel-spectrogram" className="img-fluid border rounded" />
+                    )}
                     
                     <small className="text-muted d-block mt-3">Raw Server Response:</small>
                     <pre className="small text-muted">{JSON.stringify(result, null, 2)}</pre>